@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""Normalize edilmiş ve yakın tekrar (near-duplicate) tespiti
+
+Kitap kataloğunda başlık + yazar çiftlerini karşılaştırmadan önce normalize
+eder: Türkçe büyük/küçük harf dönüşümü (I -> ı, İ -> i), aksan/şapka
+kaldırma (ş -> s, ğ -> g, ı -> i, â -> a ...), noktalama ve fazla boşluk
+temizliği. Böylece "SUÇ VE CEZA", "Suç ve  Ceza" ve "suc ve ceza" aynı
+kayıt sayılır.
+
+- Tam tekrarlar: normalize edilmiş anahtarın 8 baytlık BLAKE2b özeti ile
+  tek geçişte gruplanır.
+- Yakın tekrarlar (küçük yazım hataları, eksik/fazla kelime): her farklı
+  anahtarın karakter 3'lülerinden (shingle) MinHash imzası çıkarılır ve
+  imzalar LSH bantlarına bölünür. Yalnızca aynı banda düşen anahtarlar
+  karşılaştırılır, bu yüzden maliyet katalog boyutuyla yaklaşık doğrusal
+  artar (1 milyon kitapta ikinci dereceden karşılaştırma yapılmaz). Aday
+  çiftler gerçek Jaccard benzerliğiyle doğrulanır.
+
+Sonuç, Excel satır numaralarıyla kümeler (cluster) listesidir.
+check_excel.py bu modülü kullanır.
+
+Kullanım:
+python3 duplicates.py "kitap listesi.xlsx"
+python3 duplicates.py "kitap listesi.xlsx" --threshold 0.8 --json tekrarlar.json
+python3 duplicates.py ogrenci_listesi.xlsx --columns Ad,Soyad --no-near
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from excel_scan import scan_workbook
+
+# the Turkish case fold is shared with the sahteVeri tools
+sys.path.append(str(Path(__file__).resolve().parent / 'sahteVeri'))
+from text_norm import fold_text  # noqa: E402
+
+DEFAULT_THRESHOLD = 0.7
+SHINGLE = 3
+NUM_PERM = 32
+BANDS = 8                      # 8 bands x 4 rows: pairs above ~0.6 Jaccard usually share a band
+MAX_BUCKET = 50                # larger LSH buckets are linked through a sliding window only
+BUCKET_WINDOW = 8
+MINHASH_SEED = 20240917
+ESTIMATE_MARGIN = 0.2          # signature estimates this far below the threshold still get an exact check
+MAX_LISTED_CLUSTERS = 20
+KEY_SEPARATOR = '\x1f'
+TITLE_KEYWORDS = ('title', 'baslik', 'başlık')
+AUTHOR_KEYWORDS = ('author', 'yazar')
+
+# common precomposed letters folded directly; anything else non-ASCII goes through NFKD
+_FOLD = str.maketrans('ışğçöüâîûêéèáàäëïôóòúùñ', 'isgcouaiueeeaaaeiooouun')
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+@lru_cache(maxsize=1 << 18)
+def normalize_text(value):
+    """Turkish-aware case fold, diacritics stripped, punctuation and repeated spaces removed."""
+    text = fold_text(value).translate(_FOLD)
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(_NON_WORD.sub(' ', text).split())
+
+
+def exact_key(values):
+    normalized = KEY_SEPARATOR.join(normalize_text(v) for v in values)
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest(), normalized
+
+
+def _mix(x):
+    # splitmix64 finalizer on uint64 arrays (wrapping arithmetic)
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def shingle_hashes(keys):
+    """All character 3-gram hashes of `keys` as one array, plus each key's [start, end) offsets."""
+    # one UTF-32 buffer for every key; keys are separated by \0 so no shingle spans two keys
+    padded = [f' {k.replace(KEY_SEPARATOR, " ")} ' for k in keys]
+    codes = np.frombuffer('\0'.join(padded).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    lengths = np.fromiter((len(p) for p in padded), dtype=np.int64, count=len(padded))
+    starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+    grams = np.maximum(lengths - SHINGLE + 1, 0)
+    positions = np.repeat(starts, grams) + (np.arange(grams.sum()) - np.repeat(np.cumsum(grams) - grams, grams))
+    with np.errstate(over='ignore'):
+        value = codes[positions]
+        for i in range(1, SHINGLE):
+            value = _mix(value * np.uint64(0x100000001B3) + codes[positions + i])
+    offsets = np.concatenate(([0], np.cumsum(grams)))
+    return value, offsets
+
+
+def minhash_signatures(hashes, offsets):
+    # shingle hashes are already mixed, so one multiply-add (odd multiplier) per permutation suffices
+    rng = np.random.default_rng(MINHASH_SEED)
+    mult = rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+    add = rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+    signatures = np.empty((len(offsets) - 1, NUM_PERM), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for k in range(NUM_PERM):
+            signatures[:, k] = np.minimum.reduceat(hashes * mult[k] + add[k], offsets[:-1])
+    return signatures
+
+
+def candidate_pairs(signatures, min_estimate=0.0):
+    """Pairs (i < j) sharing at least one LSH band whose signature agreement is >= min_estimate.
+
+    Pairs are filtered and packed as i * n + j per band, so memory follows the
+    surviving candidates rather than the bucket sizes.
+    """
+    n = len(signatures)
+    rows = NUM_PERM // BANDS
+    found = np.empty(0, dtype=np.int64)
+    with np.errstate(over='ignore'):
+        for band in range(BANDS):
+            bucket = np.zeros(n, dtype=np.uint64)
+            for col in range(band * rows, (band + 1) * rows):
+                bucket = _mix(bucket ^ signatures[:, col])
+            order = np.argsort(bucket, kind='stable')
+            sorted_bucket = bucket[order]
+            small = bucket_sizes(sorted_bucket) <= MAX_BUCKET
+            # all pairs inside small buckets; large ones (common words) only link neighbours in a window
+            band_pairs = [found]
+            for step in range(1, MAX_BUCKET):
+                same = sorted_bucket[step:] == sorted_bucket[:-step]
+                if step > BUCKET_WINDOW:
+                    same &= small[step:]
+                if not same.any():
+                    break
+                left, right = order[:-step][same], order[step:][same]
+                agree = (signatures[left] == signatures[right]).mean(axis=1) >= min_estimate
+                left, right = left[agree], right[agree]
+                band_pairs.append(np.minimum(left, right).astype(np.int64) * n + np.maximum(left, right))
+            found = np.unique(np.concatenate(band_pairs))
+    return np.stack([found // n, found % n], axis=1)
+
+
+def bucket_sizes(sorted_bucket):
+    # size of the run of equal values each position belongs to
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_bucket)) + 1))
+    lengths = np.diff(np.concatenate((starts, [len(sorted_bucket)])))
+    return np.repeat(lengths, lengths)
+
+
+def jaccard(hashes, offsets, i, j):
+    a = set(hashes[offsets[i]:offsets[i + 1]].tolist())
+    b = set(hashes[offsets[j]:offsets[j + 1]].tolist())
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def near_links(keys, threshold=DEFAULT_THRESHOLD):
+    """(i, j, similarity) for distinct normalized keys whose 3-gram Jaccard similarity is >= threshold."""
+    if len(keys) < 2:
+        return []
+    hashes, offsets = shingle_hashes(keys)
+    signatures = minhash_signatures(hashes, offsets)
+    # cheap signature estimate first, exact Jaccard only for pairs that come close
+    pairs = candidate_pairs(signatures, threshold - ESTIMATE_MARGIN)
+    links = []
+    for i, j in pairs.tolist():
+        similarity = jaccard(hashes, offsets, i, j)
+        if similarity >= threshold:
+            links.append((i, j, similarity))
+    return links
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def find_duplicates(records, threshold=DEFAULT_THRESHOLD, near=True):
+    """Cluster rows by normalized key; records: iterable of (row_no, [key values]).
+
+    Returns {'rows', 'distinct', 'exact', 'near'}: `exact` clusters share one
+    normalized key, `near` clusters join several keys through similarity
+    links. Each cluster lists its Excel row numbers and example raw values.
+    """
+    key_index = {}
+    key_rows = []
+    key_texts = []
+    examples = []
+    n_rows = 0
+    for row_no, values in records:
+        n_rows += 1
+        digest, normalized = exact_key(values)
+        index = key_index.get(digest)
+        if index is None:
+            index = key_index[digest] = len(key_rows)
+            key_rows.append([])
+            key_texts.append(normalized)
+            examples.append(' | '.join('' if v is None else str(v).strip() for v in values))
+        key_rows[index].append(row_no)
+
+    parent = list(range(len(key_rows)))
+    links = near_links(key_texts, threshold) if near else []
+    for i, j, _ in links:
+        a, b = _find(parent, i), _find(parent, j)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+    weakest = {}
+    for i, _, sim in links:
+        root = _find(parent, i)
+        weakest[root] = min(sim, weakest.get(root, sim))
+
+    members = defaultdict(list)
+    for index in range(len(key_rows)):
+        members[_find(parent, index)].append(index)
+
+    exact, near_clusters = [], []
+    for root, group in members.items():
+        rows = sorted(r for index in group for r in key_rows[index])
+        if len(rows) < 2:
+            continue
+        cluster = {'rows': rows, 'count': len(rows), 'keys': [examples[index] for index in group]}
+        if len(group) == 1:
+            cluster['normalized'] = key_texts[root]
+            exact.append(cluster)
+        else:
+            cluster['min_similarity'] = round(weakest[root], 3)
+            near_clusters.append(cluster)
+    exact.sort(key=lambda c: (-c['count'], c['rows'][0]))
+    near_clusters.sort(key=lambda c: (-c['count'], c['rows'][0]))
+    return {'rows': n_rows, 'distinct': len(key_rows), 'exact': exact, 'near': near_clusters}
+
+
+def find_column(header, keywords, default):
+    for i, value in enumerate(header):
+        text = str(value).strip().lower() if value is not None else ''
+        if any(k in text for k in keywords):
+            return i
+    return default
+
+
+def resolve_book_columns(header):
+    # same keywords as ExcelReaderService.FindColumnIndex; first two columns otherwise
+    cols = [find_column(header, TITLE_KEYWORDS, 0), find_column(header, AUTHOR_KEYWORDS, 1)]
+    return cols, cols
+
+
+def print_clusters(report, limit=5):
+    exact_rows = sum(c['count'] - 1 for c in report['exact'])
+    near_rows = sum(c['count'] - 1 for c in report['near'])
+    print(f"Normalize edilmiş tekrar grupları: {len(report['exact'])} ({exact_rows} fazla satır)")
+    for cluster in report['exact'][:limit]:
+        print(f"  {cluster['keys'][0]} -> {cluster['count']} kez, satırlar {cluster['rows'][:10]}")
+    print(f"Yakın tekrar kümeleri: {len(report['near'])} ({near_rows} fazla satır)")
+    for cluster in report['near'][:limit]:
+        keys = ' ~ '.join(cluster['keys'][:3])
+        print(f"  {keys} (benzerlik >= {cluster['min_similarity']}), satırlar {cluster['rows'][:10]}")
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Normalize edilmiş ve yakın tekrar tespiti')
+    p.add_argument('path', help='Çalışma kitabı (.xlsx)')
+    p.add_argument('--sheet', default=None, help='Sayfa adı (verilmezse etkin sayfa)')
+    p.add_argument('--columns', default=None,
+                   help='Anahtar sütun başlıkları, virgülle (ör. Ad,Soyad). Varsayılan: başlık + yazar sütunları')
+    p.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                   help=f'Yakın tekrar için en düşük 3\'lü Jaccard benzerliği. Varsayılan: {DEFAULT_THRESHOLD}')
+    p.add_argument('--no-near', action='store_true', help='Yalnızca normalize edilmiş tam tekrarları bul')
+    p.add_argument('--limit', type=int, default=MAX_LISTED_CLUSTERS, help=f'Ekrana yazılacak küme sayısı. Varsayılan: {MAX_LISTED_CLUSTERS}')
+    p.add_argument('--json', default=None, help='Tüm kümelerin yazılacağı JSON dosyası')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.columns:
+        names = [c.strip().lower() for c in args.columns.split(',')]
+
+        def resolve(header):
+            cols = [find_column(header, (name,), -1) for name in names]
+            if min(cols) < 0:
+                raise ValueError(f"Sütun bulunamadı: {args.columns}")
+            return cols, cols
+    else:
+        resolve = resolve_book_columns
+    try:
+        scan = scan_workbook(args.path, sheet=args.sheet, resolve_columns=resolve, preview_rows=0, detail_rows=0,
+                             collect_keys=True)
+    except ValueError as ex:
+        print(ex, file=sys.stderr)
+        return 1
+    report = find_duplicates(scan['key_rows'], threshold=args.threshold, near=not args.no_near)
+    print(f"{args.path}: {report['rows']} dolu satır, {report['distinct']} farklı anahtar")
+    print_clusters(report, args.limit)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"Rapor -> {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Tek geçişli Excel tarayıcı
+
+Çalışma kitabını openpyxl `read_only=True` modunda açar ve satırları
+`iter_rows(values_only=True)` ile tek seferde dolaşır. Aynı geçişte:
+- önizleme satırları,
+- boş başlık/yazar analizi,
+- başlık + yazar çiftlerinin tekrar (duplicate) sayıları
+üretilir. İstenirse anahtar değerleri satır numaralarıyla birlikte
+toplanır (duplicates.py normalize edilmiş ve yakın tekrarlar için kullanır). Hücre nesneleri tutulmadığı için bellek kullanımı dosya boyutundan
+bağımsızdır; süre dosya boyutuyla doğrusal artar.
+
+check_excel.py ve analyze_empty_rows.py bu modülü kullanır.
+"""
+from collections import Counter
+
+import openpyxl
+
+
+def cell_text(value):
+    return str(value).strip() if value is not None else ""
+
+
+def scan_workbook(path, sheet=None, required_cols=(0, 1), key_cols=None, resolve_columns=None,
+                  preview_rows=10, detail_rows=20, collect_keys=False):
+    """Scan one sheet in a single pass; columns are 0-based indexes.
+
+    A row is empty when any of `required_cols` is blank; the other rows are
+    counted by the joined text of `key_cols` (default: `required_cols`) to
+    find duplicates. `resolve_columns(header)` may pick both from the header.
+    With `collect_keys`, `key_rows` keeps (row number, raw key values) of the
+    non-empty rows for duplicates.find_duplicates.
+    """
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        if resolve_columns is not None:
+            required_cols, key_cols = resolve_columns(header)
+        if key_cols is None:
+            key_cols = required_cols
+        result = {
+            'path': str(path),
+            'sheet': ws.title,
+            'header': header,
+            'max_column': len(header),
+            'row_count': 0,
+            'preview': [],
+            'valid_rows': 0,
+            'empty_rows': [],
+            'empty_details': [],
+            'pair_counts': Counter(),
+            'key_rows': [],
+        }
+        for row_no, row in enumerate(rows, start=2):
+            result['row_count'] += 1
+            if len(row) > result['max_column']:
+                result['max_column'] = len(row)
+            if len(result['preview']) < preview_rows:
+                result['preview'].append((row_no, list(row)))
+
+            values = [row[i] if i < len(row) else None for i in required_cols]
+            if not all(cell_text(v) for v in values):
+                result['empty_rows'].append(row_no)
+                if len(result['empty_details']) < detail_rows:
+                    result['empty_details'].append({
+                        'row': row_no,
+                        'values': values,
+                        'first_columns': list(row[:5]),
+                    })
+            else:
+                result['valid_rows'] += 1
+                key_values = [row[i] if i < len(row) else None for i in key_cols]
+                result['pair_counts'][" | ".join(cell_text(v) for v in key_values)] += 1
+                if collect_keys:
+                    result['key_rows'].append((row_no, key_values))
+    finally:
+        wb.close()
+
+    counts = result['pair_counts']
+    result['duplicates'] = {k: v for k, v in counts.items() if v > 1}
+    result['pair_total'] = sum(counts.values())
+    return result
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""Üreteç ve Excel araçları için kıyaslama (benchmark) takımı
+
+Her durum (case) her boyut için ayrı bir alt süreçte çalışır; böylece
+ölçülen en yüksek bellek (peak RSS) önceki durumlardan etkilenmez.
+Hazırlık adımları (fikstür dosyaları, değer havuzları) süreye dahil edilmez.
+Şablon olarak çalışma kitaplarının yalnızca başlıkları kullanılır; böylece
+generate_data.py'nin yazdığı satır sayısı ölçümü değiştirmez ve aynı tohumla
+ölçümler tekrarlanabilirdir. Sütun planı ise gerçek satırlardan çıkarılır, yani
+durumlar çalışma kitaplarının kendi düzeninde çalışır. Satır/sn gerçekten
+üretilen (ya da okunan) satırlardan hesaplanır.
+
+Durumlar:
+- generate_books / generate_students: generate_rows_for_dataframe (boş şablona n satır)
+- generate_loans: generate_loans (ödünç üretimi + birleştirme)
+- backfill: attach_master_fields (ödünç sayfasına başlık/yazar/ad soyad taşıma;
+  hiç hücre dolmazsa durum hata verir)
+- save_df / load_df: xlsx yazma / okuma
+- check_excel / analyze_empty_rows: kök dizindeki tarama betikleri
+
+Sonuçlar JSON geçmiş dosyasına eklenir; `compare` son çalıştırmayı
+öncekiyle (ya da `--baseline` ile seçilenle) karşılaştırır ve eşiği aşan
+yavaşlama/bellek artışında çıkış kodu 1 döner. Süre farkı `--min-delta`
+saniyeden (varsayılan 0,05) küçükse zamanlayıcı gürültüsü sayılır.
+
+Kullanım:
+python3 benchmark.py run --sizes 1k,100k --label "value pools"
+python3 benchmark.py run --sizes 1M --cases generate_loans,backfill --repeat 3
+python3 benchmark.py compare --threshold 0.10
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import runpy
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+DEFAULT_HISTORY = 'benchmark_history.json'
+DEFAULT_WORKDIR = '.benchmark'
+DEFAULT_SIZES = '1k,100k,1M'
+DEFAULT_THRESHOLD = 0.10
+# Slowdowns smaller than this many seconds are timer noise, whatever the ratio
+DEFAULT_MIN_DELTA = 0.05
+BENCH_SEED = 20240901
+
+CASES = ['generate_books', 'generate_students', 'generate_loans', 'backfill',
+         'save_df', 'load_df', 'check_excel', 'analyze_empty_rows']
+# Rows in the master sheets used by the loan cases (capped so 1M loans stay about the loans)
+MAX_MASTER_ROWS = 100_000
+# Bumped whenever fixture contents change, so stale files in the workdir are not reused
+FIXTURE_VERSION = 3
+
+
+def parse_size(text):
+    text = text.strip()
+    units = {'k': 1_000, 'K': 1_000, 'm': 1_000_000, 'M': 1_000_000}
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def size_label(n):
+    if n % 1_000_000 == 0:
+        return f"{n // 1_000_000}M"
+    if n % 1_000 == 0:
+        return f"{n // 1_000}k"
+    return str(n)
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+# --- case bodies (run inside the child process) ---
+
+def templates():
+    """Header-only frames of the three workbooks and their column plans.
+
+    generate_data.py rewrites these workbooks, so their row counts must not
+    leak into a case; the plans are still resolved from the loaded rows, since
+    an empty frame would fall back to DEFAULT_COLUMNS instead of the real layout.
+    """
+    import generate_data as gd
+    frames = [gd.load_df(str(HERE / fn)) for fn in (gd.BOOKS_FN, gd.STUDENTS_FN, gd.LOANS_FN)]
+    plans = gd.build_plans(*frames)
+    books, students, loans = (df.head(0) for df in frames)
+    return books, students, loans, plans
+
+
+def warm_pools():
+    import value_pools
+    for kind in value_pools.VALUE_FACTORIES:
+        value_pools.get_pool(kind)
+
+
+def fixture(workdir, kind, n):
+    """xlsx with exactly n generated rows of one kind, written once per size and reused."""
+    import generate_data as gd
+    path = Path(workdir) / f"{kind}-{size_label(n)}-v{FIXTURE_VERSION}.xlsx"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        books, students, _, plans = templates()
+        template = books if kind == 'book' else students
+        df = gd.generate_rows_for_dataframe(template, n, kind=kind, plan=plans[kind], seed=BENCH_SEED).head(n)
+        with contextlib.redirect_stdout(io.StringIO()):
+            gd.save_df(df, str(path))
+    return path
+
+
+def master_frames(n):
+    import generate_data as gd
+    books, students, loans, plans = templates()
+    masters = min(n, MAX_MASTER_ROWS)
+    books = gd.generate_rows_for_dataframe(books, masters, kind='book', plan=plans['book'], seed=BENCH_SEED)
+    students = gd.generate_rows_for_dataframe(students, masters, kind='student', plan=plans['student'],
+                                              seed=BENCH_SEED)
+    return books, students, loans, plans
+
+
+def setup_case(case, n, workdir):
+    """Untimed preparation; returns a zero-argument callable that does the measured work.
+
+    The callable returns the frame it produced or the number of rows it handled.
+    """
+    import numpy as np
+    import generate_data as gd
+    warm_pools()
+
+    if case in ('generate_books', 'generate_students'):
+        kind = 'book' if case == 'generate_books' else 'student'
+        books, students, _, plans = templates()
+        template = books if kind == 'book' else students
+        plan = plans[kind]
+        return lambda: gd.generate_rows_for_dataframe(template, n, kind=kind, plan=plan, seed=BENCH_SEED)
+
+    if case == 'generate_loans':
+        books, students, loans, plans = master_frames(n)
+        return lambda: gd.generate_loans(books, students, existing_loans_df=loans, n=n, plans=plans, seed=BENCH_SEED)
+
+    if case == 'backfill':
+        books, students, loans, plans = master_frames(n)
+        rng = np.random.default_rng(BENCH_SEED)
+        book_ids = gd.id_values(books, plans['book'], 200)
+        student_ids = gd.id_values(students, plans['student'], 100)
+        frame = {c: np.full(n, None, dtype=object) for c in plans['loan']['roles']}
+        frame[gd.BOOK_KEY] = gd.normalize_id_keys(book_ids[rng.integers(0, len(book_ids), size=n)])
+        frame[gd.STUDENT_KEY] = gd.normalize_id_keys(student_ids[rng.integers(0, len(student_ids), size=n)])
+        import pandas as pd
+        frame = pd.DataFrame(frame)
+        filled = gd.plan_columns(plans['loan'], *gd.BOOK_FIELD_ROLES, *gd.STUDENT_FIELD_ROLES)
+
+        def backfill():
+            out = gd.attach_master_fields(frame, books, students, plans)
+            # a layout without denormalized columns would time an empty merge
+            if not filled or out[filled].isna().all().all():
+                raise ValueError('backfill filled no title/author/name cells')
+            return out
+        return backfill
+
+    if case == 'save_df':
+        books, students, loans, plans = master_frames(min(n, 1_000))
+        df = gd.generate_loans(books, students, existing_loans_df=loans, n=n, plans=plans, seed=BENCH_SEED)
+        path = Path(workdir) / f"save-{size_label(n)}.xlsx"
+
+        def save():
+            with contextlib.redirect_stdout(io.StringIO()):
+                gd.save_df(df, str(path))
+            return len(df)
+        return save
+
+    if case == 'load_df':
+        path = fixture(workdir, 'book', n)
+        return lambda: gd.load_df(str(path), cache=False)
+
+    if case in ('check_excel', 'analyze_empty_rows'):
+        path = fixture(workdir, 'book', n)
+        script = ROOT / f"{case}.py"
+
+        def scan():
+            argv = sys.argv
+            sys.argv = [str(script), str(path)]
+            sys.path.insert(0, str(ROOT))
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    runpy.run_path(str(script), run_name='__main__')
+            finally:
+                sys.argv = argv
+                sys.path.remove(str(ROOT))
+            # the fixture holds exactly n rows
+            return n
+        return scan
+
+    raise ValueError(f"Unknown case: {case}")
+
+
+def run_case_here(case, n, workdir):
+    work = setup_case(case, n, workdir)
+    setup_rss = peak_rss_mb()
+    started = time.perf_counter()
+    out = work()
+    seconds = time.perf_counter() - started
+    rows = out if isinstance(out, int) else len(out)
+    return {'seconds': seconds, 'rows': rows, 'peak_rss_mb': round(peak_rss_mb(), 1), 'setup_rss_mb': round(setup_rss, 1)}
+
+
+def run_case(case, n, workdir):
+    """One measurement in a fresh interpreter so peak RSS belongs to this case only."""
+    cmd = [sys.executable, str(Path(__file__).resolve()), '_case', case, str(n), str(workdir)]
+    out = subprocess.run(cmd, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"{case} ({size_label(n)}) failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# --- history ---
+
+def load_history(path):
+    p = Path(path)
+    if p.exists():
+        return json.loads(p.read_text(encoding='utf-8'))
+    return {'runs': []}
+
+
+def save_history(path, history):
+    Path(path).write_text(json.dumps(history, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+def result_key(r):
+    return (r['case'], r['size'])
+
+
+def compare_runs(base, new, threshold, min_delta=DEFAULT_MIN_DELTA):
+    """Rows for every (case, size) present in both runs; flags slowdowns/memory growth over threshold.
+
+    A slowdown also has to exceed `min_delta` seconds, so millisecond cases
+    are not flagged for timer noise.
+    """
+    base_results = {result_key(r): r for r in base['results']}
+    rows = []
+    for r in new['results']:
+        b = base_results.get(result_key(r))
+        if b is None:
+            continue
+        time_change = r['seconds'] / b['seconds'] - 1 if b['seconds'] > 0 else 0.0
+        mem_change = r['peak_rss_mb'] / b['peak_rss_mb'] - 1 if b['peak_rss_mb'] > 0 else 0.0
+        rows.append({
+            'case': r['case'],
+            'size': r['size'],
+            'base_seconds': b['seconds'],
+            'seconds': r['seconds'],
+            'time_change': round(time_change, 4),
+            'base_peak_rss_mb': b['peak_rss_mb'],
+            'peak_rss_mb': r['peak_rss_mb'],
+            'memory_change': round(mem_change, 4),
+            'regression': (time_change > threshold and r['seconds'] - b['seconds'] > min_delta)
+                          or mem_change > threshold,
+        })
+    return rows
+
+
+def pick_run(runs, ref):
+    # ref: list index (negative allowed) or a label
+    try:
+        return runs[int(ref)]
+    except ValueError:
+        matches = [r for r in runs if r.get('label') == ref]
+        if not matches:
+            raise ValueError(f"No run labelled {ref!r}")
+        return matches[-1]
+
+
+# --- commands ---
+
+def cmd_run(args):
+    sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+    cases = [c.strip() for c in args.cases.split(',')] if args.cases else CASES
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        raise ValueError(f"Unknown case(s): {', '.join(unknown)}")
+    workdir = Path(args.workdir).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    for n in sizes:
+        for case in cases:
+            samples = [run_case(case, n, workdir) for _ in range(args.repeat)]
+            seconds = statistics.median(s['seconds'] for s in samples)
+            rows = samples[0]['rows']
+            result = {
+                'case': case,
+                'size': n,
+                'rows': rows,
+                'seconds': round(seconds, 4),
+                'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else None,
+                'peak_rss_mb': max(s['peak_rss_mb'] for s in samples),
+                'setup_rss_mb': max(s['setup_rss_mb'] for s in samples),
+                'repeat': args.repeat,
+            }
+            results.append(result)
+            print(f"{case:20} {size_label(n):>6}  {result['seconds']:9.3f} sn  "
+                  f"{result['rows_per_sec'] or 0:12,.0f} satır/sn  {result['peak_rss_mb']:8.1f} MB", file=sys.stderr)
+
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'label': args.label,
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    history = load_history(args.history)
+    history['runs'].append(run)
+    save_history(args.history, history)
+    print(f"{len(results)} sonuç -> {args.history}", file=sys.stderr)
+    return 0
+
+
+def cmd_compare(args):
+    runs = load_history(args.history)['runs']
+    if len(runs) < 2 and args.baseline is None:
+        print('Karşılaştırma için en az iki çalıştırma gerekli', file=sys.stderr)
+        return 1
+    new = pick_run(runs, args.run)
+    base = pick_run(runs, args.baseline if args.baseline is not None else -2)
+    rows = compare_runs(base, new, args.threshold, args.min_delta)
+    for row in rows:
+        flag = 'YAVAŞLAMA' if row['regression'] else 'ok'
+        print(f"{row['case']:20} {size_label(row['size']):>6}  {row['base_seconds']:9.3f} -> {row['seconds']:9.3f} sn "
+              f"({row['time_change']:+.1%})  {row['base_peak_rss_mb']:8.1f} -> {row['peak_rss_mb']:8.1f} MB "
+              f"({row['memory_change']:+.1%})  {flag}")
+    if args.json:
+        print(json.dumps({'base': base.get('timestamp'), 'run': new.get('timestamp'), 'threshold': args.threshold,
+                          'rows': rows}, ensure_ascii=False, indent=2))
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='sahteVeri kıyaslama takımı')
+    sub = p.add_subparsers(dest='command', required=True)
+
+    r = sub.add_parser('run', help='Kıyaslamaları çalıştır ve geçmişe ekle')
+    r.add_argument('--sizes', default=DEFAULT_SIZES, help=f'Satır sayıları (1k, 100k, 1M...). Varsayılan: {DEFAULT_SIZES}')
+    r.add_argument('--cases', default=None, help=f"Virgülle ayrılmış durumlar. Varsayılan: hepsi ({', '.join(CASES)})")
+    r.add_argument('--repeat', type=int, default=1, help='Tekrar sayısı (süre için ortanca alınır). Varsayılan: 1')
+    r.add_argument('--history', default=DEFAULT_HISTORY, help=f'JSON geçmiş dosyası. Varsayılan: {DEFAULT_HISTORY}')
+    r.add_argument('--workdir', default=DEFAULT_WORKDIR, help=f'Fikstür ve geçici dosya klasörü. Varsayılan: {DEFAULT_WORKDIR}')
+    r.add_argument('--label', default=None, help='Bu çalıştırmanın etiketi (ör. değişiklik adı)')
+
+    c = sub.add_parser('compare', help='Son çalıştırmayı öncekiyle karşılaştır')
+    c.add_argument('--history', default=DEFAULT_HISTORY, help=f'JSON geçmiş dosyası. Varsayılan: {DEFAULT_HISTORY}')
+    c.add_argument('--run', default='-1', help='Karşılaştırılacak çalıştırma (sıra no ya da etiket). Varsayılan: -1 (son)')
+    c.add_argument('--baseline', default=None, help='Taban çalıştırma (sıra no ya da etiket). Varsayılan: sondan bir önceki')
+    c.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                   help=f'Yavaşlama/bellek artışı eşiği (oran). Varsayılan: {DEFAULT_THRESHOLD}')
+    c.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA,
+                   help=f'Yavaşlama sayılması için en küçük süre farkı (sn). Varsayılan: {DEFAULT_MIN_DELTA}')
+    c.add_argument('--json', action='store_true', help='Karşılaştırmayı JSON olarak da yazdır')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == '_case':
+        # internal: one measurement, result as JSON on the last stdout line
+        case, n, workdir = argv[1], int(argv[2]), argv[3]
+        print(json.dumps(run_case_here(case, n, workdir)))
+        return 0
+    args = parse_args(argv)
+    if args.command == 'run':
+        return cmd_run(args)
+    return cmd_compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
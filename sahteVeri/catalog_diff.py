@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""Katalog çalışma kitabının iki sürümü arasında satır düzeyinde fark
+
+Her hafta gelen yeni `kitap listesi.xlsx` / `ogrenci_listesi.xlsx` ile bir
+önceki sürümü karşılaştırır ve yalnızca eklenen, silinen ve değişen satırları
+küçük bir fark (delta) tablosuna yazar; tüm dosyayı yeniden içe aktarmak
+gerekmez.
+
+- Sütunlar generate_data.detect_id_col / resolve_column_role ile bulunur. İki
+  sürümde de aynı kimlik sütunu (KitapID, OgrenciID, Numara...) varsa
+  satırlar kimlikle, yoksa (ya da kimlik hücresi boşsa) normalleştirilmiş
+  başlık + yazar (öğrencilerde ad + soyad) ile eşleştirilir.
+- Her satırın eşleştirme anahtarının ve iki sürümde de bulunan sütunlardaki
+  normalleştirilmiş değerlerinin (boşluklar sadeleştirilmiş, 5 ile 5.0 aynı,
+  tarihler ISO) 64 bitlik özetleri alınır. Aynı anahtar + özet çiftleri
+  değişmemiş sayılır; kalan aynı anahtarlı satırlar değişmiş, eşi
+  olmayanlar eklenmiş/silinmiştir. Satır sırası fark sayılmaz.
+- İki çalışma kitabı xlsx_stream.iter_xlsx_sheets ile `CHUNK_ROWS` satırlık
+  parçalar halinde iki kez okunur: ilk geçişte yalnızca satır başına
+  özetler (satır başına 24 bayt), ikinci geçişte yalnızca farklı satırlar
+  tutulur. 1 milyon satırlık dosyalar hücre nesneleri bellekte tutulmadan
+  karşılaştırılır.
+
+Fark tablosu `Değişiklik` (eklendi / silindi / değişti) ve `DeğişenAlanlar`
+sütunlarıyla başlar, ardından yeni sürümün sütunları gelir: eklenen ve
+değişen satırlar yeni değerleri, silinenler eski değerleri taşır. Biçim
+uzantıdan seçilir (.xlsx, .csv, .parquet).
+
+Kullanım:
+python3 catalog_diff.py eski/"kitap listesi.xlsx" "kitap listesi.xlsx"
+python3 catalog_diff.py eski/ogrenci_listesi.xlsx ogrenci_listesi.xlsx --out ogrenci_fark.csv
+python3 catalog_diff.py onceki.xlsx yeni.xlsx --kind book --json fark_ozet.json
+"""
+import argparse
+import datetime as dt
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from generate_data import ID_CANDIDATES, detect_id_col, plan_column, resolve_column_role
+from table_stream import table_format, write_table
+from text_norm import text_key
+from xlsx_stream import iter_xlsx_sheets
+
+CHUNK_ROWS = 20_000
+OP_COLUMN = 'Değişiklik'
+FIELDS_COLUMN = 'DeğişenAlanlar'
+ADDED, REMOVED, CHANGED = 'eklendi', 'silindi', 'değişti'
+# roles matched when a row has no id, per workbook kind
+NAME_ROLES = {'book': ('title', 'author'), 'student': ('first_name', 'last_name')}
+# header roles that mark a real identifier; detect_id_col falls back to the first column otherwise
+ID_ROLES = ('id', 'ref', 'student_number')
+KEY_SEPARATOR = '\x1f'
+
+
+def guess_kind(path):
+    name = Path(path).name.lower()
+    return 'student' if any(k in name for k in ('ogrenci', 'öğrenci', 'student')) else 'book'
+
+
+def header_names(row):
+    return [str(v).strip() if v is not None else f'Sütun{i + 1}' for i, v in enumerate(row)]
+
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    """(header, rows) per chunk of a workbook, streamed with xlsx_stream.iter_xlsx_sheets.
+
+    Sheets with the first sheet's header are read in order (save_df spills
+    long tables into Sheet2, Sheet3...). Rows are padded to the header and
+    entirely empty rows are skipped.
+    """
+    header = None
+    for _, rows in iter_xlsx_sheets(path):
+        names = header_names(next(rows, ()))
+        if header is None:
+            header = names
+        elif names != header:
+            continue
+        width = len(header)
+        chunk = []
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            chunk.append(row[:width] + (None,) * (width - len(row)))
+            if len(chunk) >= chunk_rows:
+                yield header, chunk
+                chunk = []
+        if chunk:
+            yield header, chunk
+    # a workbook without data rows still reports its header
+    yield header or [], []
+
+
+def read_header(path):
+    # header plus the first data rows, enough for detect_id_col
+    for header, rows in iter_chunks(path, chunk_rows=100):
+        return header, rows
+    return [], []
+
+
+def cell_text(value):
+    """Comparable cell text: blanks are '', 5 and 5.0 meet, dates as ISO, inner whitespace collapsed."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ''
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    if isinstance(value, (float, np.floating)):
+        return str(int(value)) if float(value).is_integer() else repr(float(value))
+    if isinstance(value, dt.datetime):
+        return value.date().isoformat() if value.time() == dt.time() else value.isoformat()
+    if isinstance(value, dt.date):
+        return value.isoformat()
+    return ' '.join(str(value).split())
+
+
+def column_text(values):
+    # only the distinct values of a column are normalized, then spread back by code
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    texts = np.array([cell_text(v) for v in uniques] + [''], dtype=object)
+    return texts[codes]
+
+
+def build_layout(path, kind):
+    header, rows = read_header(path)
+    sample = pd.DataFrame(rows[:1] or [[None] * len(header)], columns=header)
+    id_col = detect_id_col(sample, ID_CANDIDATES[kind])
+    if id_col is not None and resolve_column_role(id_col, kind) not in ID_ROLES:
+        id_col = None
+    # roles resolved after the id check, so a fallback id guess cannot hide the title column
+    plan = {'kind': kind, 'id_col': id_col, 'roles': {c: resolve_column_role(c, kind, id_col) for c in header}}
+    return {'header': header, 'id': id_col,
+            'names': [plan_column(plan, role) for role in NAME_ROLES[kind]]}
+
+
+def match_layouts(old, new):
+    """Columns used for keys and row hashes; the id is only used when both versions have the same one."""
+    common = [c for c in old['header'] if c in set(new['header'])]
+    id_col = old['id'] if old['id'] is not None and old['id'] == new['id'] else None
+    names = [c for c in old['names'] if c is not None and c in common]
+    if names != [c for c in new['names'] if c is not None]:
+        names = []
+    if id_col is None and not names:
+        raise ValueError('No shared id or title/author (name/surname) columns to match rows on')
+    return {'columns': common, 'id': id_col, 'names': names, 'header': new['header'],
+            'added_columns': [c for c in new['header'] if c not in set(common)],
+            'removed_columns': [c for c in old['header'] if c not in set(common)]}
+
+
+def chunk_frame(header, rows):
+    return pd.DataFrame.from_records(rows, columns=range(len(header))).set_axis(header, axis=1)
+
+
+def chunk_hashes(frame, match):
+    """(key hash, row hash) per row: the key is the id, or the normalized names for rows without one."""
+    texts = pd.DataFrame({c: column_text(frame[c]) for c in match['columns']})
+    name_key = None
+    if match['names']:
+        parts = [text_key(frame[c]).fillna('') for c in match['names']]
+        name_key = 'n' + parts[0].str.cat(parts[1:], sep=KEY_SEPARATOR)
+    if match['id'] is not None:
+        ids = pd.Series(texts[match['id']])
+        keys = ('i' + ids).where(ids != '', name_key if name_key is not None else 'i')
+    else:
+        keys = name_key
+    key_hash = pd.util.hash_array(keys.to_numpy(dtype=object))
+    row_hash = pd.util.hash_pandas_object(texts, index=False).to_numpy()
+    return key_hash, row_hash
+
+
+def scan_hashes(path, match, chunk_rows=CHUNK_ROWS):
+    """Pass 1: key hash, row hash and position of every row; nothing else is kept."""
+    keys, hashes = [], []
+    for header, rows in iter_chunks(path, chunk_rows):
+        if rows:
+            key_hash, row_hash = chunk_hashes(chunk_frame(header, rows), match)
+            keys.append(key_hash)
+            hashes.append(row_hash)
+    keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.uint64)
+    hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+    return pd.DataFrame({'key': keys, 'hash': hashes, 'pos': np.arange(len(keys), dtype=np.int64)})
+
+
+def occurs_once(values):
+    # mask of the values that appear exactly once
+    order = np.argsort(values, kind='stable')
+    ordered = values[order]
+    same = ordered[1:] == ordered[:-1]
+    repeated = np.zeros(len(values), dtype=bool)
+    repeated[1:] |= same
+    repeated[:-1] |= same
+    mask = np.empty(len(values), dtype=bool)
+    mask[order] = ~repeated
+    return mask
+
+
+def pair_rows(old, new):
+    """Positions of unchanged rows, changed (old, new) pairs, removed and added rows.
+
+    Nearly every row is unique and unchanged; those are settled by one sorted
+    intersection of key + hash. Rows repeat in catalogs (copies, namesakes),
+    so the rest are paired as multisets: the k-th occurrence of a key + hash
+    in one version meets the k-th in the other, then leftovers with the same
+    key pair up as changes.
+    """
+    def occurrence(df, cols):
+        return df.assign(occ=df.groupby(cols, sort=False).cumcount())
+
+    old_rows = pd.util.hash_pandas_object(old[['key', 'hash']], index=False).to_numpy()
+    new_rows = pd.util.hash_pandas_object(new[['key', 'hash']], index=False).to_numpy()
+    old_once, new_once = occurs_once(old_rows), occurs_once(new_rows)
+    common = np.intersect1d(old_rows[old_once], new_rows[new_once], assume_unique=True)
+    old_same = old_once & np.isin(old_rows, common)
+    new_same = new_once & np.isin(new_rows, common)
+    old, new = old[~old_same], new[~new_same]
+
+    same = occurrence(old, ['key', 'hash']).merge(occurrence(new, ['key', 'hash']), on=['key', 'hash', 'occ'],
+                                                  how='outer', suffixes=('_old', '_new'), indicator=True)
+    unchanged = int(old_same.sum()) + int((same['_merge'] == 'both').sum())
+    old_rest = same.loc[same['_merge'] == 'left_only', ['key', 'pos_old']].rename(columns={'pos_old': 'pos'})
+    new_rest = same.loc[same['_merge'] == 'right_only', ['key', 'pos_new']].rename(columns={'pos_new': 'pos'})
+    paired = occurrence(old_rest.sort_values('pos'), ['key']).merge(
+        occurrence(new_rest.sort_values('pos'), ['key']), on=['key', 'occ'], how='outer',
+        suffixes=('_old', '_new'), indicator=True)
+    changed = paired[paired['_merge'] == 'both']
+    return {
+        'unchanged': unchanged,
+        'changed_old': changed['pos_old'].to_numpy(np.int64),
+        'changed_new': changed['pos_new'].to_numpy(np.int64),
+        'removed': np.sort(paired.loc[paired['_merge'] == 'left_only', 'pos_old'].to_numpy(np.int64)),
+        'added': np.sort(paired.loc[paired['_merge'] == 'right_only', 'pos_new'].to_numpy(np.int64)),
+    }
+
+
+def iter_selected(path, positions, chunk_rows=CHUNK_ROWS):
+    """Pass 2: (positions, frame) of the wanted rows per chunk; stops after the last wanted row."""
+    positions = np.sort(positions)
+    if not len(positions):
+        return
+    start = 0
+    for header, rows in iter_chunks(path, chunk_rows):
+        end = start + len(rows)
+        lo, hi = np.searchsorted(positions, [start, end])
+        if hi > lo:
+            picked = positions[lo:hi]
+            yield picked, chunk_frame(header, [rows[i] for i in (picked - start).tolist()])
+        start = end
+        if hi == len(positions):
+            return
+
+
+def changed_fields(old_texts, new_texts, columns):
+    differs = old_texts != new_texts
+    return [','.join(c for c, d in zip(columns, row) if d) for row in differs]
+
+
+def iter_delta(old_path, new_path, match, pairs, chunk_rows=CHUNK_ROWS):
+    """Delta chunks: removed rows in old order, then added and changed rows in new order.
+
+    Only the old side of changed rows (normalized compared columns) is held
+    between the passes, so memory follows the size of the delta.
+    """
+    header = match['header']
+    columns = match['columns']
+    out_columns = [OP_COLUMN, FIELDS_COLUMN] + header
+    old_changed = set(pairs['changed_old'].tolist())
+    removed = set(pairs['removed'].tolist())
+    old_texts = {}
+    wanted = np.concatenate([pairs['removed'], pairs['changed_old']])
+    for picked, frame in iter_selected(old_path, wanted, chunk_rows):
+        texts = np.column_stack([column_text(frame[c]) for c in columns]) if columns else np.empty((len(frame), 0))
+        gone = np.array([p in removed for p in picked.tolist()], dtype=bool)
+        for p, row in zip(picked[~gone].tolist(), texts[~gone]):
+            if p in old_changed:
+                old_texts[p] = row
+        if gone.any():
+            out = frame[gone].reindex(columns=header)
+            out.insert(0, FIELDS_COLUMN, '')
+            out.insert(0, OP_COLUMN, REMOVED)
+            yield out.reset_index(drop=True)
+
+    old_of = dict(zip(pairs['changed_new'].tolist(), pairs['changed_old'].tolist()))
+    wanted = np.concatenate([pairs['added'], pairs['changed_new']])
+    for picked, frame in iter_selected(new_path, wanted, chunk_rows):
+        is_changed = np.array([p in old_of for p in picked.tolist()], dtype=bool)
+        fields = np.full(len(frame), '', dtype=object)
+        if is_changed.any():
+            new_texts = np.column_stack([column_text(frame[c]) for c in columns])[is_changed]
+            before = np.array([old_texts.pop(old_of[p]) for p in picked[is_changed].tolist()], dtype=object)
+            fields[is_changed] = changed_fields(before.reshape(new_texts.shape), new_texts, columns)
+        out = frame.reset_index(drop=True)
+        out.insert(0, FIELDS_COLUMN, fields)
+        out.insert(0, OP_COLUMN, np.where(is_changed, CHANGED, ADDED))
+        yield out[out_columns]
+    # an empty delta still gets its header
+    yield pd.DataFrame(columns=out_columns)
+
+
+def diff_workbooks(old_path, new_path, out_path, kind=None, chunk_rows=CHUNK_ROWS):
+    """Compare two versions of a catalog workbook and write the delta table; returns a summary dict."""
+    kind = kind or guess_kind(new_path)
+    match = match_layouts(build_layout(old_path, kind), build_layout(new_path, kind))
+    old = scan_hashes(old_path, match, chunk_rows)
+    new = scan_hashes(new_path, match, chunk_rows)
+    pairs = pair_rows(old, new)
+    rows = write_table(out_path, iter_delta(old_path, new_path, match, pairs, chunk_rows))
+    return {
+        'old': str(old_path), 'new': str(new_path), 'delta': str(out_path), 'kind': kind,
+        'match': f"id: {match['id']}" if match['id'] is not None else 'names: ' + ' + '.join(match['names']),
+        'rows': {'old': len(old), 'new': len(new)},
+        'unchanged': pairs['unchanged'], 'added': len(pairs['added']), 'removed': len(pairs['removed']),
+        'changed': len(pairs['changed_new']), 'delta_rows': rows,
+        'added_columns': match['added_columns'], 'removed_columns': match['removed_columns'],
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='İki katalog sürümü arasında eklenen / silinen / değişen satırlar')
+    p.add_argument('old', help='Önceki sürüm (.xlsx)')
+    p.add_argument('new', help='Yeni sürüm (.xlsx)')
+    p.add_argument('--out', default=None, help='Fark tablosu (.xlsx/.csv/.parquet). Varsayılan: <yeni ad>.fark.xlsx')
+    p.add_argument('--kind', choices=('book', 'student'), default=None,
+                   help='Çalışma kitabı türü. Varsayılan: dosya adından (ogrenci -> student)')
+    p.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help=f'Okuma parçası satır sayısı. Varsayılan: {CHUNK_ROWS}')
+    p.add_argument('--json', default=None, help='Özetin yazılacağı JSON dosyası')
+    args = p.parse_args(argv)
+    if args.out is None:
+        args.out = str(Path(args.new).with_name(f'{Path(args.new).stem}.fark.xlsx'))
+    try:
+        table_format(args.out)
+    except ValueError as e:
+        p.error(str(e))
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.perf_counter()
+    try:
+        summary = diff_workbooks(args.old, args.new, args.out, kind=args.kind, chunk_rows=args.chunk_rows)
+    except (OSError, ValueError) as ex:
+        print(ex, file=sys.stderr)
+        return 1
+    summary['seconds'] = round(time.perf_counter() - started, 2)
+    print(f"{summary['old']} ({summary['rows']['old']} satır) -> {summary['new']} ({summary['rows']['new']} satır), "
+          f"eşleştirme {summary['match']}")
+    print(f"değişmeyen {summary['unchanged']}, eklenen {summary['added']}, silinen {summary['removed']}, "
+          f"değişen {summary['changed']}")
+    if summary['added_columns'] or summary['removed_columns']:
+        print(f"eklenen sütunlar {summary['added_columns']}, silinen sütunlar {summary['removed_columns']} "
+              "(karşılaştırılmadı)")
+    print(f"Fark {summary['delta_rows']} satır -> {summary['delta']} ({summary['seconds']} sn)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""Ödünç / kitap / öğrenci bütünlük denetimi
+
+Üç çalışma kitabını (kitap listesi.xlsx, ogrenci_listesi.xlsx,
+odunc listesi.xlsx) birlikte okur ve içe aktarmadan önce şunları denetler:
+- ana tablolarda tekrar eden kimlikler,
+- ödünç satırlarında karşılığı olmayan kitap/öğrenci (orphan) anahtarları,
+- ödünç sayfasına kopyalanmış başlık/yazar/ad-soyad alanlarının ana
+  tablolardakilerle uyuşmaması (boşluk ve büyük/küçük harf farkı sayılmaz),
+- teslim tarihi verilişten önce olan ya da tarih olarak okunamayan satırlar.
+
+Sütunlar generate_data.build_column_plan ile bulunur. Kimlik sütunu olan
+düzenlerde (OduncID, OgrenciID, KitapID...) eşleştirme kimlikle, olmayanlarda
+başlık + yazar ve ad + soyad ile yapılır. Tüm denetimler küme/merge
+işlemleriyle tek geçişte, satır döngüsü olmadan çalışır. Satır numaraları
+Excel satırlarıdır (başlık = 1). Sorun bulunursa çıkış kodu 1'dir.
+
+Kullanım:
+python3 check_integrity.py
+python3 check_integrity.py --books eski/"kitap listesi.xlsx" --students eski/ogrenci_listesi.xlsx --loans eski/"odunc listesi.xlsx"
+python3 check_integrity.py --json butunluk.json --max-examples 50
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from generate_data import (BOOK_FIELD_ROLES, BOOK_KEY, BOOKS_FN, LOANS_FN, STUDENT_KEY, STUDENTS_FN,
+                           build_plans, load_df, master_lookup, merge_on_key, normalize_id_keys, plan_column,
+                           plan_columns, plan_id_column)
+from text_norm import text_key
+
+MAX_EXAMPLES = 10
+
+
+def text_differs(actual, expected):
+    """Rows with an expected value that `actual` does not match after text_key.
+
+    Exact matches (nearly every row of a healthy sheet) are settled by one
+    vectorized comparison; only the rest pay for the normalization.
+    """
+    actual = pd.Series(actual).reset_index(drop=True)
+    expected = pd.Series(expected).reset_index(drop=True)
+    mask = (expected.notna() & (actual != expected).fillna(True)).to_numpy(dtype=bool, copy=True)
+    idx = np.flatnonzero(mask)
+    if len(idx):
+        mask[idx] = (text_key(actual.iloc[idx]) != text_key(expected.iloc[idx])).fillna(True).to_numpy(dtype=bool)
+    return mask
+
+
+def key_isin(keys, master_keys):
+    # numeric and text ids meet as text, as in generate_data.merge_on_key
+    master_keys = pd.Series(master_keys).dropna()
+    if keys.dtype != master_keys.dtype:
+        keys = keys.astype(str).where(keys.notna())
+        master_keys = master_keys.astype(str)
+    return keys.isin(master_keys).to_numpy()
+
+
+def rows_isin(columns, master_columns):
+    """Rows whose (normalized) key tuple occurs among the master tuples; tuples are matched without concatenation."""
+    if len(columns) == 1:
+        return columns[0].isin(master_columns[0].dropna()).to_numpy()
+    return pd.MultiIndex.from_arrays(columns).isin(pd.MultiIndex.from_arrays(master_columns))
+
+
+def name_keys(df, plan, split):
+    """text_key'd name columns: [first, last] when `split`, else one 'first last' column."""
+    if split:
+        return [text_key(df[plan_column(plan, 'first_name')]), text_key(df[plan_column(plan, 'last_name')])]
+    names = student_names(df, plan)
+    return None if names is None else [text_key(names)]
+
+
+def student_names(df, plan):
+    """Raw 'first last' per row from a full-name column or first + last name columns."""
+    full = plan_column(plan, 'full_name')
+    if full is not None:
+        return df[full].reset_index(drop=True)
+    first, last = plan_column(plan, 'first_name'), plan_column(plan, 'last_name')
+    if first is None or last is None:
+        return None
+    first, last = df[first].reset_index(drop=True), df[last].reset_index(drop=True)
+    return (first.astype(str) + ' ' + last.astype(str)).where(first.notna() & last.notna())
+
+
+class Report:
+    """Problem counts with a few example rows per check."""
+
+    def __init__(self, max_examples=MAX_EXAMPLES):
+        self.max_examples = max_examples
+        self.checks = {}
+
+    def add(self, name, mask, frame, columns, description):
+        mask = pd.Series(mask).fillna(False).to_numpy(dtype=bool)
+        count = int(mask.sum())
+        examples = []
+        if count:
+            sample = frame.loc[mask, [c for c in columns if c in frame.columns]].head(self.max_examples)
+            for index, row in sample.iterrows():
+                values = {c: (None if pd.isna(v) else str(v)) for c, v in row.items()}
+                examples.append({'row': int(index) + 2, **values})
+        self.checks[name] = {'count': count, 'description': description, 'examples': examples}
+
+    def problems(self):
+        return sum(c['count'] for c in self.checks.values())
+
+
+def check_duplicate_ids(report, df, plan, name):
+    id_col = plan_id_column(plan)
+    if df.empty or not id_col or id_col not in df.columns:
+        return None
+    keys = normalize_id_keys(df[id_col])
+    report.add(f'{name}_duplicate_ids', keys.notna() & keys.duplicated(keep=False), df, [id_col],
+               f'{name}: aynı kimlik birden fazla satırda')
+    return keys
+
+
+def check_books(report, books, loans, plans, master_keys):
+    loan_plan = plans['loan']
+    id_col = plan_column(loan_plan, 'book_id')
+    if id_col is not None and master_keys is not None:
+        keys = normalize_id_keys(loans[id_col])
+        report.add('loan_book_orphans', keys.notna() & ~key_isin(keys, master_keys), loans, [id_col],
+                   'ödünç: kitap kimliği kitap listesinde yok')
+        lookup = master_lookup(books, plans['book'], BOOK_KEY, BOOK_FIELD_ROLES)
+        if lookup is None:
+            return
+        merged = merge_on_key(keys, lookup, BOOK_KEY)
+        for role in BOOK_FIELD_ROLES:
+            if role not in merged.columns:
+                continue
+            for col in plan_columns(loan_plan, role):
+                report.add(f'loan_book_{role}_mismatch', text_differs(loans[col], merged[role]), loans,
+                           [id_col, col], f'ödünç: {col} kitap listesindekiyle aynı değil')
+        return
+
+    # no book ids in the loan sheet: title (+ author) is the reference
+    title, author = plan_column(loan_plan, 'title'), plan_column(loan_plan, 'author')
+    book_title, book_author = plan_column(plans['book'], 'title'), plan_column(plans['book'], 'author')
+    if title is None or book_title is None:
+        return
+    use_author = author is not None and book_author is not None
+    columns, master_columns = [title], [book_title]
+    if use_author:
+        columns, master_columns = [title, author], [book_title, book_author]
+    loan_keys = [text_key(loans[c]) for c in columns]
+    found = rows_isin(loan_keys, [text_key(books[c]) for c in master_columns])
+    report.add('loan_book_orphans', loan_keys[0].notna().to_numpy() & ~found, loans, columns,
+               'ödünç: başlık' + (' + yazar' if use_author else '') + ' kitap listesinde yok')
+
+
+def check_students(report, students, loans, plans, master_keys):
+    loan_plan = plans['loan']
+    id_col = plan_column(loan_plan, 'student_id')
+    if id_col is not None and master_keys is not None:
+        keys = normalize_id_keys(loans[id_col])
+        report.add('loan_student_orphans', keys.notna() & ~key_isin(keys, master_keys), loans, [id_col],
+                   'ödünç: öğrenci kimliği öğrenci listesinde yok')
+        loan_names = student_names(loans, loan_plan)
+        master_names = student_names(students, plans['student'])
+        if loan_names is None or master_names is None:
+            return
+        lookup = pd.DataFrame({STUDENT_KEY: normalize_id_keys(students[plan_id_column(plans['student'])]),
+                               'name': master_names.to_numpy()})
+        lookup = lookup.dropna(subset=[STUDENT_KEY]).drop_duplicates(STUDENT_KEY, keep='last')
+        expected = merge_on_key(keys, lookup, STUDENT_KEY)['name']
+        columns = [id_col] + plan_columns(loan_plan, 'full_name', 'first_name', 'last_name')
+        report.add('loan_student_name_mismatch', text_differs(loan_names, expected), loans, columns,
+                   'ödünç: öğrenci adı öğrenci listesindekiyle aynı değil')
+        return
+
+    # no student ids: match by name, per part when both sheets split first and last name
+    split = all(plan_column(p, 'first_name') and plan_column(p, 'last_name') and not plan_column(p, 'full_name')
+                for p in (loan_plan, plans['student']))
+    loan_keys = name_keys(loans, loan_plan, split)
+    master_keys = None if students.empty else name_keys(students, plans['student'], split)
+    if loan_keys is None or master_keys is None:
+        return
+    present = np.logical_and.reduce([k.notna().to_numpy() for k in loan_keys])
+    found = rows_isin(loan_keys, master_keys)
+    columns = plan_columns(loan_plan, 'full_name', 'first_name', 'last_name')
+    report.add('loan_student_orphans', present & ~found, loans, columns, 'ödünç: ad + soyad öğrenci listesinde yok')
+
+
+def check_dates(report, loans, plans):
+    loan_plan = plans['loan']
+    issue, ret = plan_column(loan_plan, 'issue_date'), plan_column(loan_plan, 'return_date')
+    parsed = {}
+    for col in (issue, ret):
+        if col is None:
+            continue
+        parsed[col] = pd.to_datetime(loans[col], errors='coerce')
+        report.add(f'invalid_dates_{col}', loans[col].notna() & parsed[col].isna(), loans, [col],
+                   f'ödünç: {col} tarih olarak okunamadı')
+    if issue is not None and ret is not None:
+        report.add('return_before_issue', parsed[ret] < parsed[issue], loans, [issue, ret],
+                   'ödünç: teslim tarihi veriliş tarihinden önce')
+
+
+def check_integrity(books, students, loans, plans=None, max_examples=MAX_EXAMPLES):
+    """Run every check over already loaded sheets; returns {'rows', 'checks', 'problems'}."""
+    plans = plans or build_plans(books, students, loans)
+    report = Report(max_examples)
+    book_keys = check_duplicate_ids(report, books, plans['book'], 'books')
+    student_keys = check_duplicate_ids(report, students, plans['student'], 'students')
+    if not loans.empty:
+        check_books(report, books, loans, plans, book_keys)
+        check_students(report, students, loans, plans, student_keys)
+        check_dates(report, loans, plans)
+    return {
+        'rows': {'books': len(books), 'students': len(students), 'loans': len(loans)},
+        'checks': report.checks,
+        'problems': report.problems(),
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Ödünç / kitap / öğrenci bütünlük denetimi')
+    p.add_argument('--books', default=BOOKS_FN, help=f'Kitap çalışma kitabı. Varsayılan: {BOOKS_FN}')
+    p.add_argument('--students', default=STUDENTS_FN, help=f'Öğrenci çalışma kitabı. Varsayılan: {STUDENTS_FN}')
+    p.add_argument('--loans', default=LOANS_FN, help=f'Ödünç çalışma kitabı. Varsayılan: {LOANS_FN}')
+    p.add_argument('--max-examples', type=int, default=MAX_EXAMPLES, help=f'Denetim başına örnek satır sayısı. Varsayılan: {MAX_EXAMPLES}')
+    p.add_argument('--json', default=None, help='Raporun yazılacağı JSON dosyası')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.perf_counter()
+    books, students, loans = load_df(args.books), load_df(args.students), load_df(args.loans)
+    loaded = time.perf_counter()
+    result = check_integrity(books, students, loans, max_examples=args.max_examples)
+    result['seconds'] = {'load': round(loaded - started, 3), 'check': round(time.perf_counter() - loaded, 3)}
+
+    rows = result['rows']
+    print(f"Kitap: {rows['books']}, öğrenci: {rows['students']}, ödünç: {rows['loans']} satır")
+    for name, check in result['checks'].items():
+        mark = 'OK  ' if check['count'] == 0 else 'FAIL'
+        print(f"{mark} {check['description']}: {check['count']}")
+        for example in check['examples'][:3]:
+            print(f"       {example}")
+    print(f"Toplam sorun: {result['problems']} (okuma {result['seconds']['load']} sn, "
+          f"denetim {result['seconds']['check']} sn)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Rapor -> {args.json}")
+    return 1 if result['problems'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Toplu tarih motoru
+
+generate_dates.py ve generate_data.py'nin ortak tarih üretimi. Tarihler
+Python döngüsü yerine NumPy datetime64[D] dizileri olarak üretilir:
+- aralıktan düzgün (uniform) ya da ağırlıklı örnekleme (hafta içi / okul takvimi),
+- isteğe bağlı sıralama ve benzersizlik,
+- sayısal biçimler (%d, %m, %Y, %y, %j) için vektörel metne çevirme.
+
+Yalnızca NumPy'a bağlıdır; pandas yüklemez.
+"""
+from datetime import date, datetime
+
+import numpy as np
+
+WEIGHT_PROFILES = ('uniform', 'weekday', 'school')
+
+# Okul takvimi: (ay, gün) aralıkları, tatiller düşük ağırlık alır
+SCHOOL_BREAKS = [
+    ((1, 20), (2, 5)),   # yarıyıl tatili
+    ((6, 20), (9, 8)),   # yaz tatili
+]
+WEEKEND_WEIGHT = 0.1
+BREAK_WEIGHT = 0.05
+
+_FORMAT_WIDTHS = {'d': 2, 'm': 2, 'Y': 4, 'y': 2, 'j': 3}
+
+
+def to_day(value):
+    if isinstance(value, np.datetime64):
+        return value.astype('datetime64[D]')
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return np.datetime64(value, 'D')
+    return np.datetime64(value, 'D')
+
+
+def today():
+    return np.datetime64(date.today(), 'D')
+
+
+def date_parts(days):
+    """Year, month, day integer arrays of a datetime64[D] array."""
+    months = days.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]').astype(np.int64) + 1970
+    month = months.astype(np.int64) % 12 + 1
+    day = (days - months.astype('datetime64[D]')).astype(np.int64) + 1
+    return years, month, day
+
+
+def weekday(days):
+    # Monday = 0 ... Sunday = 6 (1970-01-01 was a Thursday)
+    return (days.astype(np.int64) + 3) % 7
+
+
+def day_weights(days, profile='uniform'):
+    if profile == 'uniform':
+        return np.ones(len(days))
+    if profile not in WEIGHT_PROFILES:
+        raise ValueError(f"Unknown weight profile: {profile}")
+    weights = np.where(weekday(days) >= 5, WEEKEND_WEIGHT, 1.0)
+    if profile == 'school':
+        _, month, day = date_parts(days)
+        month_day = month * 100 + day
+        for (m1, d1), (m2, d2) in SCHOOL_BREAKS:
+            in_break = (month_day >= m1 * 100 + d1) & (month_day <= m2 * 100 + d2)
+            weights = np.where(in_break, BREAK_WEIGHT, weights)
+    return weights
+
+
+def random_dates(start, end, n: int, rng=None, sort=False, unique=False, profile='uniform'):
+    """n dates in [start, end] as datetime64[D]."""
+    start, end = to_day(start), to_day(end)
+    if end < start:
+        raise ValueError('End date must be after start date')
+    rng = rng if rng is not None else np.random.default_rng()
+    span = int((end - start).astype(np.int64)) + 1
+    if unique and n > span:
+        raise ValueError(f'Cannot draw {n} unique dates from a {span}-day range')
+    if profile == 'uniform':
+        if unique:
+            offsets = rng.choice(span, size=n, replace=False)
+        else:
+            offsets = rng.integers(0, span, size=n)
+    else:
+        weights = day_weights(start + np.arange(span), profile)
+        if unique:
+            offsets = rng.choice(span, size=n, replace=False, p=weights / weights.sum())
+        else:
+            # Cumulative weights + binary search: O(log span) per date
+            cumulative = np.cumsum(weights)
+            offsets = np.searchsorted(cumulative, rng.random(n) * cumulative[-1], side='right')
+    if sort:
+        if span <= n:
+            # Counting sort: day histogram expanded back to offsets, O(n + span)
+            offsets = np.repeat(np.arange(span), np.bincount(offsets, minlength=span))
+        else:
+            offsets = np.sort(offsets)
+    return start + offsets.astype('timedelta64[D]')
+
+
+def days_before(reference, max_days: int, n: int, rng):
+    """n dates between reference - max_days and reference (inclusive)."""
+    return to_day(reference) - rng.integers(0, max_days + 1, size=n).astype('timedelta64[D]')
+
+
+def _parse_format(fmt):
+    # -> list of ('lit', text) / ('tok', letter); None when a token is not numeric
+    parts, i = [], 0
+    while i < len(fmt):
+        if fmt[i] == '%' and i + 1 < len(fmt):
+            letter = fmt[i + 1]
+            if letter == '%':
+                parts.append(('lit', '%'))
+            elif letter in _FORMAT_WIDTHS:
+                parts.append(('tok', letter))
+            else:
+                return None
+            i += 2
+        else:
+            parts.append(('lit', fmt[i]))
+            i += 1
+    return parts
+
+
+def format_dates(days, fmt='%d/%m/%Y'):
+    """Vectorized strftime for datetime64[D] arrays; NaT becomes ''."""
+    days = np.asarray(days).astype('datetime64[D]')
+    parts = _parse_format(fmt)
+    if parts is None:
+        return np.array([d.astype(datetime).strftime(fmt) if not np.isnat(d) else '' for d in days], dtype=object)
+    nat = np.isnat(days)
+    if len(days) > 0 and not nat.all():
+        # Format each distinct day of a narrow range once, then index into the table
+        first, last = days[~nat].min(), days[~nat].max()
+        span = int((last - first).astype(np.int64)) + 1
+        if span * 4 < len(days):
+            table = _format_numeric(first + np.arange(span), parts)
+            text = table[(np.where(nat, first, days) - first).astype(np.int64)]
+            if nat.any():
+                text[nat] = b''
+            return text
+    return _format_numeric(days, parts)
+
+
+def _format_numeric(days, parts):
+    nat = np.isnat(days)
+    filled = np.where(nat, np.datetime64('1970-01-01', 'D'), days)
+    years, month, day = date_parts(filled)
+    values = {
+        'd': day,
+        'm': month,
+        'Y': years,
+        'y': years % 100,
+        'j': (filled - filled.astype('datetime64[Y]').astype('datetime64[D]')).astype(np.int64) + 1,
+    }
+    encoded = [p[1].encode('utf-8') for p in parts if p[0] == 'lit']
+    width = sum(_FORMAT_WIDTHS[p[1]] for p in parts if p[0] == 'tok') + sum(len(e) for e in encoded)
+    out = np.empty((len(days), width), dtype=np.uint8)
+    pos = 0
+    for kind, item in parts:
+        if kind == 'lit':
+            raw = np.frombuffer(item.encode('utf-8'), dtype=np.uint8)
+            out[:, pos:pos + len(raw)] = raw
+            pos += len(raw)
+            continue
+        digits = _FORMAT_WIDTHS[item]
+        value = values[item]
+        for k in range(digits - 1, -1, -1):
+            out[:, pos + k] = value % 10 + ord('0')
+            value = value // 10
+        pos += digits
+    text = out.view(f'S{width}').ravel()
+    if nat.any():
+        text = text.copy()
+        text[nat] = b''
+    return text
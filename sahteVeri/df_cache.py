@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""Ayrıştırılmış çalışma kitabı önbelleği
+
+`generate_data.load_df` bir xlsx dosyasını her çağrıda `pd.read_excel` ile
+baştan ayrıştırır. Bu modül ayrıştırılmış DataFrame'i Arrow IPC (Feather v2,
+sıkıştırmasız) dosyası olarak saklar ve sonraki yüklemelerde dosyayı
+belleğe eşleyerek (memory map) okur.
+
+Anahtar: dosyanın tam yolu + boyutu + mtime + SHA-256 içerik özeti. Boyut ve
+mtime tutuyorsa kayıt doğrudan kullanılır; yalnızca mtime değiştiyse içerik
+özeti yeniden hesaplanır ve içerik aynıysa kayıt korunur. Aksi halde kayıt
+silinir ve dosya yeniden ayrıştırılır. Önbellek klasörü toplam boyut
+sınırını aşınca en uzun süredir kullanılmayan kayıtlar silinir.
+
+Excel sütunları sık sık karışık tiplidir (ör. Sınıf: 9, 10, "Hazırlık").
+Arrow tek tipli sütun istediği için bu sütunlar metin + tip kodu çifti
+olarak saklanır ve okunurken aynı Python değerlerine geri çevrilir.
+
+pyarrow isteğe bağlıdır: kurulu değilse önbellek devre dışıdır ve dosyalar
+her seferinde doğrudan okunur. Yine de Arrow'a çevrilemeyen tablolar
+önbelleğe alınmaz.
+
+Kullanım:
+python3 df_cache.py list
+python3 df_cache.py clear
+python3 df_cache.py clear "kitap listesi.xlsx"
+python3 df_cache.py prune --max-mb 512
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from manifest import file_sha256
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'sahteveri'
+DEFAULT_MAX_MB = 2048
+INDEX_FN = 'index.json'
+VERSION = 1
+MIXED_KEY = b'sahteveri.mixed'
+MIXED_SUFFIX = '\x00type'
+# type codes for cells of mixed object columns; 0 = empty cell
+MIXED_CODES = {bool: 1, int: 2, float: 3, str: 4, datetime: 5, pd.Timestamp: 5}
+MIXED_DECODERS = {
+    1: lambda text: (text == 'True').astype(object),
+    2: lambda text: text.astype(np.int64).astype(object),
+    3: lambda text: text.astype(np.float64).astype(object),
+    4: lambda text: text,
+    5: lambda text: pd.to_datetime(pd.Series(text)).astype(object).to_numpy(),
+}
+
+CACHE_DIR = DEFAULT_CACHE_DIR
+MAX_BYTES = DEFAULT_MAX_MB * 2**20
+ENABLED = True
+
+
+def configure(cache_dir=DEFAULT_CACHE_DIR, max_mb=DEFAULT_MAX_MB, enabled=True):
+    global CACHE_DIR, MAX_BYTES, ENABLED
+    CACHE_DIR = Path(cache_dir)
+    MAX_BYTES = int(max_mb * 2**20)
+    ENABLED = enabled
+
+
+def arrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def load_index(cache_dir=None):
+    path = Path(cache_dir or CACHE_DIR) / INDEX_FN
+    try:
+        with open(path, encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {'version': VERSION, 'entries': {}}
+    if not isinstance(index, dict) or index.get('version') != VERSION:
+        return {'version': VERSION, 'entries': {}}
+    return index
+
+
+def save_index(index, cache_dir=None):
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cache_dir / f'{INDEX_FN}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, cache_dir / INDEX_FN)
+
+
+def drop_entry(index, source, cache_dir=None):
+    # data files are content-addressed; delete one only when no other source still uses it
+    entry = index['entries'].pop(source, None)
+    if entry is None:
+        return
+    if not any(e['file'] == entry['file'] for e in index['entries'].values()):
+        Path(cache_dir or CACHE_DIR, entry['file']).unlink(missing_ok=True)
+
+
+def evict(index, max_bytes, cache_dir=None):
+    """Drop least recently used entries until the data files fit in max_bytes; returns dropped sources."""
+    dropped = []
+    total = sum({e['file']: e['bytes'] for e in index['entries'].values()}.values())
+    for source, entry in sorted(index['entries'].items(), key=lambda kv: kv[1]['last_used']):
+        if total <= max_bytes:
+            break
+        shared = sum(1 for e in index['entries'].values() if e['file'] == entry['file'])
+        drop_entry(index, source, cache_dir)
+        if shared == 1:
+            total -= entry['bytes']
+        dropped.append(source)
+    return dropped
+
+
+def encode_mixed(values):
+    """(text, codes) for an object column mixing Python types; ValueError for unsupported ones."""
+    s = pd.Series(values, dtype=object)
+    codes = s.map(type).map(MIXED_CODES)
+    empty = s.isna().to_numpy() & ~s.map(lambda v: isinstance(v, float)).to_numpy()
+    codes = codes.where(~empty, 0)
+    if codes.isna().any():
+        raise ValueError(f'Unsupported cell type: {type(s[codes.isna()].iloc[0]).__name__}')
+    text = s.map(lambda v: v.isoformat() if isinstance(v, datetime) else str(v)).where(~empty, None)
+    return text.astype(object).to_numpy(), codes.to_numpy(dtype=np.int8)
+
+
+def decode_mixed(text, codes):
+    out = np.full(len(codes), None, dtype=object)
+    for code, decode in MIXED_DECODERS.items():
+        mask = codes == code
+        if mask.any():
+            out[mask] = decode(text[mask])
+    return out
+
+
+def read_frame(path):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    # memory-mapped, uncompressed IPC: numeric columns are not copied before to_pandas
+    with pa.memory_map(str(path)) as source:
+        table = feather.read_table(source, memory_map=True)
+    mixed = json.loads((table.schema.metadata or {}).get(MIXED_KEY, b'[]'))
+    df = table.to_pandas()
+    for col in mixed:
+        df[col] = decode_mixed(df[col].to_numpy(dtype=object), df.pop(col + MIXED_SUFFIX).to_numpy())
+    return df
+
+
+def write_frame(df, path):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    columns, mixed = {}, []
+    for col in df.columns:
+        values = df[col]
+        if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True).startswith('mixed'):
+            text, codes = encode_mixed(values.to_numpy())
+            values = pd.Series(text, index=df.index, dtype=object)
+            columns[col + MIXED_SUFFIX] = codes
+            mixed.append(col)
+        columns[col] = values
+    encoded = pd.DataFrame({c: columns[c] for c in df.columns}, index=df.index)
+    for col in mixed:
+        encoded[col + MIXED_SUFFIX] = columns[col + MIXED_SUFFIX]
+    table = pa.Table.from_pandas(encoded)
+    table = table.replace_schema_metadata({**table.schema.metadata, MIXED_KEY: json.dumps(mixed).encode()})
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    try:
+        feather.write_feather(table, str(tmp), compression='uncompressed')
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def lookup(index, source, st):
+    """Cached data file for `source`, or None. May refresh the entry's mtime after a content check."""
+    entry = index['entries'].get(source)
+    if entry is None or entry['size'] != st.st_size:
+        return None
+    data = CACHE_DIR / entry['file']
+    if not data.exists():
+        return None
+    if entry['mtime_ns'] != st.st_mtime_ns:
+        # touched (copied, checked out again): same bytes still count as a hit
+        if file_sha256(source) != entry['sha256']:
+            return None
+        entry['mtime_ns'] = st.st_mtime_ns
+    return data
+
+
+def load(path, reader):
+    """DataFrame for the workbook at `path`, through the cache; `reader(path)` parses it on a miss."""
+    if not ENABLED or not arrow_available():
+        return reader(path)
+    source = str(Path(path).resolve())
+    st = os.stat(source)
+    index = load_index()
+    data = lookup(index, source, st)
+    if data is not None:
+        try:
+            df = read_frame(data)
+        except Exception:
+            data = None  # unreadable data file: parse again below
+        else:
+            index['entries'][source]['last_used'] = time.time()
+            save_index(index)
+            return df
+
+    df = reader(path)
+    if df.empty:
+        return df
+    sha = file_sha256(source)
+    name = f'{sha}.arrow'
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        write_frame(df, CACHE_DIR / name)
+    except Exception:
+        # non-text headers, unsupported cell types and the like: keep them uncached
+        return df
+    if index['entries'].get(source, {}).get('file') != name:
+        drop_entry(index, source)
+    index['entries'][source] = {
+        'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': sha, 'file': name,
+        'bytes': (CACHE_DIR / name).stat().st_size, 'rows': len(df), 'columns': len(df.columns),
+        'last_used': time.time(),
+    }
+    evict(index, MAX_BYTES)
+    save_index(index)
+    return df
+
+
+def invalidate(paths=None, cache_dir=None):
+    """Remove the entries for `paths` (all entries when None); returns the removed sources."""
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    index = load_index(cache_dir)
+    if paths is None:
+        sources = list(index['entries'])
+    else:
+        sources = [str(Path(p).resolve()) for p in paths]
+    removed = []
+    for source in sources:
+        if source in index['entries']:
+            drop_entry(index, source, cache_dir)
+            removed.append(source)
+    if paths is None:
+        # stray data files from interrupted runs
+        for stray in cache_dir.glob('*.arrow*'):
+            stray.unlink(missing_ok=True)
+    save_index(index, cache_dir)
+    return removed
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Ayrıştırılmış çalışma kitabı önbelleği')
+    p.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR), help=f'Önbellek klasörü. Varsayılan: {DEFAULT_CACHE_DIR}')
+    sub = p.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='Kayıtları listele')
+    clear = sub.add_parser('clear', help='Kayıtları sil')
+    clear.add_argument('paths', nargs='*', help='Yalnızca bu xlsx dosyalarının kayıtları (verilmezse hepsi)')
+    prune = sub.add_parser('prune', help='Toplam boyutu sınırın altına indir (en eski kullanılan önce silinir)')
+    prune.add_argument('--max-mb', type=float, default=DEFAULT_MAX_MB, help=f'Boyut sınırı (MB). Varsayılan: {DEFAULT_MAX_MB}')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache_dir = Path(args.cache_dir)
+    if args.command == 'list':
+        index = load_index(cache_dir)
+        total = 0
+        for source, e in sorted(index['entries'].items(), key=lambda kv: -kv[1]['last_used']):
+            used = time.strftime('%Y-%m-%d %H:%M', time.localtime(e['last_used']))
+            print(f"{e['bytes'] / 2**20:9.1f} MB  {e['rows']:>9} rows  {used}  {source}")
+            total += e['bytes']
+        print(f"{len(index['entries'])} entries, {total / 2**20:.1f} MB in {cache_dir}")
+        if not arrow_available():
+            print('pyarrow is not installed: load_df reads workbooks directly', file=sys.stderr)
+    elif args.command == 'clear':
+        removed = invalidate(args.paths or None, cache_dir)
+        print(f"Removed {len(removed)} entries")
+    else:
+        index = load_index(cache_dir)
+        dropped = evict(index, args.max_mb * 2**20, cache_dir)
+        save_index(index, cache_dir)
+        print(f"Evicted {len(dropped)} entries")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,39 +8,339 @@ Bu betik mevcut Excel dosyalarını okuyup tamamlar:
 
 Kullanım:
 python3 generate_data.py
+python3 generate_data.py --books 500000 --students 200000 --loans 1000000
+python3 generate_data.py --books 500000 --workers 8 --seed 42
+python3 generate_data.py --profile --profile-dump run.pstats 2> profil.json
+python3 generate_data.py --incremental --books 1010000
+python3 generate_data.py --books 1000000 --loans 1000000 --sqlite kutuphane.db --no-xlsx
+python3 generate_data.py --loans 50000000 --stream --loans-out "odunc listesi.parquet"
+python3 generate_data.py --loans 1000000 --workload realistic --zipf-s 1.1
 """
+import argparse
+import cProfile
+import json
 import os
-import random
-from datetime import datetime, timedelta
+import sys
+import time
+import tracemalloc
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
-from faker import Faker
+import date_engine
+import df_cache
+import loan_sim
+import manifest
+import unique_keys
+import value_pools
+import workload
+from table_stream import table_format, write_table
+from text_norm import text_key
+from xlsx_stream import append_xlsx
 
-fake = Faker('tr_TR')
+rng = np.random.default_rng()
+
+# Stage metrics collected by `stage()` when --profile is on; None otherwise
+PROFILE = None
 
 TARGET_BOOKS = 200
 TARGET_STUDENTS = 100
 TARGET_LOANS = 100
 
+# Batch generation budget for catalog rows (books/students) on a single core.
+# Columns without Faker text run at millions of rows/sec; with live Faker
+# calls (--pool-size 0) the target is set by titles, names, phones and emails.
+# The default value pools (value_pools.py) keep those columns near NumPy speed.
+GENERATION_TARGET_ROWS_PER_SEC = 20_000
+
 BOOKS_FN = "kitap listesi.xlsx"
 STUDENTS_FN = "ogrenci_listesi.xlsx"
 LOANS_FN = "odunc listesi.xlsx"
 
 
-def load_df(path: str):
+# Sharding: tables are generated in fixed-size shards, each with its own
+# generator state derived from (seed, table, shard index). Output therefore
+# depends only on the seed, never on the number of worker processes.
+SHARD_SIZE = 50_000
+SEED_STREAMS = {'book': 1, 'student': 2, 'loan': 3, 'fill': 4, 'workload': 5}
+
+
+def new_seed():
+    return int(np.random.SeedSequence().entropy % (2 ** 63))
+
+
+def shard_seed(seed: int, stream: str, index: int, offset: int = 0):
+    # offset: rows already present when topping up, so appended shards get fresh streams
+    entropy = [seed, SEED_STREAMS[stream], index] + ([offset] if offset else [])
+    return np.random.SeedSequence(entropy)
+
+
+def reseed(seed_seq):
+    # generate_role_values and friends draw from the module-level rng and value pools
+    global rng
+    rng = np.random.default_rng(seed_seq)
+    value_pools.seed_live(int(seed_seq.generate_state(1, dtype=np.uint64)[0]))
+
+
+def shard_ranges(total: int, shard_size: int = SHARD_SIZE):
+    return [(start, min(shard_size, total - start)) for start in range(0, total, shard_size)]
+
+
+def iter_shards(func, tasks, workers=1):
+    """Shard results in task order; with workers, at most two shards per worker are in flight."""
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=value_pools.configure,
+                                 initargs=value_pools.settings()) as pool:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.submit(func, task))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        return
+    for task in tasks:
+        yield func(task)
+
+
+def run_shards(func, tasks, workers=1):
+    return list(iter_shards(func, tasks, workers))
+
+
+def read_workbook(path: str):
+    try:
+        sheets = pd.read_excel(path, sheet_name=None)
+    except Exception:
+        return pd.DataFrame()
+    frames = list(sheets.values())
+    if not frames:
+        return pd.DataFrame()
+    # save_df spills rows past Excel's limit into extra sheets with the same header
+    frames = [f for f in frames if list(f.columns) == list(frames[0].columns)]
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def load_df(path: str, cache=True):
+    # cache: reuse the parsed frame from df_cache (pyarrow) while the file is unchanged
     if Path(path).exists():
-        try:
-            return pd.read_excel(path)
-        except Exception:
-            return pd.DataFrame()
+        return df_cache.load(path, read_workbook) if cache else read_workbook(path)
     return pd.DataFrame()
 
 
-def save_df(df: pd.DataFrame, path: str):
-    df.to_excel(path, index=False, engine='openpyxl')
-    print(f"Saved {len(df)} rows -> {path}")
+def rss_bytes():
+    """(current, peak) resident set size in bytes; None where the platform does not say.
+
+    On Linux the peak is VmHWM, which reset_peak_rss can restart; elsewhere it
+    is the process-lifetime ru_maxrss and current is unknown.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+        return int(fields['VmRSS'].split()[0]) * 1024, int(fields['VmHWM'].split()[0]) * 1024
+    except (OSError, KeyError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return None, peak if sys.platform == 'darwin' else peak * 1024
+
+
+def reset_peak_rss():
+    # Linux: writing 5 to clear_refs restarts VmHWM at the current RSS
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def start_profile(trace_memory=True):
+    global PROFILE
+    PROFILE = {'stages': [], 'stack': [], 'trace_memory': trace_memory}
+    if trace_memory:
+        tracemalloc.start()
+
+
+@contextmanager
+def stage(name, accumulate=False):
+    """Record wall time, peak RSS and tracemalloc peak of a block while profiling; no-op otherwise.
+
+    RSS covers everything the process holds, including pyarrow and NumPy
+    buffers that tracemalloc only partly sees. Nested stages are reported on
+    their own and also count towards the parent's peaks. With `accumulate`,
+    repeated blocks of the same name (one per loan chunk) are folded into a
+    single entry: times and net growth add up, peaks take the maximum and
+    `calls` counts the blocks.
+    """
+    if PROFILE is None:
+        yield
+        return
+    tracing = PROFILE['trace_memory']
+    parent = PROFILE['stack'][-1] if PROFILE['stack'] else None
+    rss, rss_peak = rss_bytes()
+    if parent is not None and rss_peak is not None:
+        parent['rss_peak'] = max(parent['rss_peak'], rss_peak)
+    reset_peak_rss()
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        if parent is not None:
+            parent['peak'] = max(parent['peak'], peak)
+        tracemalloc.reset_peak()
+    entry = {'stage': name, 'depth': len(PROFILE['stack']), 'peak': 0, 'rss_peak': 0, 'rss_start': rss,
+             'start_bytes': current if tracing else None}
+    PROFILE['stack'].append(entry)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        PROFILE['stack'].pop()
+        metrics = {'stage': name, 'depth': entry['depth'], 'seconds': round(seconds, 4)}
+        _, rss_peak = rss_bytes()
+        if rss_peak is not None:
+            rss_peak = max(entry['rss_peak'], rss_peak)
+            metrics['rss_peak_mb'] = round(rss_peak / 2**20, 2)
+            if entry['rss_start'] is not None:
+                metrics['rss_start_mb'] = round(entry['rss_start'] / 2**20, 2)
+            if parent is not None:
+                parent['rss_peak'] = max(parent['rss_peak'], rss_peak)
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(entry['peak'], peak)
+            metrics['peak_mb'] = round(peak / 2**20, 2)
+            metrics['start_mb'] = round(entry['start_bytes'] / 2**20, 2)
+            metrics['delta_mb'] = round((current - entry['start_bytes']) / 2**20, 2)
+            if parent is not None:
+                parent['peak'] = max(parent['peak'], peak)
+        if accumulate:
+            metrics = merge_stage(metrics)
+        PROFILE['stages'].append(metrics)
+
+
+def merge_stage(metrics):
+    # fold an earlier entry of the same accumulated stage into metrics and drop it from the list
+    stages = PROFILE['stages']
+    for i in range(len(stages) - 1, -1, -1):
+        if stages[i]['stage'] == metrics['stage'] and stages[i]['depth'] == metrics['depth'] and 'calls' in stages[i]:
+            earlier = stages.pop(i)
+            break
+    else:
+        return {**metrics, 'calls': 1}
+    merged = {**earlier, 'seconds': round(earlier['seconds'] + metrics['seconds'], 4), 'calls': earlier['calls'] + 1}
+    for key in ('rss_peak_mb', 'peak_mb'):
+        if key in metrics:
+            merged[key] = max(earlier.get(key, 0), metrics[key])
+    if 'delta_mb' in metrics:
+        merged['delta_mb'] = round(earlier['delta_mb'] + metrics['delta_mb'], 2)
+    return merged
+
+
+def emit_profile(extra):
+    # one JSON object on stderr for job runners; stages are listed in completion order.
+    # Pool-worker stages ('worker': true) carry the worker's RSS and stay out of this process's peaks
+    report = {'event': 'generate_data.profile', **extra, 'stages': PROFILE['stages']}
+    rss_peak = rss_bytes()[1]
+    if rss_peak is not None:
+        report['rss_peak_mb'] = max([round(rss_peak / 2**20, 2)]
+                                    + [s['rss_peak_mb'] for s in PROFILE['stages']
+                                       if 'rss_peak_mb' in s and not s.get('worker')])
+    if PROFILE['trace_memory']:
+        report['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        report['peak_mb'] = max([report['peak_mb']] + [s['peak_mb'] for s in PROFILE['stages'] if 'peak_mb' in s])
+    print(json.dumps(report, ensure_ascii=False), file=sys.stderr)
+
+
+def loan_memory_report(loans_df):
+    """Bytes per loan row: the finished frame (deep) and the generate_loans peak RSS over its start.
+
+    RSS is used rather than tracemalloc, which misses most of the Arrow
+    buffers behind pandas string columns. Needs a platform that reports the
+    current RSS (Linux /proc).
+    """
+    rows = len(loans_df)
+    report = {'rows': rows, 'peak_budget_bytes_per_row': LOAN_ROW_PEAK_BUDGET}
+    if not rows:
+        return report
+    report['bytes_per_row'] = round(loans_df.memory_usage(deep=True).sum() / rows, 1)
+    measured = [s for s in PROFILE['stages'] if s['stage'] == 'generate_loans' and 'rss_start_mb' in s]
+    if measured:
+        growth = (measured[-1]['rss_peak_mb'] - measured[-1]['rss_start_mb']) * 2**20
+        report['peak_bytes_per_row'] = round(growth / rows, 1)
+        if report['peak_bytes_per_row'] > LOAN_ROW_PEAK_BUDGET:
+            print(f"Warning: generate_loans peaked at {report['peak_bytes_per_row']} bytes/row "
+                  f"(budget {LOAN_ROW_PEAK_BUDGET})", file=sys.stderr)
+    return report
+
+
+def save_df(df, path: str, columns=None):
+    # df: DataFrame, iterable of DataFrame chunks or of row tuples (with columns); format from the suffix
+    n = write_table(path, df, columns=columns)
+    print(f"Saved {n} rows -> {path}")
+
+
+def timed_write(path, df):
+    """write_table in a pool worker: (rows, seconds, rss_start, rss_peak) of this one table."""
+    rss, _ = rss_bytes()
+    reset_peak_rss()
+    started = time.perf_counter()
+    n = write_table(path, df)
+    return n, time.perf_counter() - started, rss, rss_bytes()[1]
+
+
+def record_worker_stage(name, seconds, rss_start, rss_peak):
+    # a stage that ran in a pool worker: its wall time and the worker's RSS, no tracemalloc figures
+    if PROFILE is None:
+        return
+    metrics = {'stage': name, 'depth': len(PROFILE['stack']), 'seconds': round(seconds, 4), 'worker': True}
+    if rss_peak is not None:
+        metrics['rss_peak_mb'] = round(rss_peak / 2**20, 2)
+        if rss_start is not None:
+            metrics['rss_start_mb'] = round(rss_start / 2**20, 2)
+    PROFILE['stages'].append(metrics)
+
+
+def default_save_workers():
+    # one process per output table: books, students, loans
+    return min(3, os.cpu_count() or 1)
+
+
+@contextmanager
+def output_writer(workers=1):
+    """Yield save(df, path, stage_name) that writes the table in a process pool when workers > 1.
+
+    Writes start as soon as they are submitted and overlap with whatever the
+    caller does next; all of them are waited for on exit, where errors are
+    raised. With one worker every save runs inline. Either way each file is
+    replaced atomically by write_table and profiled as its own stage; pooled
+    saves are timed in the worker and recorded when they are collected.
+    """
+    if workers <= 1:
+        def save_inline(df, path, name):
+            with stage(name):
+                save_df(df, path)
+        yield save_inline
+        return
+    pending = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def submit(df, path, name):
+            pending.append((path, name, pool.submit(timed_write, path, df)))
+        try:
+            yield submit
+            with stage('save_wait'):
+                results = [(path, name, future.result()) for path, name, future in pending]
+            for path, name, (n, seconds, rss_start, rss_peak) in results:
+                record_worker_stage(name, seconds, rss_start, rss_peak)
+                print(f"Saved {n} rows -> {path}")
+        except BaseException:
+            for _, _, future in pending:
+                future.cancel()
+            raise
 
 
 def detect_id_col(df: pd.DataFrame, candidates):
@@ -60,271 +360,672 @@ def detect_id_col(df: pd.DataFrame, candidates):
     return cols[0] if cols else None
 
 
-def gen_isbn():
-    return ''.join(str(random.randint(0, 9)) for _ in range(13))
+REFERENCE_DAY = None
+
+
+def reference_day():
+    # "today" is read once per process so every date column shares one anchor
+    global REFERENCE_DAY
+    if REFERENCE_DAY is None:
+        REFERENCE_DAY = date_engine.today()
+    return REFERENCE_DAY
+
+
+def id_array(first_id: int, n: int):
+    # int32 ids while they fit (the backend's numeric columns are 32-bit as well)
+    dtype = np.int32 if first_id + n <= np.iinfo(np.int32).max else np.int64
+    return np.arange(first_id, first_id + n, dtype=dtype)
+
+
+def compact_ids(values):
+    """Integer id arrays as int32 when every value fits; other arrays are returned unchanged."""
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu' and len(values):
+        info = np.iinfo(np.int32)
+        if values.min() >= info.min and values.max() <= info.max:
+            return values.astype(np.int32, copy=False)
+    return values
+
+
+def choose_categorical(values, n: int):
+    # same draws as rng.choice(values, n), stored as one code byte per row instead of an object pointer
+    return pd.Categorical.from_codes(rng.integers(0, len(values), size=n), categories=list(values))
 
 
 BOOK_CATEGORIES = [
     'Roman', 'Bilim', 'Çocuk', 'Tarih', 'Sanat', 'Teknoloji', 'Felsefe', 'Edebiyat', 'Psikoloji'
 ]
+STUDENT_CLASSES = ['9', '10', '11', '12', 'Hazırlık']
+STUDENT_BRANCHES = ['A', 'B', 'C', 'D', 'E']
+DURUM_VALUES = ['Verildi', 'Teslim edildi', 'Gecikmeli']
+# Documented ceiling for generate_loans: peak RSS growth in bytes per loan row (see --profile)
+LOAN_ROW_PEAK_BUDGET = 220
+# loan_sim status -> durum text
+SIM_STATUS_VALUES = {
+    loan_sim.STATUS_ACTIVE: 'Verildi',
+    loan_sim.STATUS_RETURNED: 'Teslim edildi',
+    loan_sim.STATUS_LATE: 'Gecikmeli',
+}
 
 
-def generate_value_for_column(col_name: str, id_value=None, kind='book', durum_values=None):
-    lc = col_name.lower()
-    if 'id' in lc or 'kod' in lc or 'no' in lc or 'numara' in lc or 'num' in lc:
-        return id_value
-    if any(x in lc for x in ('başlık', 'baslik', 'title', 'kitap', 'konu')):
-        return fake.sentence(nb_words=random.randint(2, 6)).rstrip('.')
-    if any(x in lc for x in ('yazar', 'author', 'yazar_ad', 'yazarad')):
-        return fake.name()
-    if any(x in lc for x in ('yıl', 'yil', 'year', 'yayin')):
-        return random.randint(1950, datetime.now().year)
-    if 'isbn' in lc:
-        return gen_isbn()
-    if any(x in lc for x in ('kategori', 'tür', 'tur')):
-        return random.choice(BOOK_CATEGORIES)
-    if any(x in lc for x in ('raf', 'shelf', 'konum')):
-        return f"R{random.randint(1,10)}-S{random.randint(1,30)}"
-    if any(x in lc for x in ('ad', 'isim', 'name')) and kind == 'student':
-        return fake.first_name()
-    if any(x in lc for x in ('soy', 'soyad', 'surname')) and kind == 'student':
-        return fake.last_name()
-    if any(x in lc for x in ('sinif', 'sınıf', 'sinîf')) and kind == 'student':
-        return random.choice(['9', '10', '11', '12', 'Hazırlık'])
-    if any(x in lc for x in ('telefon', 'phone')) and kind == 'student':
-        return fake.phone_number()
-    if any(x in lc for x in ('eposta', 'email', 'e-posta')) and kind == 'student':
-        return fake.ascii_email()
-    if any(x in lc for x in ('numara', 'num', 'ogr_no')) and kind == 'student':
-        return random.randint(1, 9999)
-    if any(x in lc for x in ('verilis', 'veril', 'verilis_tarihi', 'tarih', 'date')):
-        # produce a date
-        days_ago = random.randint(0, 365)
-        return (datetime.now() - timedelta(days=days_ago)).date()
-    if any(x in lc for x in ('teslim', 'iade')):
-        if random.random() < 0.75:
-            return (datetime.now() - timedelta(days=random.randint(0, 300))).date()
-        return pd.NaT
-    if 'durum' in lc or 'status' in lc:
-        if durum_values:
-            return random.choice(durum_values)
-        return random.choice(['Verildi', 'Teslim edildi', 'Gecikmeli'])
-    # default: return a short fake value
-    return fake.word()
-
-
-def generate_rows_for_dataframe(df: pd.DataFrame, target_n: int, kind: str, existing_values_for_col=None):
-    # existing_values_for_col: dict[col_name] -> list of observed values (used for durum sampling)
-    cols = list(df.columns) if not df.empty else []
-    created = []
+# Column roles. Every workbook's headers are resolved once into a plan
+# ({column: role}); generation and backfill only look roles up from it.
+# Rules are tried in order and the first keyword hit wins.
+ROLE_RULES = {
+    'book': [
+        ('isbn', ('isbn',)),
+        ('id', ('id', 'kod')),
+        ('ref', ('no', 'numara', 'num')),
+        ('shelf', ('raf', 'shelf', 'konum')),
+        ('title', ('başlık', 'baslik', 'title', 'kitap', 'konu')),
+        ('author', ('yazar', 'author')),
+        ('publisher', ('yayınevi', 'yayinevi', 'publisher')),
+        ('year', ('yıl', 'yil', 'year', 'yayin')),
+        ('category', ('kategori', 'tür', 'tur', 'category')),
+        ('quantity', ('adet', 'miktar', 'quantity')),
+        ('pages', ('sayfa', 'page')),
+        ('summary', ('özet', 'ozet', 'summary')),
+        ('return_date', ('teslim', 'iade')),
+        ('issue_date', ('verilis', 'veril', 'tarih', 'date')),
+        ('status', ('durum', 'status')),
+    ],
+    'student': [
+        ('id', ('id', 'kod')),
+        ('phone', ('telefon', 'phone')),
+        ('email', ('eposta', 'email', 'e-posta')),
+        ('student_number', ('numara', 'num', 'ogr_no', 'no')),
+        ('class', ('sinif', 'sınıf', 'sinîf', 'class')),
+        ('branch', ('şube', 'sube', 'branch')),
+        ('last_name', ('soy', 'surname')),
+        ('first_name', ('ad', 'isim', 'name')),
+        ('return_date', ('teslim', 'iade')),
+        ('issue_date', ('verilis', 'veril', 'tarih', 'date')),
+        ('status', ('durum', 'status')),
+    ],
+    'loan': [
+        ('loan_id', ('odunc', 'ödünç', 'loan')),
+        ('student_id', ('ogrenci', 'öğrenci', 'student')),
+        ('title', ('başlık', 'baslik', 'title')),
+        ('book_id', ('kitap', 'book')),
+        ('return_date', ('teslim', 'iade')),
+        ('issue_date', ('verilis', 'veril', 'tarih', 'date')),
+        ('status', ('durum', 'status')),
+        ('author', ('yazar', 'author')),
+        ('full_name', ('ad soyad', 'adsoyad', 'ad_soyad', 'adsoy', 'ad + soyad', 'isim soyisim')),
+        ('staff', ('personel', 'gorevli', 'görevli', 'person', 'calisan', 'yetkili')),
+        ('last_name', ('soy', 'surname')),
+        ('first_name', ('ad', 'isim', 'name')),
+    ],
+}
+
+ID_CANDIDATES = {
+    'book': ['id', 'KitapID', 'kod', 'no'],
+    'student': ['id', 'OgrenciID', 'kod', 'no'],
+}
+
+DEFAULT_COLUMNS = {
+    'book': ['KitapID', 'Başlık', 'Yazar', 'YayınYılı', 'ISBN'],
+    'student': ['OgrenciID', 'Ad', 'Soyad', 'Sinif', 'Telefon', 'Eposta'],
+    'loan': ['OduncID', 'OgrenciID', 'KitapID', 'VerilisTarihi', 'TeslimTarihi', 'Durum'],
+}
+
+# Header keywords used by the backend's ExcelReaderService.FindColumnIndex,
+# paired with the plan roles that are expected to land on the same column.
+BACKEND_HEADER_KEYWORDS = {
+    'book': [
+        ('title', ('title', 'baslik', 'başlık'), ('title',)),
+        ('author', ('author', 'yazar'), ('author',)),
+        ('category', ('category', 'kategori'), ('category',)),
+        ('quantity', ('quantity', 'miktar'), ('quantity',)),
+        ('shelf', ('shelf', 'raf'), ('shelf',)),
+        ('publisher', ('publisher', 'yayinevi', 'yayınevi'), ('publisher',)),
+        ('summary', ('summary', 'ozet', 'özet'), ('summary',)),
+        ('numara', ('numara', 'booknumber'), ('id', 'ref')),
+        ('year', ('year', 'yil', 'yıl'), ('year',)),
+        ('pages', ('pagecount', 'pages', 'sayfa_sayisi', 'sayfa sayısı'), ('pages',)),
+    ],
+    'student': [
+        ('name', ('name', 'ad'), ('first_name',)),
+        ('surname', ('surname', 'soyad'), ('last_name',)),
+        ('class', ('sinif', 'class'), ('class',)),
+        ('branch', ('sube', 'branch'), ('branch',)),
+        ('numara', ('numara', 'studentnumber'), ('id', 'student_number')),
+    ],
+}
+
+
+def resolve_column_role(col, kind: str, id_col=None):
+    if id_col is not None and col == id_col:
+        return 'id'
+    lc = str(col).lower()
+    for role, keywords in ROLE_RULES[kind]:
+        if any(x in lc for x in keywords):
+            return role
+    return 'text'
+
+
+def build_column_plan(df: pd.DataFrame, kind: str, columns=None):
+    """Resolve every column of a workbook to a role once: {'kind', 'id_col', 'roles': {column: role}}."""
+    if columns is None:
+        columns = list(df.columns) if df is not None and not df.empty else DEFAULT_COLUMNS[kind]
+    id_col = detect_id_col(df, ID_CANDIDATES[kind]) if kind in ID_CANDIDATES else None
+    return {
+        'kind': kind,
+        'id_col': id_col,
+        'roles': {c: resolve_column_role(c, kind, id_col) for c in columns},
+    }
+
+
+def plan_columns(plan, *roles):
+    return [c for c, role in plan['roles'].items() if role in roles]
+
+
+def plan_column(plan, *roles):
+    cols = plan_columns(plan, *roles)
+    return cols[0] if cols else None
+
+
+def plan_id_column(plan):
+    return plan['id_col'] or plan_column(plan, 'id')
+
+
+def backend_find_column(columns, keywords):
+    # Python port of ExcelReaderService.FindColumnIndex: first header containing any keyword
+    for c in columns:
+        value = str(c).strip().lower()
+        if any(k in value for k in keywords):
+            return c
+    return None
+
+
+def compare_plan_with_backend(plan):
+    report = []
+    for field, keywords, roles in BACKEND_HEADER_KEYWORDS.get(plan['kind'], []):
+        backend_col = backend_find_column(plan['roles'], keywords)
+        plan_cols = plan_columns(plan, *roles)
+        report.append({
+            'field': field,
+            'backend': backend_col,
+            'plan': plan_cols,
+            'match': backend_col in plan_cols if backend_col is not None else not plan_cols,
+        })
+    return report
+
+
+def key_positions(ids, n):
+    # unique keys (unique_keys.py) are derived from the row id, so every run and append gets its own keys
+    return np.asarray(ids, dtype=np.int64) - 1 if ids is not None else np.arange(n, dtype=np.int64)
+
+
+def unique_emails(positions):
+    return unique_keys.emails(positions, value_pools.sample('email', len(positions), rng))
+
+
+# Roles whose generated values must be unique, with the key space they are drawn from
+UNIQUE_KEY_ROLES = {
+    'isbn': (unique_keys.isbn13, unique_keys.ISBN_SPACE),
+    'student_number': (unique_keys.student_numbers, unique_keys.STUDENT_NUMBER_SPACE),
+    'email': (unique_emails, 2 ** 62),
+}
+
+
+def resolve_key_collisions(df, created, plan):
+    """Replace generated keys that already occur in the loaded workbook (values not written by this tool)."""
+    for c, role in plan['roles'].items():
+        if role in UNIQUE_KEY_ROLES and c in df.columns and c in created.columns and df[c].notna().any():
+            make, space = UNIQUE_KEY_ROLES[role]
+            values = created[c].to_numpy(dtype=object)
+            created[c] = unique_keys.resolve_collisions(values, df[c].dropna().unique(), make, space, name=c)
+    return created
 
-    # If no columns (file missing or empty), create sensible defaults
-    if not cols:
-        if kind == 'book':
-            cols = ['KitapID', 'Başlık', 'Yazar', 'YayınYılı', 'ISBN']
-        else:
-            cols = ['OgrenciID', 'Ad', 'Soyad', 'Sinif', 'Telefon', 'Eposta']
 
-    id_col = detect_id_col(df, ['id', 'kod', 'no', 'KitapID', 'OgrenciID']) if not df.empty else None
+def generate_role_values(role: str, n: int, ids=None, durum_values=None):
+    """Produce a whole column for one role as a NumPy array."""
+    if role == 'id':
+        return ids if ids is not None else np.arange(1, n + 1)
+    if role == 'ref':
+        return np.full(n, None, dtype=object)
+    if role == 'isbn':
+        return unique_keys.isbn13(key_positions(ids, n))
+    if role == 'student_number':
+        return unique_keys.student_numbers(key_positions(ids, n))
+    if role == 'title':
+        return value_pools.sample('title', n, rng)
+    if role in ('author', 'full_name', 'staff'):
+        return value_pools.sample('name', n, rng)
+    if role == 'year':
+        return rng.integers(1950, reference_day().astype(object).year + 1, size=n)
+    if role == 'category':
+        return choose_categorical(BOOK_CATEGORIES, n)
+    if role == 'shelf':
+        shelf = pd.Series(rng.integers(1, 11, size=n)).astype(str)
+        section = pd.Series(rng.integers(1, 31, size=n)).astype(str)
+        return ('R' + shelf + '-S' + section).to_numpy(dtype=object)
+    if role == 'quantity':
+        return rng.integers(1, 6, size=n)
+    if role == 'pages':
+        return rng.integers(48, 801, size=n)
+    if role == 'first_name':
+        return value_pools.sample('first_name', n, rng)
+    if role == 'last_name':
+        return value_pools.sample('last_name', n, rng)
+    if role == 'class':
+        return choose_categorical(STUDENT_CLASSES, n)
+    if role == 'branch':
+        return choose_categorical(STUDENT_BRANCHES, n)
+    if role == 'phone':
+        return value_pools.sample('phone', n, rng)
+    if role == 'email':
+        return unique_emails(key_positions(ids, n))
+    if role == 'issue_date':
+        return sample_dates(n)
+    if role == 'return_date':
+        dates = date_engine.days_before(reference_day(), 300, n, rng)
+        dates[rng.random(n) >= 0.75] = np.datetime64('NaT')
+        return dates
+    if role == 'status':
+        return choose_categorical(durum_values or DURUM_VALUES, n)
+    # publisher, summary, text: short fake values
+    return value_pools.sample('word', n, rng)
+
+
+def generate_catalog_shard(task):
+    # task: (kind, roles, seed, shard_index, first_id, n, durum_values, offset)
+    kind, roles, seed, index, first_id, n, durum_values, offset = task
+    reseed(shard_seed(seed, kind, index, offset))
+    ids = id_array(first_id, n)
+    return pd.DataFrame({
+        c: generate_role_values(role, n, ids=ids, durum_values=durum_values)
+        for c, role in roles.items()
+    })
+
+
+def generate_rows_for_dataframe(df: pd.DataFrame, target_n: int, kind: str, existing_values_for_col=None, plan=None,
+                                seed=None, workers=1):
+    # existing_values_for_col: dict[col_name] -> list of observed values (used for durum sampling)
+    # Batch mode: every column is produced as one array per shard and the new
+    # rows are concatenated once, see GENERATION_TARGET_ROWS_PER_SEC.
+    plan = plan or build_column_plan(df, kind)
+    id_col = plan_id_column(plan)
 
     # determine starting id if possible
-    start_id = None
-    if id_col and id_col in df.columns and not df[id_col].dropna().empty:
-        try:
-            start_id = int(df[id_col].dropna().astype(int).max()) + 1
-        except Exception:
-            start_id = None
+    max_id = max_id_value(df, id_col)
+    start_id = max_id + 1 if max_id is not None else None
 
     current_count = len(df)
     to_add = max(0, target_n - current_count)
-    for i in range(to_add):
-        id_value = (start_id + i) if start_id is not None else (current_count + i + 1)
-        row = {}
-        for c in cols:
-            val = generate_value_for_column(c, id_value if id_col and c == id_col else id_value if ('id' in c.lower() or 'kod' in c.lower()) else None, kind=kind, durum_values=(existing_values_for_col.get('durum') if existing_values_for_col else None))
-            # If original df had this column, keep type consistent; else just set
-            row[c] = val
-        created.append(row)
-
-    if created:
-        created_df = pd.DataFrame(created)
-        # Keep only original columns order
-        if not df.empty:
-            created_df = created_df[[c for c in df.columns if c in created_df.columns]]
-        return pd.concat([df, created_df], ignore_index=True)
-    return df
+    if not to_add:
+        return df
+
+    first_id = start_id if start_id is not None else current_count + 1
+    durum_values = existing_values_for_col.get('durum') if existing_values_for_col else None
+    created_df = generate_catalog_rows(plan, kind, to_add, first_id, seed=seed, workers=workers,
+                                       durum_values=durum_values)
+    if df.empty:
+        return created_df
+    created_df = resolve_key_collisions(df, created_df, plan)
+    # Keep only original columns order
+    return pd.concat([df, created_df[list(df.columns)]], ignore_index=True)
+
+
+def max_id_value(df, id_col):
+    # largest integral id in the column, or None when it is missing or not numeric
+    if not id_col or id_col not in df.columns or df[id_col].dropna().empty:
+        return None
+    try:
+        return int(df[id_col].dropna().astype(int).max())
+    except Exception:
+        return None
+
+
+def generate_catalog_rows(plan, kind: str, n: int, first_id: int, seed=None, workers=1, durum_values=None, offset=0):
+    """n new rows in the plan's column order, with ids first_id, first_id + 1, ..."""
+    seed = new_seed() if seed is None else seed
+    tasks = [
+        (kind, plan['roles'], seed, index, first_id + start, size, durum_values, offset)
+        for index, (start, size) in enumerate(shard_ranges(n))
+    ]
+    return pd.concat(run_shards(generate_catalog_shard, tasks, workers), ignore_index=True)
 
 
 def sample_dates(n):
-    today = datetime.now()
-    dates = []
-    for _ in range(n):
-        days_ago = random.randint(0, 365)
-        dates.append(today - timedelta(days=days_ago))
-    return dates
+    # issue dates within the last year, as datetime64[D]
+    return date_engine.days_before(reference_day(), 365, n, rng)
+
+
+# Roles in the loan sheet that are copied from the book/student sheets
+BOOK_FIELD_ROLES = ('title', 'author')
+STUDENT_FIELD_ROLES = ('full_name', 'first_name', 'last_name')
+BOOK_KEY = '_book_key'
+STUDENT_KEY = '_student_key'
+
+
+def normalize_id_keys(values):
+    """Join keys for ids: integral numbers (5, 5.0, '5') become Int64, anything else its stripped text."""
+    s = pd.Series(values).reset_index(drop=True)
+    if s.dtype.kind in 'iu':
+        return s.astype('Int64')
+    num = pd.to_numeric(s, errors='coerce')
+    integral = num.notna() & (num % 1 == 0)
+    if (integral == s.notna()).all():
+        return num.astype('Int64')
+    keys = s.astype(str).str.strip().astype(object)
+    keys[integral] = num[integral].astype('int64').astype(str)
+    return keys.where(s.notna())
+
+
+def merge_on_key(keys, lookup, key_name):
+    # left join that keeps the loan order; numeric and text keys meet as text
+    if keys.dtype != lookup[key_name].dtype:
+        keys = keys.astype(str).where(keys.notna())
+        lookup = lookup.assign(**{key_name: lookup[key_name].astype(str)})
+    return keys.rename(key_name).to_frame().merge(lookup, on=key_name, how='left')
+
+
+def id_values(df, plan, fallback_n):
+    id_col = plan_id_column(plan)
+    if id_col and id_col in df.columns and df[id_col].notna().any():
+        return df[id_col].dropna().unique()
+    if not df.empty and df.iloc[:, 0].notna().any():
+        # try first column values
+        return df.iloc[:, 0].dropna().unique()
+    # fallback range
+    return np.arange(1, fallback_n + 1)
+
+
+def master_lookup(df, plan, key_name, fields):
+    # One row per normalized id: key + {role: column values}; later rows win like a dict would
+    id_col = plan_id_column(plan)
+    if df is None or df.empty or not id_col or id_col not in df.columns:
+        return None
+    lookup = pd.DataFrame({key_name: normalize_id_keys(df[id_col])})
+    for role in fields:
+        col = plan_column(plan, role)
+        if col is not None:
+            lookup[role] = df[col].to_numpy()
+    if len(lookup.columns) == 1:
+        return None
+    return lookup.dropna(subset=[key_name]).drop_duplicates(key_name, keep='last')
+
+
+def loan_keys(loans_df, key_name, id_col):
+    if key_name in loans_df.columns:
+        return loans_df[key_name]
+    if id_col is not None:
+        return normalize_id_keys(loans_df[id_col])
+    return None
+
+
+def count_backfill(tally, kind, loans_df, keys, merged, loan_plan, roles, ids_only=False):
+    """Add to tally[kind] the loan rows the backfill cannot fix and the cells it silently rewrites.
+
+    Counts loan keys with no master row and existing denormalized cells whose
+    (whitespace/case-normalized) value differs from the master value that
+    replaces them. check_integrity.py lists the rows themselves.
+    """
+    roles = [r for r in roles if r in merged.columns]
+    if not roles:
+        return
+    found = merged[roles].notna().any(axis=1).to_numpy()
+    referenced = keys.notna().to_numpy()
+    if ids_only:
+        referenced = referenced & pd.to_numeric(keys, errors='coerce').notna().to_numpy()
+    counts = tally.setdefault(kind, {'unmatched': 0, 'replaced': 0})
+    counts['unmatched'] += int((referenced & ~found).sum())
+    for role in roles:
+        new = merged[role]
+        for c in plan_columns(loan_plan, role):
+            old = loans_df[c]
+            both = (old.notna() & new.notna()).to_numpy()
+            if both.any():
+                counts['replaced'] += int((text_key(old[both]) != text_key(new[both])).sum())
+
+
+def print_backfill(tally):
+    for kind, counts in tally.items():
+        if counts['unmatched'] or counts['replaced']:
+            print(f"Backfill ({kind}): {counts['unmatched']} loan rows have no matching master row "
+                  f"(values kept or generated), {counts['replaced']} cells differing from the master sheet "
+                  f"were replaced; see check_integrity.py", file=sys.stderr)
+
+
+def master_lookups(books_df, students_df, plans):
+    """Book and student lookups for attach_master_fields; None where the loan sheet has no such columns.
+
+    Built once per run so chunked loan generation joins every chunk against the same tables.
+    """
+    loan_plan = plans['loan']
+    # layouts without denormalized columns (OduncID/OgrenciID/KitapID...) skip the joins entirely
+    books = None
+    if plan_columns(loan_plan, *BOOK_FIELD_ROLES):
+        books = master_lookup(books_df, plans['book'], BOOK_KEY, BOOK_FIELD_ROLES)
+
+    students = None
+    if plan_columns(loan_plan, *STUDENT_FIELD_ROLES):
+        students = master_lookup(students_df, plans['student'], STUDENT_KEY, ('first_name', 'last_name'))
+    if students is not None and 'first_name' in students.columns and 'last_name' in students.columns:
+        # combined "Ad Soyad" is built per student, before the join
+        students['full_name'] = students['first_name'].astype(str) + ' ' + students['last_name'].astype(str)
+        students.loc[students['first_name'].isna() | students['last_name'].isna(), 'full_name'] = None
+    return {'book': books, 'student': students}
+
+
+def attach_master_fields(loans_df, books_df, students_df, plans, lookups=None, tally=None):
+    """Copy title/author and student names into the loan sheet with one merge per master sheet.
+
+    Join keys are taken from BOOK_KEY/STUDENT_KEY when present (fresh loans),
+    otherwise from the loan sheet's book/student id columns; a title column
+    may also carry numeric book ids. Unmatched rows keep their current values;
+    unmatched ids and replaced cells that differed are reported on stderr, or
+    added to `tally` when the caller reports once for many chunks.
+    """
+    loan_plan = plans['loan']
+    loans_df = loans_df.reset_index(drop=True)
+    lookups = lookups or master_lookups(books_df, students_df, plans)
+    report = tally is None
+    tally = {} if report else tally
+
+    books = lookups['book']
+    if books is not None:
+        id_col = plan_column(loan_plan, 'book_id', 'title')
+        keys = loan_keys(loans_df, BOOK_KEY, id_col)
+        if keys is not None:
+            merged = merge_on_key(keys, books, BOOK_KEY)
+            # a title column holding real titles is not an id reference: only numeric keys count as unmatched
+            ids_only = BOOK_KEY not in loans_df.columns and id_col == plan_column(loan_plan, 'title')
+            count_backfill(tally, 'book', loans_df, keys, merged, loan_plan, BOOK_FIELD_ROLES, ids_only)
+            for role in BOOK_FIELD_ROLES:
+                if role in merged.columns:
+                    for c in plan_columns(loan_plan, role):
+                        loans_df[c] = merged[role].where(merged[role].notna(), loans_df.get(c))
+
+    students = lookups['student']
+    if students is not None:
+        keys = loan_keys(loans_df, STUDENT_KEY, plan_column(loan_plan, 'student_id'))
+        if keys is not None:
+            merged = merge_on_key(keys, students, STUDENT_KEY)
+            count_backfill(tally, 'student', loans_df, keys, merged, loan_plan, STUDENT_FIELD_ROLES)
+            for role in STUDENT_FIELD_ROLES:
+                if role in merged.columns:
+                    for c in plan_columns(loan_plan, role):
+                        loans_df[c] = merged[role].where(merged[role].notna(), loans_df.get(c))
+    if report:
+        print_backfill(tally)
+    return loans_df
+
+
+def generate_loan_shard(task):
+    # task: (roles, seed, shard_index, first_loan_id, n, book_ids, student_ids, durum_values, offset, sampler)
+    roles, seed, index, first_loan_id, n, book_ids, student_ids, durum_values, offset, sampler = task
+    reseed(shard_seed(seed, 'loan', index, offset))
+    if sampler is None:
+        kit_ids = book_ids[rng.integers(0, len(book_ids), size=n)]
+        ogr_ids = student_ids[rng.integers(0, len(student_ids), size=n)]
+        verilis = sample_dates(n)
+    else:
+        # skewed workload: issue days first, hot-spot bursts depend on them
+        verilis = workload.sample_dates(sampler, n, rng)
+        kit_ids = book_ids[workload.sample_books(sampler, n, rng, verilis)]
+        ogr_ids = student_ids[workload.sample_students(sampler, n, rng)]
+    teslim = verilis + rng.integers(1, 61, size=n).astype('timedelta64[D]')
+    teslim[rng.random(n) >= 0.75] = np.datetime64('NaT')
+    return loan_frame(roles, first_loan_id, kit_ids, ogr_ids, verilis, teslim, None, durum_values)
+
+
+def loan_frame(roles, first_loan_id, kit_ids, ogr_ids, verilis, teslim, status, durum_values):
+    # status None -> random durum value per row
+    n = len(kit_ids)
+    columns = {}
+    for c, role in roles.items():
+        if role == 'loan_id':
+            columns[c] = id_array(first_loan_id, n)
+        elif role == 'student_id':
+            columns[c] = ogr_ids
+        elif role == 'book_id':
+            columns[c] = kit_ids
+        elif role == 'issue_date':
+            columns[c] = verilis
+        elif role == 'return_date':
+            columns[c] = teslim
+        elif role == 'status':
+            columns[c] = status if status is not None else choose_categorical(durum_values or DURUM_VALUES, n)
+        elif role in BOOK_FIELD_ROLES or role in STUDENT_FIELD_ROLES:
+            columns[c] = np.full(n, None, dtype=object)  # filled by attach_master_fields
+        else:
+            columns[c] = generate_role_values(role, n, durum_values=durum_values)
+    loans = pd.DataFrame(columns)
+    loans[BOOK_KEY] = normalize_id_keys(kit_ids)
+    loans[STUDENT_KEY] = normalize_id_keys(ogr_ids)
+    return loans
+
+
+def book_quantities(books_df, plan, book_ids):
+    # copies per book id for the simulation; rows without a usable quantity count as one copy
+    id_col = plan_id_column(plan)
+    qty_col = plan_column(plan, 'quantity')
+    if not id_col or not qty_col or id_col not in books_df.columns:
+        return np.ones(len(book_ids), dtype=np.int64)
+    quantity = pd.to_numeric(books_df[qty_col], errors='coerce')
+    per_id = quantity.groupby(books_df[id_col]).last()
+    return per_id.reindex(book_ids).fillna(1).clip(lower=0).to_numpy(dtype=np.int64)
+
+
+def student_classes(students_df, plan, student_ids):
+    # class text per student id for class-weighted borrowers; '' where unknown
+    id_col = plan_id_column(plan)
+    class_col = plan_column(plan, 'class')
+    if not id_col or not class_col or id_col not in students_df.columns:
+        return np.full(len(student_ids), '', dtype=object)
+    per_id = students_df[class_col].astype(object).groupby(students_df[id_col]).last()
+    return per_id.reindex(student_ids).fillna('').to_numpy(dtype=object)
+
+
+def simulation_window(options):
+    end = reference_day()
+    return end - np.timedelta64(int(round(options['years'] * 365)), 'D'), end
+
+
+def build_workload(spec, seed, book_ids, students_df, student_plan, student_ids, simulate=None):
+    """Alias tables and burst windows for a skewed workload (workload.py), built once per run; None for uniform."""
+    if not spec:
+        return None
+    start, end = simulation_window(simulate) if simulate else (reference_day() - np.timedelta64(365, 'D'),
+                                                               reference_day())
+    classes = student_classes(students_df, student_plan, student_ids)
+    sampler = workload.build(spec, len(book_ids), classes, np.random.default_rng(shard_seed(seed, 'workload', 0)),
+                             start, end)
+    print(f"Workload {','.join(spec['components'])}: {workload.describe(sampler)}")
+    return sampler
 
 
-def generate_loans(books_df, students_df, existing_loans_df=None, n=100):
+def simulate_loan_rows(roles, seed, first_loan_id, n, book_ids, quantities, student_ids, options, sampler=None):
+    # n borrow attempts over the last `years`, school-calendar weighted; rejected attempts emit no row
+    reseed(shard_seed(seed, 'loan', 0))
+    start, end = simulation_window(options)
+    arrivals = date_engine.random_dates(start, end, n, rng, sort=True, profile='school')
+    picks = {}
+    if sampler is not None:
+        picks = {'pick_books': lambda size, r, days=None: workload.sample_books(sampler, size, r, days),
+                 'pick_students': lambda size, r: workload.sample_students(sampler, size, r)}
+    result = loan_sim.simulate(quantities, len(student_ids), arrivals, rng, end=end,
+                               max_borrow_limit=options['max_borrow'], loan_days=options['loan_days'], **picks)
+    stats = result['stats']
+    print(f"Simulated {stats['loans']}/{stats['attempts']} loans "
+          f"(no copy: {stats['no_copy']}, limit: {stats['limit']}, peak active: {stats['peak_active']})")
+    # returned loans carry the return day, open ones their due day
+    teslim = np.where(np.isnat(result['return_date']), result['due_date'], result['return_date'])
+    status = pd.Categorical(pd.Series(result['status']).map(SIM_STATUS_VALUES), categories=DURUM_VALUES)
+    return loan_frame(roles, first_loan_id, book_ids[result['book']], student_ids[result['student']],
+                      result['issue_date'], teslim, status, DURUM_VALUES)
+
+
+def iter_loans(books_df, students_df, existing_loans_df=None, n=100, plans=None, seed=None, workers=1,
+               simulate=None, first_loan_id=1, offset=0, durum_values=None, workload_spec=None):
+    """Yield finished loan chunks (generate -> join master fields -> fill) of at most SHARD_SIZE rows.
+
+    Each chunk depends only on the seed and its shard index, so writing the
+    chunks as they come gives the same rows as generate_loans, without ever
+    holding the whole table. first_loan_id/offset/durum_values are used when
+    appending to an existing loan sheet (--incremental); workload_spec
+    (workload.parse_spec) skews which books, students and days are drawn.
+    """
+    plans = dict(plans or {})
+    plans.setdefault('book', build_column_plan(books_df, 'book'))
+    plans.setdefault('student', build_column_plan(students_df, 'student'))
     # Decide which columns to use for loan rows
     if existing_loans_df is not None and not existing_loans_df.empty:
-        loan_cols = list(existing_loans_df.columns)
-        durum_col = detect_id_col(existing_loans_df, ['durum', 'Durum'])
-        durum_values = existing_loans_df[durum_col].dropna().unique().tolist() if durum_col and durum_col in existing_loans_df.columns else ['Verildi', 'Teslim edildi', 'Gecikmeli']
+        plans.setdefault('loan', build_column_plan(existing_loans_df, 'loan'))
+        durum_col = plan_column(plans['loan'], 'status')
+        if durum_values is None:
+            durum_values = existing_loans_df[durum_col].dropna().unique().tolist() if durum_col else DURUM_VALUES
     else:
-        loan_cols = ['OduncID', 'OgrenciID', 'KitapID', 'VerilisTarihi', 'TeslimTarihi', 'Durum']
-        durum_values = ['Verildi', 'Teslim edildi', 'Gecikmeli']
+        plans.setdefault('loan', build_column_plan(None, 'loan'))
+        durum_values = durum_values or DURUM_VALUES
 
-    # Determine identifier columns in books/students
-    book_id_col = detect_id_col(books_df, ['id', 'KitapID', 'kod', 'no']) if not books_df.empty else None
-    student_id_col = detect_id_col(students_df, ['id', 'OgrenciID', 'kod', 'no']) if not students_df.empty else None
+    seed = new_seed() if seed is None else seed
+    book_ids = compact_ids(id_values(books_df, plans['book'], 200))
+    student_ids = compact_ids(id_values(students_df, plans['student'], 100))
+    roles = plans['loan']['roles']
+    sampler = build_workload(workload_spec, seed, book_ids, students_df, plans['student'], student_ids, simulate)
+    if simulate:
+        # the event simulation is sequential: it runs as a single stream and is cut into chunks afterwards
+        quantities = book_quantities(books_df, plans['book'], book_ids)
+        loans = simulate_loan_rows(roles, seed, first_loan_id, n, book_ids, quantities, student_ids, simulate,
+                                   sampler)
+        chunks = (loans.iloc[start:start + size] for start, size in shard_ranges(len(loans)))
+    else:
+        tasks = [
+            (roles, seed, index, first_loan_id + start, size, book_ids, student_ids, durum_values, offset, sampler)
+            for index, (start, size) in enumerate(shard_ranges(n))
+        ]
+        chunks = iter_shards(generate_loan_shard, tasks, workers)
 
-    book_ids = list(books_df[book_id_col].dropna().unique()) if (book_id_col and book_id_col in books_df.columns) else []
-    student_ids = list(students_df[student_id_col].dropna().unique()) if (student_id_col and student_id_col in students_df.columns) else []
+    # master lookups are built once; every chunk is joined against them
+    lookups = master_lookups(books_df, students_df, plans)
+    tally = {}
+    for index, loans in enumerate(chunks):
+        with stage('backfill', accumulate=True):
+            loans = attach_master_fields(loans, books_df, students_df, plans, lookups=lookups, tally=tally)
+
+        # ids without a master row (or masters without those columns) get generated values
+        reseed(shard_seed(seed, 'fill', index, offset))
+        for c, role in roles.items():
+            if role in BOOK_FIELD_ROLES or role in STUDENT_FIELD_ROLES:
+                missing = loans[c].isna().to_numpy()
+                if missing.any():
+                    values = loans[c].to_numpy(dtype=object)
+                    values[missing] = generate_role_values(role, int(missing.sum()))
+                    loans[c] = values
+        yield loans[list(roles)]
+    print_backfill(tally)
 
-    if not book_ids and not books_df.empty:
-        # try first column values
-        book_ids = list(books_df.iloc[:, 0].dropna().unique())
-    if not student_ids and not students_df.empty:
-        student_ids = list(students_df.iloc[:, 0].dropna().unique())
-
-    # fallback ranges
-    if not book_ids:
-        book_ids = list(range(1, max(201, len(book_ids) + 1)))
-    if not student_ids:
-        student_ids = list(range(1, max(101, len(student_ids) + 1)))
-
-    loans = []
-    verilis_dates = sample_dates(n)
-    # Build lookup maps for Başlık/Yazar and student full name if available
-    book_title_col = None
-    book_author_col = None
-    student_ad_col = None
-    student_soyad_col = None
-    if not books_df.empty:
-        # try common Turkish column names
-        for cand in ['başlık', 'baslik', 'title', 'konu']:
-            for c in books_df.columns:
-                if cand in str(c).lower():
-                    book_title_col = c
-                    break
-            if book_title_col:
-                break
-        for cand in ['yazar', 'author']:
-            for c in books_df.columns:
-                if cand in str(c).lower():
-                    book_author_col = c
-                    break
-            if book_author_col:
-                break
-
-    if not students_df.empty:
-        for cand in ['ad', 'isim', 'name']:
-            for c in students_df.columns:
-                if cand in str(c).lower():
-                    student_ad_col = c
-                    break
-            if student_ad_col:
-                break
-        for cand in ['soyad', 'surname']:
-            for c in students_df.columns:
-                if cand in str(c).lower():
-                    student_soyad_col = c
-                    break
-            if student_soyad_col:
-                break
-
-    # maps
-    book_map = {}
-    if book_id_col and book_title_col and book_author_col and (book_id_col in books_df.columns):
-        for _, r in books_df[[book_id_col, book_title_col, book_author_col]].dropna(subset=[book_id_col]).iterrows():
-            try:
-                bid = r[book_id_col]
-                book_map[int(bid)] = (r[book_title_col], r[book_author_col])
-            except Exception:
-                # non-integer ids possible - store as-is
-                book_map[r[book_id_col]] = (r[book_title_col], r[book_author_col])
-
-    student_map = {}
-    if student_id_col and student_ad_col and student_soyad_col and (student_id_col in students_df.columns):
-        for _, r in students_df[[student_id_col, student_ad_col, student_soyad_col]].dropna(subset=[student_id_col]).iterrows():
-            try:
-                sid = r[student_id_col]
-                student_map[int(sid)] = f"{r[student_ad_col]} {r[student_soyad_col]}"
-            except Exception:
-                student_map[r[student_id_col]] = f"{r[student_ad_col]} {r[student_soyad_col]}"
-    for i in range(n):
-        row = {}
-        odunc_id = i + 1
-        ogr_id = random.choice(student_ids)
-        kit_id = random.choice(book_ids)
-        verilis = verilis_dates[i]
-        teslim_date = None
-        if random.random() < 0.75:
-            teslim_date = verilis + timedelta(days=random.randint(1, 60))
-
-        for c in loan_cols:
-            lc = c.lower()
-            if 'odunc' in lc or ('id' in lc and ('odunc' in lc or 'oduncid' in lc or 'odunc_id' in lc)):
-                row[c] = odunc_id
-            elif any(x in lc for x in ('ogrenci', 'ogrenciid', 'ogrenci_id', 'student')):
-                row[c] = ogr_id
-            elif any(x in lc for x in ('kitap', 'kitapid', 'book')):
-                row[c] = kit_id
-            elif any(x in lc for x in ('verilis', 'veril', 'verilis_tarihi', 'tarih', 'date')):
-                row[c] = verilis.date()
-            elif any(x in lc for x in ('teslim', 'iade')):
-                row[c] = (teslim_date.date() if teslim_date is not None else pd.NaT)
-            elif 'durum' in lc or 'status' in lc:
-                row[c] = random.choice(durum_values)
-            elif any(x in lc for x in ('başlık', 'baslik', 'title')):
-                # fill from book map if available
-                val = None
-                try:
-                    val = book_map.get(int(kit_id)) if kit_id in book_map or (isinstance(kit_id, int) and int(kit_id) in book_map) else book_map.get(kit_id)
-                except Exception:
-                    val = book_map.get(kit_id)
-                if val:
-                    # val is tuple(title, author)
-                    row[c] = val[0]
-                else:
-                    row[c] = generate_value_for_column(c, id_value=None, kind='loan')
-            elif any(x in lc for x in ('yazar', 'author')):
-                val = None
-                try:
-                    val = book_map.get(int(kit_id)) if kit_id in book_map or (isinstance(kit_id, int) and int(kit_id) in book_map) else book_map.get(kit_id)
-                except Exception:
-                    val = book_map.get(kit_id)
-                if val:
-                    row[c] = val[1]
-                else:
-                    row[c] = generate_value_for_column(c, id_value=None, kind='loan')
-            elif any(x in lc for x in ('ad soyad', 'adsoyad', 'ad_soyad', 'adsoy', 'adsoy')) or (('ad' in lc or 'isim' in lc) and ('soy' in lc or 'soyad' in lc)):
-                # combined student name column
-                nm = None
-                try:
-                    nm = student_map.get(int(ogr_id)) if ogr_id in student_map or (isinstance(ogr_id, int) and int(ogr_id) in student_map) else student_map.get(ogr_id)
-                except Exception:
-                    nm = student_map.get(ogr_id)
-                if nm:
-                    row[c] = nm
-                else:
-                    # fallback: try to construct from students_df
-                    try:
-                        srow = students_df[students_df[student_id_col] == ogr_id]
-                        if not srow.empty and student_ad_col and student_soyad_col:
-                            row[c] = f"{srow.iloc[0][student_ad_col]} {srow.iloc[0][student_soyad_col]}"
-                        else:
-                            row[c] = generate_value_for_column(c, id_value=None, kind='loan')
-                    except Exception:
-                        row[c] = generate_value_for_column(c, id_value=None, kind='loan')
-            elif any(x in lc for x in ('personel', 'gorevli', 'görevli', 'person', 'calisan', 'yetkili')):
-                row[c] = fake.name()
-            else:
-                row[c] = generate_value_for_column(c, id_value=None, kind='loan', durum_values=({'durum': durum_values} if durum_values else None))
-
-        loans.append(row)
-
-    return pd.DataFrame(loans)
+
+def generate_loans(books_df, students_df, existing_loans_df=None, n=100, plans=None, seed=None, workers=1,
+                   simulate=None, first_loan_id=1, offset=0, durum_values=None, workload_spec=None):
+    # the whole table at once: iter_loans' chunks concatenated
+    chunks = list(iter_loans(books_df, students_df, existing_loans_df, n, plans, seed, workers, simulate,
+                             first_loan_id, offset, durum_values, workload_spec))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
 
 
 def ensure_id_column(df: pd.DataFrame, target_col: str, start=1):
@@ -341,172 +1042,329 @@ def ensure_id_column(df: pd.DataFrame, target_col: str, start=1):
     return df
 
 
-def main():
-    books = load_df(BOOKS_FN)
-    students = load_df(STUDENTS_FN)
-    loans_existing = load_df(LOANS_FN)
+def simulation_options(args):
+    if not args.simulate:
+        return None
+    return {'years': args.sim_years, 'max_borrow': args.max_borrow, 'loan_days': args.loan_days}
+
+
+def workload_options(args):
+    # None for uniform draws, so manifests written before --workload still match
+    return workload.parse_spec(args.workload, args.zipf_s)
+
 
-    # Normalize and ensure IDs
-    if books.empty:
-        books = pd.DataFrame()
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Sahte veri üreteci')
+    p.add_argument('--books', type=int, default=TARGET_BOOKS, help=f'Hedef kitap satırı sayısı. Varsayılan: {TARGET_BOOKS}')
+    p.add_argument('--students', type=int, default=TARGET_STUDENTS, help=f'Hedef öğrenci satırı sayısı. Varsayılan: {TARGET_STUDENTS}')
+    p.add_argument('--loans', type=int, default=TARGET_LOANS, help=f'Üretilecek ödünç kaydı sayısı. Varsayılan: {TARGET_LOANS}')
+    p.add_argument('--workers', '-w', type=int, default=1, help='Paralel üretim süreç sayısı. Varsayılan: 1')
+    p.add_argument('--save-workers', type=int, default=default_save_workers(),
+                   help='Çıktı tablolarını üretimle eş zamanlı yazan süreç sayısı; 1 = sırayla, ana süreçte. '
+                        'Varsayılan: en çok 3 (çekirdek sayısı)')
+    p.add_argument('--seed', type=int, default=None, help='Tekrarlanabilir üretim için tohum; aynı tohum her süreç sayısında aynı veriyi verir')
+    p.add_argument('--pool-size', type=int, default=value_pools.DEFAULT_POOL_SIZE,
+                   help=f'Ad/başlık/e-posta gibi değer havuzlarının boyutu; 0 = her değer için canlı Faker. Varsayılan: {value_pools.DEFAULT_POOL_SIZE}')
+    p.add_argument('--pool-cache', default=None, help='Değer havuzlarının saklanacağı klasör (verilmezse her çalıştırmada yeniden üretilir)')
+    p.add_argument('--simulate', action='store_true',
+                   help='Ödünçleri stok ve öğrenci limitine uyan olay simülasyonuyla üret (kopya sayısı ve limit aşılmaz)')
+    p.add_argument('--sim-years', type=float, default=1.0, help='Simülasyonun kapsadığı süre (yıl, bugünden geriye). Varsayılan: 1')
+    p.add_argument('--max-borrow', type=int, default=loan_sim.DEFAULT_MAX_BORROW_LIMIT,
+                   help=f'Öğrenci başına en fazla aktif ödünç. Varsayılan: {loan_sim.DEFAULT_MAX_BORROW_LIMIT}')
+    p.add_argument('--loan-days', type=int, default=loan_sim.DEFAULT_LOAN_DAYS,
+                   help=f'Ödünç süresi (gün). Varsayılan: {loan_sim.DEFAULT_LOAN_DAYS}')
+    p.add_argument('--profile', action='store_true',
+                   help='Aşama başına süre ve tracemalloc bellek zirvesini stderr\'e JSON olarak yaz')
+    p.add_argument('--profile-no-memory', action='store_true',
+                   help='--profile ile birlikte tracemalloc\'u kapat (yalnızca süre; ek yük olmaz)')
+    p.add_argument('--profile-dump', default=None, help='cProfile/pstats çıktısının yazılacağı dosya (ör. run.pstats)')
+    p.add_argument('--dump-plan', action='store_true', help='Sütun rol planını (ve backend eşleşmesini) JSON olarak yazdır, dosya üretme')
+    p.add_argument('--xlsx-cache', default=str(df_cache.DEFAULT_CACHE_DIR),
+                   help=f'Ayrıştırılmış xlsx önbelleği klasörü (pyarrow gerekir). Varsayılan: {df_cache.DEFAULT_CACHE_DIR}')
+    p.add_argument('--xlsx-cache-mb', type=float, default=df_cache.DEFAULT_MAX_MB,
+                   help=f'Önbellek boyut sınırı (MB). Varsayılan: {df_cache.DEFAULT_MAX_MB}')
+    p.add_argument('--no-xlsx-cache', action='store_true', help='xlsx dosyalarını her seferinde yeniden ayrıştır')
+    p.add_argument('--incremental', action='store_true',
+                   help=f'{manifest.MANIFEST_FN} ile değişmeyen aşamaları atla, hedef büyüdüyse yalnızca eksik satırları ekle (--loans toplam hedef olur)')
+    p.add_argument('--sqlite', default=None,
+                   help='Üretilen tabloları backend şemasındaki bu SQLite dosyasına da yaz (sqlite_export.py)')
+    p.add_argument('--no-xlsx', action='store_true', help='Çalışma kitaplarını kaydetme (--sqlite ya da .csv/.parquet --loans-out ile birlikte)')
+    p.add_argument('--loans-out', default=LOANS_FN,
+                   help=f'Ödünç tablosunun yazılacağı dosya; biçim uzantıdan (.xlsx, .csv, .parquet). Varsayılan: {LOANS_FN}')
+    p.add_argument('--stream', action='store_true',
+                   help='Ödünçleri parça parça üret, zenginleştir ve yaz; tablo hiçbir zaman bütün olarak bellekte tutulmaz '
+                        '(aynı tohumla çıktı aynıdır)')
+    p.add_argument('--workload', default='uniform',
+                   help=f"Ödünç iş yükü profili: {', '.join(workload.PROFILES)} ya da virgülle birleşim "
+                        "(ör. zipf,class,seasonal,hotspot). Varsayılan: uniform")
+    p.add_argument('--zipf-s', type=float, default=workload.DEFAULT_ZIPF_EXPONENT,
+                   help=f'zipf profilinde kitap popülerliği üssü (büyüdükçe daha çarpık). Varsayılan: {workload.DEFAULT_ZIPF_EXPONENT}')
+    args = p.parse_args(argv)
+    try:
+        workload_options(args)
+    except ValueError as e:
+        p.error(str(e))
+    if args.incremental and (args.sqlite or args.no_xlsx or args.stream or args.loans_out != LOANS_FN):
+        p.error('--sqlite/--no-xlsx/--stream/--loans-out --incremental ile kullanılamaz')
+    if args.stream and args.sqlite:
+        p.error('--stream --sqlite ile kullanılamaz (SQLite aktarımı tüm ödünç tablosunu ister)')
+    try:
+        loans_format = table_format(args.loans_out)
+    except ValueError as e:
+        p.error(str(e))
+    if args.stream and args.no_xlsx and loans_format == 'xlsx':
+        p.error('--stream --no-xlsx ile ödünçler için .csv ya da .parquet --loans-out ister')
+    return args
 
-    if students.empty:
-        students = pd.DataFrame()
+
+def build_plans(books, students, loans_existing):
+    return {
+        'book': build_column_plan(books, 'book'),
+        'student': build_column_plan(students, 'student'),
+        'loan': build_column_plan(loans_existing, 'loan'),
+    }
+
+
+def run(args):
+    value_pools.configure(args.pool_size, args.pool_cache)
+    df_cache.configure(args.xlsx_cache, args.xlsx_cache_mb, enabled=not args.no_xlsx_cache)
+    if args.incremental and not args.dump_plan:
+        return run_incremental(args)
+    with stage('load'):
+        books = load_df(BOOKS_FN)
+        students = load_df(STUDENTS_FN)
+        loans_existing = load_df(LOANS_FN)
+
+    # Resolve column roles once per workbook
+    plans = build_plans(books, students, loans_existing)
+    if args.dump_plan:
+        dump = dict(plans)
+        dump['backend'] = {kind: compare_plan_with_backend(plans[kind]) for kind in ('book', 'student')}
+        print(json.dumps(dump, ensure_ascii=False, indent=2, default=str))
+        return None
 
     # For existing DataFrames, capture observed 'durum' values if available
-    existing_values_books = {}
-    existing_values_students = {}
     existing_values_loans = {}
-    if not loans_existing.empty:
-        if 'Durum' in loans_existing.columns:
-            existing_values_loans['durum'] = loans_existing['Durum'].dropna().unique().tolist()
-        else:
-            dc = detect_id_col(loans_existing, ['durum', 'Durum'])
-            if dc and dc in loans_existing.columns:
-                existing_values_loans['durum'] = loans_existing[dc].dropna().unique().tolist()
-
-    # Generate/append rows while preserving original columns
-    books = generate_rows_for_dataframe(books, TARGET_BOOKS, kind='book')
-    students = generate_rows_for_dataframe(students, TARGET_STUDENTS, kind='student')
-
-    # Generate loans using existing loan column layout
-    loans_df = generate_loans(books, students, existing_loans_df=loans_existing, n=TARGET_LOANS)
-
-    # Before saving loans, ensure Başlık/Yazar in loans come from kitap listesi.xlsx
-    if not loans_df.empty:
-        # detect loan title/author column names
-        loan_title_cols = [c for c in loans_df.columns if any(x in str(c).lower() for x in ('başlık', 'baslik', 'title'))]
-        loan_author_cols = [c for c in loans_df.columns if any(x in str(c).lower() for x in ('yazar', 'author'))]
-
-        # detect a book id column in loans (commonly KitapID or similar)
-        loan_book_id_col = None
-        for c in loans_df.columns:
-            if any(x in str(c).lower() for x in ('kitapid', 'kitap_id', 'kitap', 'bookid', 'book_id')) and c.lower() not in [col.lower() for col in loan_title_cols + loan_author_cols]:
-                loan_book_id_col = c
-                break
-
-        # build book map from books dataframe (id -> (title, author))
-        book_map = {}
-        # determine book id column in books_df
-        book_id_col = detect_id_col(books_df, ['id', 'KitapID', 'kod', 'no']) if not books_df.empty else None
-        # find title/author cols in books_df
-        book_title_col = None
-        book_author_col = None
-        if not books_df.empty:
-            for cand in ['başlık', 'baslik', 'title', 'konu']:
-                for c in books_df.columns:
-                    if cand in str(c).lower():
-                        book_title_col = c
-                        break
-                if book_title_col:
-                    break
-            for cand in ['yazar', 'author']:
-                for c in books_df.columns:
-                    if cand in str(c).lower():
-                        book_author_col = c
-                        break
-                if book_author_col:
-                    break
-
-        if book_id_col and book_title_col and book_author_col and (book_id_col in books_df.columns):
-            for _, r in books_df[[book_id_col, book_title_col, book_author_col]].dropna(subset=[book_id_col]).iterrows():
-                key = r[book_id_col]
-                try:
-                    key = int(key)
-                except Exception:
-                    pass
-                book_map[key] = (r[book_title_col], r[book_author_col])
-
-        # If loan file doesn't have explicit book id column but its title column contains ids, handle that
-        # For each loan row, attempt to get book id from loan_book_id_col or from title column if numeric
-        for idx, r in loans_df.iterrows():
-            # determine book id value for this loan
-            bid = None
-            if loan_book_id_col and loan_book_id_col in loans_df.columns:
-                bid = r[loan_book_id_col]
-            else:
-                # check first title col if it contains a numeric id
-                if loan_title_cols:
-                    tval = r[loan_title_cols[0]]
-                    try:
-                        bid = int(tval)
-                    except Exception:
-                        # maybe string that matches an id
-                        bid = tval
-
-            # try to lookup book data
-            bdata = None
-            if bid in book_map:
-                bdata = book_map[bid]
-            else:
-                # maybe need to coerce
-                try:
-                    bdata = book_map.get(int(bid)) if bid is not None else None
-                except Exception:
-                    bdata = None
-
-            # write title/author columns from bdata when available
-            if bdata is not None:
-                title_val, author_val = bdata
-                for tc in loan_title_cols:
-                    loans_df.at[idx, tc] = title_val
-                for ac in loan_author_cols:
-                    loans_df.at[idx, ac] = author_val
-
-        # Also ensure student name columns in loans use students_df Ad + ' ' + Soyad
-        loan_student_name_cols = [c for c in loans_df.columns if any(x in str(c).lower() for x in ('ad soyad', 'adsoyad', 'ad_soyad', 'adsoy', 'ad + soyad'))]
-        # detect student id col in loans
-        loan_student_id_col = None
-        for c in loans_df.columns:
-            if any(x in str(c).lower() for x in ('ogrenciid', 'ogrenci_id', 'ogrenci', 'studentid', 'student')):
-                loan_student_id_col = c
-                break
-        # detect ad/soyad cols in students_df
-        stud_ad = None
-        stud_soyad = None
-        if not students_df.empty:
-            for cand in ['ad', 'isim', 'name']:
-                for c in students_df.columns:
-                    if cand in str(c).lower():
-                        stud_ad = c
-                        break
-                if stud_ad:
-                    break
-            for cand in ['soyad', 'surname']:
-                for c in students_df.columns:
-                    if cand in str(c).lower():
-                        stud_soyad = c
-                        break
-                if stud_soyad:
-                    break
-
-        student_map = {}
-        if loan_student_id_col and stud_ad and stud_soyad and loan_student_id_col in students_df.columns:
-            # build map from students_df using its id column if matching names
-            stud_id_col = detect_id_col(students_df, ['id', 'OgrenciID', 'kod', 'no'])
-            if stud_id_col and stud_id_col in students_df.columns:
-                for _, r in students_df[[stud_id_col, stud_ad, stud_soyad]].dropna(subset=[stud_id_col]).iterrows():
-                    key = r[stud_id_col]
-                    try:
-                        key = int(key)
-                    except Exception:
-                        pass
-                    student_map[key] = f"{r[stud_ad]} {r[stud_soyad]}"
-
-        for idx, r in loans_df.iterrows():
-            sid = None
-            if loan_student_id_col and loan_student_id_col in loans_df.columns:
-                sid = r[loan_student_id_col]
-            if sid in student_map:
-                # find any student-name-like columns and set
-                for col in loans_df.columns:
-                    if any(x in str(col).lower() for x in ('ad soyad', 'adsoyad', 'ad_soyad')) or (('ad' in str(col).lower() or 'isim' in str(col).lower()) and ('soy' in str(col).lower() or 'soyad' in str(col).lower())):
-                        loans_df.at[idx, col] = student_map[sid]
-
-    # Save files (overwrite)
-    save_df(books, BOOKS_FN)
-    save_df(students, STUDENTS_FN)
+    durum_col = plan_column(plans['loan'], 'status')
+    if not loans_existing.empty and durum_col:
+        existing_values_loans['durum'] = loans_existing[durum_col].dropna().unique().tolist()
+
+    seed = args.seed if args.seed is not None else new_seed()
+    print(f"Seed: {seed}")
+
+    # Master workbooks are written in the background while the rest is generated
+    with output_writer(1 if args.no_xlsx else args.save_workers) as save:
+        # Generate/append rows while preserving original columns
+        with stage('generate_books'):
+            books = generate_rows_for_dataframe(books, args.books, kind='book', plan=plans['book'], seed=seed,
+                                                workers=args.workers)
+        if not args.no_xlsx:
+            save(books, BOOKS_FN, 'save_books')
+        with stage('generate_students'):
+            students = generate_rows_for_dataframe(students, args.students, kind='student', plan=plans['student'],
+                                                   seed=seed, workers=args.workers)
+        if not args.no_xlsx:
+            save(students, STUDENTS_FN, 'save_students')
+        # Plans built from empty workbooks pick up the default columns' ids now
+        plans = build_plans(books, students, loans_existing)
+
+        if args.stream:
+            return run_stream(args, books, students, loans_existing, plans, seed)
+
+        # Generate loans using existing loan column layout; Başlık/Yazar and
+        # student names are joined in from kitap listesi.xlsx / ogrenci_listesi.xlsx
+        with stage('generate_loans'):
+            loans_df = generate_loans(books, students, existing_loans_df=loans_existing, n=args.loans, plans=plans,
+                                      seed=seed, workers=args.workers, simulate=simulation_options(args),
+                                      workload_spec=workload_options(args))
+
+        result = {'seed': seed, 'rows': {'books': len(books), 'students': len(students), 'loans': len(loans_df)}}
+        if PROFILE is not None:
+            result['loan_memory'] = loan_memory_report(loans_df)
+
+        # --no-xlsx keeps only a CSV/Parquet loan table
+        if not (args.no_xlsx and table_format(args.loans_out) == 'xlsx'):
+            save(loans_df, args.loans_out, 'save_loans')
+
+        if args.sqlite:
+            # imported here: sqlite_export builds on this module
+            import sqlite_export
+            with stage('save_sqlite'):
+                exported = sqlite_export.export_sqlite(args.sqlite, books, students, loans_df, plans=plans, seed=seed,
+                                                       loan_days=args.loan_days)
+            sqlite_export.print_summary(args.sqlite, exported)
+            result['sqlite'] = exported['rows']
+    return result
+
+
+def run_stream(args, books, students, loans_existing, plans, seed):
+    """--stream: pipe loan chunks generate -> enrich -> write.
+
+    The master workbooks were handed to run's output_writer and are written
+    meanwhile. Only one chunk per worker (plus the masters) is held at a
+    time; the file matches a non-streamed run with the same seed.
+    """
+    with stage('stream_loans'):
+        chunks = iter_loans(books, students, existing_loans_df=loans_existing, n=args.loans, plans=plans, seed=seed,
+                            workers=args.workers, simulate=simulation_options(args),
+                            workload_spec=workload_options(args))
+        n = write_table(args.loans_out, chunks)
+    print(f"Saved {n} rows -> {args.loans_out}")
+    return {'seed': seed, 'rows': {'books': len(books), 'students': len(students), 'loans': n}}
+
+
+def append_rows(path, created):
+    # splice new rows into the workbook; fall back to load + rewrite when the file cannot be spliced
+    n = append_xlsx(path, created)
+    if n is not None:
+        print(f"Appended {n} rows -> {path}")
+        return
+    df = load_df(path)
+    save_df(pd.concat([df, created[list(df.columns)]], ignore_index=True), path)
+
+
+def topup_catalog(state, kind, path, target, seed, workers, frames):
+    """Bring one master workbook to `target` rows. Returns 'skip', 'append' or 'rebuild'.
+
+    A workbook whose checksum matches the manifest is not read at all: it is
+    skipped, or the missing rows are generated with ids after the recorded
+    maximum and appended. Anything else goes through load + generate + save
+    and lands in `frames`.
+    """
+    entry = state['files'].get(kind)
+    if entry and manifest.unchanged(entry, path):
+        rows = entry['rows']
+        if target <= rows:
+            print(f"{path}: unchanged ({rows} rows), skipped")
+            return 'skip'
+        plan = entry['plan']
+        max_id = entry['max_id']
+        first_id = max_id + 1 if max_id is not None else rows + 1
+        created = generate_catalog_rows(plan, kind, target - rows, first_id, seed=seed, workers=workers,
+                                        offset=rows)
+        append_rows(path, created)
+        if max_id is not None:
+            max_id = max(max_id, max_id_value(created, plan_id_column(plan)) or max_id)
+        manifest.record(state, kind, path, rows=target, plan=plan, max_id=max_id, target=target)
+        return 'append'
+
+    df = load_df(path)
+    grown = generate_rows_for_dataframe(df, target, kind=kind, plan=build_column_plan(df, kind), seed=seed,
+                                        workers=workers)
+    if len(grown) > len(df) or not Path(path).exists():
+        save_df(grown, path)
+    frames[kind] = grown
+    plan = build_column_plan(grown, kind)
+    manifest.record(state, kind, path, rows=len(grown), plan=plan, max_id=max_id_value(grown, plan_id_column(plan)),
+                    target=target)
+    return 'rebuild'
+
+
+def topup_loans(state, args, seed, frames, rebuilt):
+    """Bring the loan workbook to args.loans rows; see topup_catalog.
+
+    Existing loans stay valid while the master workbooks only grow, so only
+    the missing loans are appended. A master workbook that was rebuilt, a
+    change of simulation or workload options, or --simulate itself (stock history must
+    stay consistent) regenerates the whole sheet.
+    """
+    entry = state['files'].get('loan')
+    options = simulation_options(args)
+    spec = workload_options(args)
+    reusable = (entry is not None and not rebuilt and entry.get('options') == options
+                and entry.get('workload') == spec and manifest.unchanged(entry, LOANS_FN))
+    if reusable and args.loans <= entry['rows']:
+        print(f"{LOANS_FN}: unchanged ({entry['rows']} rows), skipped")
+        return 'skip'
+
+    # loans join titles/authors and names from the masters, so those are read in full here
+    books = frames['book'] if 'book' in frames else load_df(BOOKS_FN)
+    students = frames['student'] if 'student' in frames else load_df(STUDENTS_FN)
+    plans = {'book': build_column_plan(books, 'book'), 'student': build_column_plan(students, 'student')}
+
+    if reusable and not options:
+        rows = entry['rows']
+        plans['loan'] = entry['plan']
+        max_id = entry['max_id']
+        first_id = max_id + 1 if max_id is not None else rows + 1
+        created = generate_loans(books, students, n=args.loans - rows, plans=plans, seed=seed, workers=args.workers,
+                                 first_loan_id=first_id, offset=rows, durum_values=entry['durum_values'],
+                                 workload_spec=spec)
+        append_rows(LOANS_FN, created)
+        if max_id is not None:
+            max_id = first_id + len(created) - 1
+        manifest.record(state, 'loan', LOANS_FN, rows=rows + len(created), plan=entry['plan'], max_id=max_id,
+                        target=args.loans, options=options, durum_values=entry['durum_values'], workload=spec)
+        return 'append'
+
+    loans_existing = load_df(LOANS_FN)
+    plans['loan'] = build_column_plan(loans_existing, 'loan')
+    durum_col = plan_column(plans['loan'], 'status')
+    durum_values = None
+    if not loans_existing.empty and durum_col:
+        durum_values = loans_existing[durum_col].dropna().unique().tolist()
+    loans_df = generate_loans(books, students, existing_loans_df=loans_existing, n=args.loans, plans=plans, seed=seed,
+                              workers=args.workers, simulate=options, workload_spec=spec)
     save_df(loans_df, LOANS_FN)
+    loan_plan = build_column_plan(loans_df, 'loan')
+    manifest.record(state, 'loan', LOANS_FN, rows=len(loans_df), plan=loan_plan,
+                    max_id=max_id_value(loans_df, plan_column(loan_plan, 'loan_id')), target=args.loans,
+                    options=options, durum_values=durum_values or DURUM_VALUES, workload=spec)
+    return 'rebuild'
+
+
+def run_incremental(args):
+    # --incremental: the manifest decides per workbook whether to skip, append or rebuild
+    state = manifest.load(manifest.MANIFEST_FN)
+    if state.get('pool_size') not in (None, args.pool_size):
+        print(f"Note: pool size changed ({state['pool_size']} -> {args.pool_size}); only new rows use the new pools")
+    seed = args.seed if args.seed is not None else state.get('seed')
+    seed = seed if seed is not None else new_seed()
+    print(f"Seed: {seed}")
+
+    frames = {}
+    actions = {}
+    with stage('books'):
+        actions['books'] = topup_catalog(state, 'book', BOOKS_FN, args.books, seed, args.workers, frames)
+    with stage('students'):
+        actions['students'] = topup_catalog(state, 'student', STUDENTS_FN, args.students, seed, args.workers, frames)
+    rebuilt = [kind for kind in ('books', 'students') if actions[kind] == 'rebuild']
+    with stage('loans'):
+        actions['loans'] = topup_loans(state, args, seed, frames, rebuilt)
+
+    state.update({'seed': seed, 'pool_size': args.pool_size,
+                  'targets': {'books': args.books, 'students': args.students, 'loans': args.loans}})
+    manifest.save(state, manifest.MANIFEST_FN)
+    rows = {name: state['files'][kind]['rows'] for name, kind in (('books', 'book'), ('students', 'student'),
+                                                                    ('loans', 'loan'))}
+    return {'seed': seed, 'rows': rows, 'actions': actions}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not (args.profile or args.profile_dump):
+        run(args)
+        return
+
+    start_profile(trace_memory=args.profile and not args.profile_no_memory)
+    profiler = cProfile.Profile() if args.profile_dump else None
+    started = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        result = run(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile_dump)
+    if args.profile:
+        extra = {'total_seconds': round(time.perf_counter() - started, 4), 'workers': args.workers,
+                 'targets': {'books': args.books, 'students': args.students, 'loans': args.loans}}
+        if result:
+            extra.update(result)
+        if args.profile_dump:
+            extra['pstats'] = args.profile_dump
+        emit_profile(extra)
 
 
 if __name__ == '__main__':
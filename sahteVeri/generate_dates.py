@@ -3,29 +3,50 @@
 
 Kullanım örneği:
 python3 generate_dates.py --start 11/10/2025 --end 12/01/2026 --count 120 --out rastgele_tarihler.xlsx
+python3 generate_dates.py --count 10000000 --sort --weights school --seed 42 --out tarihler.csv
 
 Tarih formatı varsayılan olarak `%d/%m/%Y` (gg/aa/yyyy) kabul edilir.
+Tarihler date_engine ile NumPy dizileri olarak toplu üretilir. pandas
+kullanılmaz; NumPy ve openpyxl yalnızca argümanlar okunduktan sonra
+yüklenir, böylece `--help` anında döner. Çıkış uzantısı .csv/.txt ise
+dosya doğrudan yazılır (milyonlarca satır için önerilir), aksi halde xlsx.
 """
 import argparse
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
 from pathlib import Path
-import pandas as pd
+
+WEIGHT_CHOICES = ('uniform', 'weekday', 'school')
+TEXT_SUFFIXES = ('.csv', '.txt')
+SAMPLE_ROWS = 10
 
 
 def parse_date(s: str, fmt: str) -> datetime:
     return datetime.strptime(s, fmt)
 
 
-def generate_dates(start: datetime, end: datetime, count: int):
-    if end < start:
-        raise ValueError('End date must be after start date')
-    span = (end - start).days
-    dates = []
-    for _ in range(count):
-        d = start + timedelta(days=random.randint(0, span))
-        dates.append(d)
-    return dates
+def generate_dates(start: datetime, end: datetime, count: int, seed=None, sort=False, unique=False, weights='uniform'):
+    """datetime64[D] array of `count` dates between start and end."""
+    import numpy as np
+    import date_engine
+    return date_engine.random_dates(start, end, count, rng=np.random.default_rng(seed),
+                                    sort=sort, unique=unique, profile=weights)
+
+
+def write_text(path: Path, header: str, values):
+    # values: bytes array from date_engine.format_dates (or str objects)
+    import numpy as np
+    with open(path, 'wb') as f:
+        f.write(header.encode('utf-8') + b'\n')
+        if values.dtype.kind == 'S' and len(values) and (values != b'').all():
+            # Fixed-width bytes: append a newline column and write the buffer in one go
+            width = values.dtype.itemsize
+            lines = np.empty((len(values), width + 1), dtype=np.uint8)
+            lines[:, :width] = values.view(np.uint8).reshape(len(values), width)
+            lines[:, width] = ord('\n')
+            lines.tofile(f)
+        elif len(values):
+            text = (v.decode('utf-8') if isinstance(v, bytes) else v for v in values)
+            f.write(('\n'.join(text) + '\n').encode('utf-8'))
 
 
 def main():
@@ -33,8 +54,13 @@ def main():
     p.add_argument('--start', '-s', required=False, default='11/10/2025', help='Başlangıç tarihi (ör: 11/10/2025). Varsayılan: 11/10/2025')
     p.add_argument('--end', '-e', required=False, default='12/01/2026', help='Bitiş tarihi (ör: 12/01/2026). Varsayılan: 12/01/2026')
     p.add_argument('--count', '-c', type=int, required=False, default=120, help='Üretilecek tarih sayısı. Varsayılan: 120')
-    p.add_argument('--out', '-o', default='rastgele_tarihler.xlsx', help='Çıkış Excel dosyası')
+    p.add_argument('--out', '-o', default='rastgele_tarihler.xlsx', help='Çıkış dosyası (.xlsx, .csv ya da .txt)')
     p.add_argument('--format', '-f', default='%d/%m/%Y', help='Girdi ve çıktı tarih formatı (varsayılan %%d/%%m/%%Y)')
+    p.add_argument('--sort', action='store_true', help='Tarihleri artan sırada yaz')
+    p.add_argument('--unique', action='store_true', help='Her tarih en fazla bir kez (aralıktaki gün sayısını aşamaz)')
+    p.add_argument('--weights', '-w', choices=WEIGHT_CHOICES, default='uniform',
+                   help='Gün ağırlıkları: uniform, weekday (hafta sonu seyrek), school (hafta sonu ve tatiller seyrek). Varsayılan: uniform')
+    p.add_argument('--seed', type=int, default=None, help='Rastgelelik tohumu (aynı tohum aynı tarihleri verir)')
 
     args = p.parse_args()
 
@@ -49,14 +75,27 @@ def main():
         print('Count must be > 0')
         return
 
-    dates = generate_dates(start, end, args.count)
-    str_dates = [d.strftime(args.format) for d in dates]
-    df = pd.DataFrame({'Tarih': str_dates})
+    try:
+        dates = generate_dates(start, end, args.count, seed=args.seed, sort=args.sort,
+                               unique=args.unique, weights=args.weights)
+    except ValueError as ex:
+        print(ex)
+        return
+
+    import date_engine
+    str_dates = date_engine.format_dates(dates, args.format)
     outpath = Path(args.out)
-    df.to_excel(outpath, index=False, engine='openpyxl')
-    print(f'Saved {len(df)} rows -> {outpath}')
+    if outpath.suffix.lower() in TEXT_SUFFIXES:
+        write_text(outpath, 'Tarih', str_dates)
+    else:
+        from xlsx_stream import write_xlsx
+        rows = ((v.decode('utf-8') if isinstance(v, bytes) else v,) for v in str_dates)
+        write_xlsx(outpath, rows, columns=['Tarih'])
+    print(f'Saved {len(str_dates)} rows -> {outpath}')
     print('\nSample:')
-    print(df.head(10).to_string(index=False))
+    print('Tarih')
+    for v in str_dates[:SAMPLE_ROWS]:
+        print(v.decode('utf-8') if isinstance(v, bytes) else v)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""Yük testi: üretilen verileri API'ye yeniden oynatma
+
+generate_data.py'nin ürettiği çalışma kitaplarını yerelde çalışan
+Kutuphane.Api'ye gönderir ve uç nokta başına gecikme/hata ölçer:
+1. (isteğe bağlı) /api/auth/login ile oturum çerezi alınır,
+2. kitap ve öğrenci listeleri /api/admin/upload-excel ile içe aktarılır
+   (`--upload-loans` ile ödünç listesi de),
+3. /api/books ile kitap kimlikleri (Guid) alınır, ödünç satırları başlık +
+   yazar üzerinden eşleştirilir,
+4. ödünç satırları tarih sırasıyla /api/books/{id}/borrow ve
+   /api/books/{id}/return olaylarına çevrilip asyncio ile oynatılır.
+
+Eşzamanlı istek sayısı (`--concurrency`), saniyedeki istek hızı (`--rate`)
+ve bağlantı havuzu boyutu (`--connections`) ayarlanabilir. Bir iade olayı,
+aynı kaydın ödünç olayı tamamlanmadan gönderilmez. Sonuç uç nokta başına
+istek sayısı, hata oranı ve p50/p95/p99 gecikmesiyle JSON rapor olarak yazılır.
+
+aiohttp gerektirir (requirements.txt).
+
+Kullanım:
+python3 load_replay.py --base-url http://localhost:5208 --concurrency 32 --rate 200
+python3 load_replay.py --skip-upload --returns all --limit 20000 --report yuk.json
+python3 load_replay.py --dry-run
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from generate_data import (
+    BOOKS_FN, LOANS_FN, STUDENTS_FN, attach_master_fields, build_plans, load_df, plan_column,
+)
+from text_norm import fold_text
+
+DEFAULT_BASE_URL = 'http://localhost:5208'  # Program.cs UseUrls
+DEFAULT_LOAN_DAYS = 14
+DEFAULT_PERSONEL = 'yuk-testi'
+RETURNED_STATUSES = ('teslim edildi', 'gecikmeli', 'iade')
+
+# Loan roles the replay needs; missing ones are added as helper columns and
+# filled from the book/student sheets by attach_master_fields
+REPLAY_ROLES = {
+    'title': '_replay_title',
+    'author': '_replay_author',
+    'first_name': '_replay_first_name',
+    'last_name': '_replay_last_name',
+}
+
+
+def book_match_key(title, author):
+    return f"{fold_text(title)}|{fold_text(author)}"
+
+
+def role_series(df, plan, role):
+    col = plan_column(plan, role)
+    return df[col] if col is not None else pd.Series([None] * len(df), index=df.index, dtype=object)
+
+
+def build_events(books_df, students_df, loans_df, returns='status', loan_days=DEFAULT_LOAN_DAYS, limit=None):
+    """Turn loan rows into ordered borrow/return events.
+
+    Returns (loans, events): `loans` has title/author/borrower/days per loan,
+    `events` is a list of (kind, loan index) sorted by date then row order.
+    """
+    plans = build_plans(books_df, students_df, loans_df)
+    plan = plans['loan']
+    roles = dict(plan['roles'])
+    frame = loans_df.reset_index(drop=True).copy()
+    for role, col in REPLAY_ROLES.items():
+        if plan_column(plan, role) is None:
+            frame[col] = None
+            roles[col] = role
+    plans['loan'] = dict(plan, roles=roles)
+    plan = plans['loan']
+    frame = attach_master_fields(frame, books_df, students_df, plans)
+    if limit is not None:
+        frame = frame.iloc[:limit]
+
+    full_name = role_series(frame, plan, 'full_name')
+    composed = (role_series(frame, plan, 'first_name').fillna('').astype(str) + ' '
+                + role_series(frame, plan, 'last_name').fillna('').astype(str)).str.strip()
+    borrower = full_name.where(full_name.notna(), composed).fillna('').astype(str).str.strip()
+
+    issue = pd.to_datetime(role_series(frame, plan, 'issue_date'), errors='coerce', dayfirst=True)
+    due = pd.to_datetime(role_series(frame, plan, 'return_date'), errors='coerce', dayfirst=True)
+    days = (due - issue).dt.days
+    days = days.where(days > 0, loan_days).fillna(loan_days).astype(int)
+
+    loans = pd.DataFrame({
+        'title': role_series(frame, plan, 'title').to_numpy(),
+        'author': role_series(frame, plan, 'author').to_numpy(),
+        'borrower': borrower.to_numpy(),
+        'days': days.to_numpy(),
+    })
+
+    if returns == 'all':
+        returned = np.ones(len(frame), dtype=bool)
+    elif returns == 'status' and plan_column(plan, 'status') is not None:
+        status = role_series(frame, plan, 'status').map(fold_text)
+        returned = (status.isin(RETURNED_STATUSES) & due.notna()).to_numpy()
+    else:
+        returned = np.zeros(len(frame), dtype=bool)
+
+    # order: borrow at the issue day, return at the return day; rows without dates keep file order
+    issue_day = issue.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    issue_day[issue.isna().to_numpy()] = 0
+    return_day = due.to_numpy(dtype='datetime64[D]').astype(np.int64)
+    return_day[due.isna().to_numpy()] = 0
+    return_day = np.maximum(return_day, issue_day)
+    index = np.arange(len(frame))
+    kinds = np.r_[np.zeros(len(frame), dtype=np.int8), np.ones(int(returned.sum()), dtype=np.int8)]
+    event_days = np.r_[issue_day, return_day[returned]]
+    event_loans = np.r_[index, index[returned]]
+    order = np.lexsort((kinds, event_loans, event_days))
+    events = [('borrow' if kinds[i] == 0 else 'return', int(event_loans[i])) for i in order]
+    return loans, events
+
+
+class Stats:
+    """Per-endpoint latencies (ms), error counts and status codes."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.messages = defaultdict(lambda: defaultdict(int))
+        self.windows = {}
+
+    def record(self, endpoint, seconds, status, message=None):
+        now = time.perf_counter()
+        first, _ = self.windows.get(endpoint, (now - seconds, now))
+        self.windows[endpoint] = (first, now)
+        self.latencies[endpoint].append(seconds * 1000.0)
+        self.statuses[endpoint][str(status)] += 1
+        if status is None or status >= 400:
+            self.errors[endpoint] += 1
+            if message:
+                self.messages[endpoint][message[:200]] += 1
+
+    def summary(self):
+        result = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            lat = np.array(values)
+            first, last = self.windows[endpoint]
+            p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+            errors = self.errors[endpoint]
+            result[endpoint] = {
+                'requests': len(lat),
+                'errors': errors,
+                'error_rate': round(errors / len(lat), 4),
+                'p50_ms': round(float(p50), 2),
+                'p95_ms': round(float(p95), 2),
+                'p99_ms': round(float(p99), 2),
+                'max_ms': round(float(lat.max()), 2),
+                'mean_ms': round(float(lat.mean()), 2),
+                # throughput over the span from first request start to last response
+                'rps': round(len(lat) / (last - first), 2) if len(lat) > 1 and last > first else None,
+                'statuses': dict(self.statuses[endpoint]),
+                'top_errors': dict(sorted(self.messages[endpoint].items(), key=lambda kv: -kv[1])[:5]),
+            }
+        return result
+
+
+class RateLimiter:
+    """Spaces request starts 1/rate seconds apart; rate <= 0 means unlimited."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self.next_at = None
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.perf_counter()
+            if self.next_at is None or self.next_at < now:
+                self.next_at = now
+            delay = self.next_at - now
+            self.next_at += self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def request(session, stats, limiter, endpoint, method, url, **kwargs):
+    """One timed request; returns (status, parsed JSON or None)."""
+    await limiter.wait()
+    started = time.perf_counter()
+    try:
+        async with session.request(method, url, **kwargs) as resp:
+            body = await resp.read()
+            status = resp.status
+    except Exception as ex:
+        stats.record(endpoint, time.perf_counter() - started, None, type(ex).__name__)
+        return None, None
+    elapsed = time.perf_counter() - started
+    data = None
+    if body:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+    message = data.get('message') if isinstance(data, dict) else None
+    stats.record(endpoint, elapsed, status, message or (f'HTTP {status}' if status >= 400 else None))
+    return status, data
+
+
+async def upload(session, stats, limiter, path, table_type):
+    import aiohttp
+    form = aiohttp.FormData()
+    form.add_field('tableType', table_type)
+    form.add_field('file', Path(path).read_bytes(), filename=Path(path).name,
+                   content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    status, data = await request(session, stats, limiter, f'upload-excel:{table_type}', 'POST',
+                                 '/api/admin/upload-excel', data=form)
+    print(f"upload {table_type}: HTTP {status} {json.dumps(data, ensure_ascii=False) if data else ''}", file=sys.stderr)
+
+
+async def fetch_book_ids(session, stats, limiter):
+    status, data = await request(session, stats, limiter, 'books:list', 'GET', '/api/books')
+    if status != 200 or not isinstance(data, list):
+        raise RuntimeError(f'/api/books failed: HTTP {status}')
+    ids = {}
+    for book in data:
+        ids.setdefault(book_match_key(book.get('title'), book.get('author')), book.get('id'))
+        ids.setdefault(book_match_key(book.get('title'), ''), book.get('id'))
+    return ids
+
+
+async def replay(session, stats, limiter, loans, events, book_ids, concurrency, personel):
+    borrowed = {}
+    skipped = defaultdict(int)
+    semaphore = asyncio.Semaphore(concurrency)
+    guids = [book_ids.get(book_match_key(t, a)) or book_ids.get(book_match_key(t, ''))
+             for t, a in zip(loans['title'], loans['author'])]
+
+    async def run(kind, loan):
+        guid, borrower = guids[loan], loans['borrower'].iat[loan]
+        if kind == 'borrow':
+            done = borrowed[loan]
+            try:
+                if guid is None or not borrower:
+                    skipped['unmatched'] += 1
+                    done.set_result(False)
+                    return
+                async with semaphore:
+                    status, _ = await request(session, stats, limiter, 'books:borrow', 'POST', f'/api/books/{guid}/borrow',
+                                              json={'borrower': borrower, 'days': int(loans['days'].iat[loan]),
+                                                    'personelName': personel})
+                done.set_result(status == 200)
+            except BaseException:
+                if not done.done():
+                    done.set_result(False)
+                raise
+        else:
+            if not await borrowed[loan]:
+                skipped['return_without_borrow'] += 1
+                return
+            async with semaphore:
+                await request(session, stats, limiter, 'books:return', 'POST', f'/api/books/{guid}/return',
+                              json={'borrower': borrower, 'personelName': personel})
+
+    loop = asyncio.get_running_loop()
+    tasks = set()
+    for kind, loan in events:
+        if kind == 'borrow':
+            borrowed[loan] = loop.create_future()
+        # bounded backlog of scheduled tasks keeps memory flat for millions of events
+        while len(tasks) >= concurrency * 4:
+            _, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        tasks.add(asyncio.create_task(run(kind, loan)))
+    if tasks:
+        await asyncio.wait(tasks)
+    return dict(skipped)
+
+
+async def run_replay(args, loans, events):
+    import aiohttp
+    stats = Stats()
+    limiter = RateLimiter(args.rate)
+    connector = aiohttp.TCPConnector(limit=args.connections, keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(base_url=args.base_url, connector=connector, timeout=timeout) as session:
+        if args.username:
+            await request(session, stats, limiter, 'auth:login', 'POST', '/api/auth/login',
+                          json={'username': args.username, 'password': args.password or ''})
+        if not args.skip_upload:
+            await upload(session, stats, limiter, args.books_file, 'books')
+            await upload(session, stats, limiter, args.students_file, 'students')
+            if args.upload_loans:
+                await upload(session, stats, limiter, args.loans_file, 'loans')
+        book_ids = await fetch_book_ids(session, stats, limiter)
+        started = time.perf_counter()
+        skipped = await replay(session, stats, limiter, loans, events, book_ids, args.concurrency, args.personel)
+        elapsed = time.perf_counter() - started
+    return stats, skipped, elapsed
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Kutuphane.Api yük testi (ödünç olaylarını yeniden oynatır)')
+    p.add_argument('--base-url', default=DEFAULT_BASE_URL, help=f'API adresi. Varsayılan: {DEFAULT_BASE_URL}')
+    p.add_argument('--books-file', default=BOOKS_FN, help=f'Kitap listesi. Varsayılan: {BOOKS_FN}')
+    p.add_argument('--students-file', default=STUDENTS_FN, help=f'Öğrenci listesi. Varsayılan: {STUDENTS_FN}')
+    p.add_argument('--loans-file', default=LOANS_FN, help=f'Ödünç listesi. Varsayılan: {LOANS_FN}')
+    p.add_argument('--concurrency', '-c', type=int, default=16, help='Aynı anda en fazla istek. Varsayılan: 16')
+    p.add_argument('--rate', '-r', type=float, default=0, help='Saniyedeki en fazla istek (0 = sınırsız). Varsayılan: 0')
+    p.add_argument('--connections', type=int, default=32, help='Bağlantı havuzu boyutu (keep-alive). Varsayılan: 32')
+    p.add_argument('--timeout', type=float, default=30, help='İstek zaman aşımı (sn). Varsayılan: 30')
+    p.add_argument('--returns', choices=['status', 'all', 'none'], default='status',
+                   help='İade olayları: status (Durum sütununa göre), all (her ödünç iade edilir), none. Varsayılan: status')
+    p.add_argument('--loan-days', type=int, default=DEFAULT_LOAN_DAYS,
+                   help=f'Teslim tarihi yoksa ödünç süresi (gün). Varsayılan: {DEFAULT_LOAN_DAYS}')
+    p.add_argument('--limit', type=int, default=None, help='Yalnızca ilk N ödünç satırını oynat')
+    p.add_argument('--personel', default=DEFAULT_PERSONEL, help=f'İsteklerdeki personel adı. Varsayılan: {DEFAULT_PERSONEL}')
+    p.add_argument('--username', default=None, help='Giriş yapılacak kullanıcı (verilmezse giriş yapılmaz)')
+    p.add_argument('--password', default=None, help='Kullanıcı şifresi')
+    p.add_argument('--skip-upload', action='store_true', help='Excel içe aktarmayı atla (veriler zaten yüklü)')
+    p.add_argument('--upload-loans', action='store_true', help='Ödünç listesini de içe aktar (oynatılan ödünçlerle çakışabilir)')
+    p.add_argument('--report', '-o', default='-', help='JSON rapor dosyası (- = stdout). Varsayılan: -')
+    p.add_argument('--dry-run', action='store_true', help='İstek göndermeden olay planını özetle')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    books_df = load_df(args.books_file)
+    students_df = load_df(args.students_file)
+    loans_df = load_df(args.loans_file)
+    loans, events = build_events(books_df, students_df, loans_df, returns=args.returns,
+                                 loan_days=args.loan_days, limit=args.limit)
+    plan = {
+        'loans': len(loans),
+        'borrow_events': sum(1 for kind, _ in events if kind == 'borrow'),
+        'return_events': sum(1 for kind, _ in events if kind == 'return'),
+        'without_borrower': int((loans['borrower'] == '').sum()),
+        'without_title': int(loans['title'].isna().sum()),
+    }
+    if args.dry_run:
+        print(json.dumps({'plan': plan}, ensure_ascii=False, indent=2))
+        return 0
+
+    started_at = datetime.now().isoformat(timespec='seconds')
+    try:
+        stats, skipped, elapsed = asyncio.run(run_replay(args, loans, events))
+    except RuntimeError as ex:
+        print(f"Hata: {ex} ({args.base_url} çalışıyor mu?)", file=sys.stderr)
+        return 1
+    endpoints = stats.summary()
+    report = {
+        'base_url': args.base_url,
+        'started_at': started_at,
+        'replay_seconds': round(elapsed, 3),
+        'concurrency': args.concurrency,
+        'rate': args.rate or None,
+        'connections': args.connections,
+        'plan': plan,
+        'skipped': skipped,
+        'endpoints': endpoints,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.report == '-':
+        print(text)
+    else:
+        Path(args.report).write_text(text, encoding='utf-8')
+
+    for name, e in endpoints.items():
+        print(f"{name:22} {e['requests']:8} istek  hata %{e['error_rate'] * 100:5.1f}  "
+              f"p50 {e['p50_ms']:8.1f} ms  p95 {e['p95_ms']:8.1f} ms  p99 {e['p99_ms']:8.1f} ms  {e['rps'] or 0:8.1f} istek/sn",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
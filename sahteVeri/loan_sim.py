@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Stok farkındalıklı ödünç simülasyonu
+
+Ödünç kayıtlarını bağımsız rastgele seçim yerine zaman içinde ilerleyen
+ayrık olaylı (discrete-event) bir simülasyonla üretir. Her kitabın eldeki
+kopya sayısı (backend'deki Book.quantity) ve her öğrencinin aktif ödünç
+sayısı (web/src/utils/borrowLimit.ts, varsayılan en fazla 5) izlenir:
+- kopyası kalmayan kitap verilmez,
+- limitine ulaşmış öğrenciye kitap verilmez,
+- öğrenci aynı kitabı iade etmeden ikinci kez alamaz.
+
+İadeler bir öncelik kuyruğunda (heapq) iade gününe göre bekler; her ödünç
+denemesinden önce o güne kadar iade edilenler kuyruktan alınır. Olay başına
+maliyet O(log n)'dir. Rastgele seçimler bloklar halinde NumPy ile önceden
+çekilir, döngüde yalnızca tam sayı işlemleri kalır.
+
+Kullanım:
+    import loan_sim
+    result = loan_sim.simulate(quantities, n_students, arrivals, rng)
+"""
+import heapq
+
+import numpy as np
+
+DEFAULT_MAX_BORROW_LIMIT = 5   # SystemSettingsController.DefaultMaxBorrowLimit
+DEFAULT_LOAN_DAYS = 14
+DEFAULT_LATE_RATE = 0.15
+MAX_LATE_DAYS = 30
+MAX_TRIES = 8
+BLOCK_SIZE = 65_536
+LOAN_BITS = 40
+LOAN_MASK = (1 << LOAN_BITS) - 1
+
+STATUS_ACTIVE = 'active'
+STATUS_RETURNED = 'returned'
+STATUS_LATE = 'late'
+
+
+def simulate(quantities, n_students: int, arrivals, rng, end=None,
+             max_borrow_limit=DEFAULT_MAX_BORROW_LIMIT, loan_days=DEFAULT_LOAN_DAYS,
+             late_rate=DEFAULT_LATE_RATE, max_tries=MAX_TRIES, pick_books=None, pick_students=None):
+    """Replay sorted borrow attempts (datetime64[D]) against book stock and student limits.
+
+    Returns a dict of per-loan arrays (book/student indexes, issue/due/return
+    dates, status) plus simulation stats. Loans still out at `end` (default:
+    last arrival) have no return date. pick_books(size, rng, days) and
+    pick_students(size, rng) replace the uniform draws (workload.py); retries
+    after a rejected draw get days=None.
+    """
+    arrivals = np.asarray(arrivals).astype('datetime64[D]')
+    n_books = len(quantities)
+    if n_books == 0 or n_students <= 0:
+        raise ValueError('Simulation needs at least one book and one student')
+    # days relative to the first attempt keep heap keys non-negative
+    origin = int(arrivals[0].astype(np.int64)) if len(arrivals) else 0
+    days = arrivals.astype(np.int64) - origin
+    if end is None:
+        end_day = int(days[-1]) if len(days) else 0
+    else:
+        end_day = int(np.datetime64(end, 'D').astype(np.int64)) - origin
+
+    if pick_books is None:
+        def pick_books(size, rng, days=None):
+            return rng.integers(0, n_books, size=size)
+    if pick_students is None:
+        def pick_students(size, rng):
+            return rng.integers(0, n_students, size=size)
+
+    available = np.asarray(quantities, dtype=np.int64).clip(min=0).tolist()
+    active = [0] * n_students
+    out_pairs = set()
+    # heap of return_day << LOAN_BITS | loan index: plain ints compare faster than tuples
+    returns = []
+    heappush, heappop = heapq.heappush, heapq.heappop
+
+    loan_book, loan_student, loan_issue, loan_return, loan_late = [], [], [], [], []
+    n_returns = no_copy = at_limit = out_now = peak_active = 0
+    retry_books, retry_students, retry_pos = [], [], 0
+
+    for block_start in range(0, len(days), BLOCK_SIZE):
+        block_days = days[block_start:block_start + BLOCK_SIZE].tolist()
+        size = len(block_days)
+        first_books = pick_books(size, rng, arrivals[block_start:block_start + size]).tolist()
+        first_students = pick_students(size, rng).tolist()
+        late = (rng.random(size) < late_rate).tolist()
+        durations = np.where(late, loan_days + rng.integers(1, MAX_LATE_DAYS + 1, size=size),
+                             rng.integers(1, loan_days + 1, size=size)).tolist()
+
+        for i, day in enumerate(block_days):
+            while returns and returns[0] >> LOAN_BITS <= day:
+                loan = heappop(returns) & LOAN_MASK
+                b, s = loan_book[loan], loan_student[loan]
+                available[b] += 1
+                active[s] -= 1
+                out_pairs.discard(s * n_books + b)
+                out_now -= 1
+                n_returns += 1
+
+            b, s = first_books[i], first_students[i]
+            for t in range(max_tries):
+                if t:
+                    # rejected draws are rare; redraw from a shared retry buffer
+                    if retry_pos == len(retry_books):
+                        retry_books = pick_books(BLOCK_SIZE, rng).tolist()
+                        retry_students = pick_students(BLOCK_SIZE, rng).tolist()
+                        retry_pos = 0
+                    b, s = retry_books[retry_pos], retry_students[retry_pos]
+                    retry_pos += 1
+                if available[b] <= 0:
+                    no_copy += 1
+                    continue
+                pair = s * n_books + b
+                if active[s] >= max_borrow_limit or pair in out_pairs:
+                    at_limit += 1
+                    continue
+                break
+            else:
+                continue
+
+            return_day = day + durations[i]
+            available[b] -= 1
+            active[s] += 1
+            out_pairs.add(pair)
+            heappush(returns, return_day << LOAN_BITS | len(loan_book))
+            out_now += 1
+            if out_now > peak_active:
+                peak_active = out_now
+
+            loan_book.append(b)
+            loan_student.append(s)
+            loan_issue.append(day)
+            loan_return.append(return_day)
+            loan_late.append(late[i])
+
+    issue = np.array(loan_issue, dtype=np.int64) + origin
+    returned_on = np.array(loan_return, dtype=np.int64) + origin
+    due = issue + loan_days
+    still_out = returned_on > end_day + origin
+    # a loan still out is late only once its due date has passed; the drawn flag only applies to returned ones
+    is_late = np.where(still_out, due < end_day + origin, np.array(loan_late, dtype=bool))
+    status = np.where(still_out & ~is_late, STATUS_ACTIVE, np.where(is_late, STATUS_LATE, STATUS_RETURNED))
+    stats = {'attempts': len(days), 'loans': len(issue), 'returns': n_returns,
+             'no_copy': no_copy, 'limit': at_limit, 'peak_active': peak_active}
+
+    return_date = returned_on.astype('datetime64[D]')
+    return_date[still_out] = np.datetime64('NaT')
+    return {
+        'book': np.array(loan_book, dtype=np.int64),
+        'student': np.array(loan_student, dtype=np.int64),
+        'issue_date': issue.astype('datetime64[D]'),
+        'due_date': due.astype('datetime64[D]'),
+        'return_date': return_date,
+        'status': status,
+        'stats': stats,
+    }
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Üretim manifesti
+
+generate_data.py --incremental her çalıştırmanın sonunda çalışma kitaplarının
+durumunu bir JSON dosyasına yazar: dosya başına SHA-256 özeti, boyut, satır
+sayısı, sütun planı, en büyük kimlik ve hedef; ayrıca tohum ve havuz boyutu.
+Sonraki çalıştırma bir dosyanın özeti tutuyorsa onu okumadan atlayabilir ya
+da yalnızca eksik satırları ekleyebilir.
+
+Kullanım:
+    import manifest
+    state = manifest.load()
+    entry = state['files'].get('book')
+    if entry and manifest.unchanged(entry, 'kitap listesi.xlsx'):
+        ...
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+MANIFEST_FN = 'sahteveri_manifest.json'
+VERSION = 1
+HASH_CHUNK = 1 << 20
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_state(path):
+    """{'path', 'size', 'mtime', 'sha256'} of a file, or None when it does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    st = path.stat()
+    return {'path': str(path), 'size': st.st_size, 'mtime': st.st_mtime, 'sha256': file_sha256(path)}
+
+
+def empty():
+    return {'version': VERSION, 'seed': None, 'files': {}}
+
+
+def load(path=MANIFEST_FN):
+    # a missing, unreadable or older manifest means "nothing is known": every stage runs
+    try:
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return empty()
+    if not isinstance(state, dict) or state.get('version') != VERSION:
+        return empty()
+    state.setdefault('files', {})
+    return state
+
+
+def save(state, path=MANIFEST_FN):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+def unchanged(entry, path):
+    """True when the file still has the size and checksum recorded in `entry`."""
+    path = Path(path)
+    if not path.exists() or path.stat().st_size != entry.get('size'):
+        return False
+    return file_sha256(path) == entry.get('sha256')
+
+
+def record(state, kind, path, rows, plan, max_id, **extra):
+    # called after the workbook is written, so the checksum matches what the next run will see
+    entry = file_state(path) or {'path': str(path)}
+    entry.update({'rows': int(rows), 'columns': list(plan['roles']), 'plan': plan, 'max_id': max_id})
+    entry.update(extra)
+    state['files'][kind] = entry
+    return entry
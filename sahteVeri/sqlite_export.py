@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""SQLite'a doğrudan toplu aktarım
+
+Üretilen (ya da mevcut) kitap, öğrenci ve ödünç tablolarını Excel'e ve
+/api/admin/upload-excel'e uğramadan, Kutuphane.Infrastructure.Database'in
+kullandığı SQLite şemasında bir veritabanı dosyasına yazar. Şema
+KutuphaneDbContext + varlık sınıflarının EnsureCreated ile ürettiği
+tablolardır (Books, Loans, Users, BookStats, StudentStats, ActivityLogs,
+LoanHistory); DatabaseSeeder'ın eklediği Loans.Personel sütunu ve admin
+kullanıcısı da yazılır, böylece backend dosyayı olduğu gibi açar.
+
+Satırlar DatabaseAdminController'daki Excel içe aktarımıyla aynı kurallarla
+çevrilir: başlık + yazar tekrarı olan kitaplar ve numarası tekrar eden
+öğrenciler atlanır, kategori boşsa "Genel", adet okunamazsa 1 olur.
+Her ödünç LoanHistory'ye yazılır; teslim edilmemiş olanlar ayrıca Loans'a
+eklenir ve kitabın Quantity değerinden düşülür.
+
+Yükleme journal/fsync kapalı, tek bağlantıda tablo başına tek işlemde
+`executemany` partileriyle yapılır; ikincil indeksler veri yüklendikten
+sonra kurulur. Dosya önce geçici adla yazılıp sonunda yerine taşınır.
+
+Kullanım:
+python3 sqlite_export.py --out kutuphane.db
+python3 sqlite_export.py --out kutuphane.db --books eski/"kitap listesi.xlsx" --students eski/ogrenci_listesi.xlsx --loans eski/"odunc listesi.xlsx"
+python3 generate_data.py --books 1000000 --students 100000 --loans 1000000 --sqlite kutuphane.db --no-xlsx
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from generate_data import (BOOKS_FN, LOANS_FN, STUDENTS_FN, build_plans, load_df, normalize_id_keys, plan_column,
+                           plan_columns, plan_id_column)
+
+BATCH_ROWS = 100_000
+CACHE_MB = 256
+DEFAULT_CATEGORY = 'Genel'
+DEFAULT_STAFF = 'Bilinmiyor'  # DatabaseBookRepository's value for loans without personel
+DEFAULT_LOAN_DAYS = 14
+RETURNED_STATUS = ('Teslim edildi',)
+LATE_STATUS = ('Gecikmeli',)
+GUID_STREAM = 5
+# DatabaseSeeder.SeedAsync skips seeding once Users has rows, so the admin is written here
+ADMIN_USER = {'Id': 1, 'Username': 'admin', 'Password': 'admin', 'Role': 'ADMIN',
+              'Name': 'Sistem', 'Surname': 'Yöneticisi'}
+
+# Tables as EF Core's EnsureCreated emits them for KutuphaneDbContext (SQLite provider)
+SCHEMA = [
+    '''CREATE TABLE "Books" (
+    "Id" TEXT NOT NULL CONSTRAINT "PK_Books" PRIMARY KEY,
+    "Title" TEXT NOT NULL,
+    "Author" TEXT NOT NULL,
+    "Category" TEXT NOT NULL,
+    "Quantity" INTEGER NOT NULL,
+    "TotalQuantity" INTEGER NOT NULL,
+    "HealthyCount" INTEGER NOT NULL,
+    "DamagedCount" INTEGER NOT NULL,
+    "LostCount" INTEGER NOT NULL,
+    "LastPersonel" TEXT NULL,
+    "Shelf" TEXT NULL,
+    "Publisher" TEXT NULL,
+    "Summary" TEXT NULL,
+    "BookNumber" INTEGER NULL,
+    "Year" INTEGER NULL,
+    "PageCount" INTEGER NULL
+)''',
+    '''CREATE TABLE "Loans" (
+    "Id" INTEGER NOT NULL CONSTRAINT "PK_Loans" PRIMARY KEY AUTOINCREMENT,
+    "BookId" TEXT NOT NULL,
+    "Borrower" TEXT NOT NULL,
+    "DueDate" TEXT NOT NULL,
+    "Staff" TEXT NOT NULL,
+    "Personel" TEXT NOT NULL DEFAULT '',
+    CONSTRAINT "FK_Loans_Books_BookId" FOREIGN KEY ("BookId") REFERENCES "Books" ("Id") ON DELETE CASCADE
+)''',
+    '''CREATE TABLE "Users" (
+    "Id" INTEGER NOT NULL CONSTRAINT "PK_Users" PRIMARY KEY AUTOINCREMENT,
+    "Username" TEXT NULL,
+    "Password" TEXT NULL,
+    "Role" TEXT NOT NULL,
+    "Name" TEXT NULL,
+    "Surname" TEXT NULL,
+    "Class" INTEGER NULL,
+    "Branch" TEXT NULL,
+    "StudentNumber" INTEGER NULL,
+    "PenaltyPoints" INTEGER NOT NULL,
+    "Position" TEXT NULL,
+    "RecoveryCode" TEXT NULL,
+    "RecoveryCodeCreatedAt" TEXT NULL,
+    "RecoveryCodeUsed" INTEGER NOT NULL
+)''',
+    '''CREATE TABLE "BookStats" (
+    "Id" TEXT NOT NULL CONSTRAINT "PK_BookStats" PRIMARY KEY,
+    "Title" TEXT NOT NULL,
+    "Author" TEXT NOT NULL,
+    "Category" TEXT NOT NULL,
+    "Quantity" INTEGER NOT NULL,
+    "Borrowed" INTEGER NOT NULL,
+    "Returned" INTEGER NOT NULL,
+    "Late" INTEGER NOT NULL
+)''',
+    '''CREATE TABLE "StudentStats" (
+    "Id" INTEGER NOT NULL CONSTRAINT "PK_StudentStats" PRIMARY KEY AUTOINCREMENT,
+    "Name" TEXT NOT NULL,
+    "Surname" TEXT NOT NULL,
+    "Borrowed" INTEGER NOT NULL,
+    "Returned" INTEGER NOT NULL,
+    "Late" INTEGER NOT NULL
+)''',
+    '''CREATE TABLE "ActivityLogs" (
+    "Id" INTEGER NOT NULL CONSTRAINT "PK_ActivityLogs" PRIMARY KEY AUTOINCREMENT,
+    "Timestamp" TEXT NOT NULL,
+    "Username" TEXT NOT NULL,
+    "Action" TEXT NOT NULL,
+    "Details" TEXT NULL
+)''',
+    '''CREATE TABLE "LoanHistory" (
+    "Id" INTEGER NOT NULL CONSTRAINT "PK_LoanHistory" PRIMARY KEY AUTOINCREMENT,
+    "BookId" TEXT NOT NULL,
+    "BookTitle" TEXT NOT NULL,
+    "BookAuthor" TEXT NOT NULL,
+    "BookCategory" TEXT NULL,
+    "Borrower" TEXT NOT NULL,
+    "NormalizedBorrower" TEXT NOT NULL,
+    "StudentNumber" INTEGER NULL,
+    "BorrowedAt" TEXT NOT NULL,
+    "DueDate" TEXT NOT NULL,
+    "LoanDays" INTEGER NOT NULL,
+    "ReturnedAt" TEXT NULL,
+    "BorrowPersonel" TEXT NOT NULL,
+    "ReturnPersonel" TEXT NULL,
+    "WasLate" INTEGER NOT NULL,
+    "LateDays" INTEGER NOT NULL,
+    "DurationDays" INTEGER NULL,
+    "Status" TEXT NOT NULL DEFAULT 'ACTIVE'
+)''',
+]
+
+# Built after the load: one sorted index build is much cheaper than per-row index maintenance
+INDEXES = [
+    'CREATE INDEX "IX_Books_Author" ON "Books" ("Author")',
+    'CREATE INDEX "IX_Books_Category" ON "Books" ("Category")',
+    'CREATE INDEX "IX_Books_Title" ON "Books" ("Title")',
+    'CREATE INDEX "IX_Loans_BookId" ON "Loans" ("BookId")',
+    'CREATE INDEX "IX_Loans_Borrower" ON "Loans" ("Borrower")',
+    'CREATE INDEX "IX_Loans_DueDate" ON "Loans" ("DueDate")',
+    'CREATE INDEX "IX_Users_Role" ON "Users" ("Role")',
+    'CREATE UNIQUE INDEX "IX_Users_StudentNumber" ON "Users" ("StudentNumber")',
+    'CREATE UNIQUE INDEX "IX_Users_Username" ON "Users" ("Username")',
+    'CREATE INDEX "IX_BookStats_Title" ON "BookStats" ("Title")',
+    'CREATE INDEX "IX_StudentStats_Name_Surname" ON "StudentStats" ("Name", "Surname")',
+    'CREATE INDEX "IX_ActivityLogs_Action" ON "ActivityLogs" ("Action")',
+    'CREATE INDEX "IX_ActivityLogs_Timestamp" ON "ActivityLogs" ("Timestamp")',
+    'CREATE INDEX "IX_ActivityLogs_Username" ON "ActivityLogs" ("Username")',
+    'CREATE INDEX "IX_LoanHistory_BookId" ON "LoanHistory" ("BookId")',
+    'CREATE INDEX "IX_LoanHistory_NormalizedBorrower" ON "LoanHistory" ("NormalizedBorrower")',
+    'CREATE INDEX "IX_LoanHistory_Status" ON "LoanHistory" ("Status")',
+]
+
+# Bulk-load settings: the file is a fresh temp file, so a crash only loses that file
+LOAD_PRAGMAS = [
+    'PRAGMA journal_mode = OFF',
+    'PRAGMA synchronous = OFF',
+    'PRAGMA locking_mode = EXCLUSIVE',
+    'PRAGMA temp_store = MEMORY',
+    f'PRAGMA cache_size = -{CACHE_MB * 1024}',
+]
+
+
+def role_values(df, plan, *roles):
+    """Cells of the plan's columns for `roles`, first non-empty one per row (e.g. Yıl, then YayınYılı)."""
+    cols = [c for role in roles for c in plan_columns(plan, role) if c in df.columns]
+    if not cols:
+        return pd.Series([None] * len(df), dtype=object)
+    s = df[cols[0]].reset_index(drop=True)
+    for col in cols[1:]:
+        s = s.where(s.notna(), df[col].reset_index(drop=True))
+    return s
+
+
+def text_values(df, plan, *roles):
+    """Stripped text per row, None for missing or blank cells (object array)."""
+    s = role_values(df, plan, *roles)
+    text = s.astype(object).where(s.notna(), '').astype(str).str.strip()
+    out = text.to_numpy(dtype=object)
+    out[(text == '').to_numpy()] = None
+    return out
+
+
+def int_values(df, plan, *roles):
+    """Rounded integers per row as an object array with None where the cell is not a number."""
+    num = pd.to_numeric(role_values(df, plan, *roles), errors='coerce')
+    out = np.full(len(num), None, dtype=object)
+    ok = num.notna().to_numpy()
+    out[ok] = num[ok].round().astype('int64').tolist()
+    return out
+
+
+def day_text(days):
+    # EF Core stores DateTime as 'yyyy-MM-dd HH:mm:ss' text in SQLite; loans share few distinct days
+    days = np.asarray(days, dtype='datetime64[D]')
+    out = np.full(len(days), None, dtype=object)
+    ok = ~np.isnat(days)
+    unique, inverse = np.unique(days[ok], return_inverse=True)
+    text = np.char.add(np.datetime_as_string(unique, unit='D'), ' 00:00:00').astype(object)
+    out[ok] = text[inverse]
+    return out
+
+
+def guid_strings(n, seed=None):
+    """n random (version 4) GUIDs as EF Core writes them: upper-case 8-4-4-4-12 text."""
+    rng = np.random.default_rng(None if seed is None else [seed, GUID_STREAM])
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    hex_digits = np.frombuffer(b'0123456789ABCDEF', dtype=np.uint8)
+    nibbles = np.empty((n, 32), dtype=np.uint8)
+    nibbles[:, 0::2] = hex_digits[raw >> 4]
+    nibbles[:, 1::2] = hex_digits[raw & 0x0F]
+    text = np.full((n, 36), ord('-'), dtype=np.uint8)
+    for start, end, at in ((0, 8, 0), (8, 12, 9), (12, 16, 14), (16, 20, 19), (20, 32, 24)):
+        text[:, at:at + end - start] = nibbles[:, start:end]
+    return np.char.decode(text.view('S36').ravel(), 'ascii').astype(object)
+
+
+def book_rows(books, plan, seed=None):
+    """Books table columns plus the row -> kept-book code used to resolve loans.
+
+    Like the Excel import, rows without title or author are skipped and a
+    repeated title + author pair keeps its first row.
+    """
+    title = text_values(books, plan, 'title')
+    author = text_values(books, plan, 'author')
+    valid = pd.notna(title) & pd.notna(author)
+    codes = np.full(len(books), -1, dtype=np.int64)
+    codes[valid], _ = pd.MultiIndex.from_arrays([title[valid], author[valid]]).factorize()
+    first = np.flatnonzero(valid)[np.unique(codes[valid], return_index=True)[1]]
+
+    category = text_values(books, plan, 'category')[first]
+    category[pd.isna(category)] = DEFAULT_CATEGORY
+    quantity = int_values(books, plan, 'quantity')[first]
+    quantity[pd.isna(quantity)] = 1
+    columns = {
+        'Id': guid_strings(len(first), seed),
+        'Title': title[first],
+        'Author': author[first],
+        'Category': category,
+        'TotalQuantity': quantity.astype(np.int64),
+        'Shelf': text_values(books, plan, 'shelf')[first],
+        'Publisher': text_values(books, plan, 'publisher')[first],
+        'Summary': text_values(books, plan, 'summary')[first],
+        'BookNumber': int_values(books, plan, 'ref', 'id')[first],
+        'Year': int_values(books, plan, 'year')[first],
+        'PageCount': int_values(books, plan, 'pages')[first],
+    }
+    return columns, codes
+
+
+def student_rows(students, plan):
+    """Users rows for students (Role 'Student'); rows without name, surname or integer number are skipped."""
+    name = text_values(students, plan, 'first_name')
+    surname = text_values(students, plan, 'last_name')
+    number = int_values(students, plan, 'student_number', 'id')
+    keep = pd.notna(name) & pd.notna(surname) & pd.notna(number)
+    # StudentNumber is unique: the first row with a number wins, like the import
+    keep[keep] = ~pd.Series(number[keep]).duplicated().to_numpy()
+    return {
+        'Name': name[keep],
+        'Surname': surname[keep],
+        'Class': int_values(students, plan, 'class')[keep],
+        'Branch': text_values(students, plan, 'branch')[keep],
+        'StudentNumber': number[keep],
+    }, keep
+
+
+def borrower_names(first, last):
+    both = pd.notna(first) & pd.notna(last)
+    out = np.full(len(first), None, dtype=object)
+    out[both] = (pd.Series(first[both], dtype=object) + ' ' + pd.Series(last[both], dtype=object)).tolist()
+    return out
+
+
+def lookup_positions(keys, master_keys):
+    """Position of each key in master_keys (first occurrence), -1 when absent."""
+    keys, master_keys = pd.Series(keys).reset_index(drop=True), pd.Series(master_keys).reset_index(drop=True)
+    if keys.dtype != master_keys.dtype:
+        keys = keys.astype(str).where(keys.notna())
+        master_keys = master_keys.astype(str).where(master_keys.notna())
+    first = (master_keys.notna() & ~master_keys.duplicated()).to_numpy()
+    positions = pd.Series(np.flatnonzero(first), index=master_keys[first].to_numpy())
+    return keys.map(positions).fillna(-1).to_numpy(dtype=np.int64)
+
+
+def column_days(df, col):
+    if col is None:
+        return np.full(len(df), np.datetime64('NaT'), dtype='datetime64[D]')
+    return pd.to_datetime(df[col], errors='coerce').to_numpy().astype('datetime64[D]')
+
+
+def loan_rows(loans, plans, books, book_columns, book_codes, students, student_keep, loan_days=DEFAULT_LOAN_DAYS):
+    """Resolve loans to (book code, borrower, student number, dates, status) like the Excel import.
+
+    Id layouts (KitapID/OgrenciID) join on ids; otherwise books are found by
+    title + author and students by "Ad Soyad". Loans whose book, borrower or
+    due date cannot be resolved are skipped.
+    """
+    loan_plan, book_plan, student_plan = plans['loan'], plans['book'], plans['student']
+    n = len(loans)
+
+    book_id_col = plan_column(loan_plan, 'book_id')
+    if book_id_col is not None and plan_id_column(book_plan) in books.columns:
+        pos = lookup_positions(normalize_id_keys(loans[book_id_col]), normalize_id_keys(books[plan_id_column(book_plan)]))
+        book_code = np.where(pos >= 0, book_codes[np.maximum(pos, 0)], -1)
+    else:
+        # kept books are unique by title + author, so their index answers the lookup directly
+        kept = pd.MultiIndex.from_arrays([book_columns['Title'], book_columns['Author']])
+        book_code = kept.get_indexer(pd.MultiIndex.from_arrays([
+            text_values(loans, loan_plan, 'title'), text_values(loans, loan_plan, 'author')]))
+
+    student_names = borrower_names(text_values(students, student_plan, 'first_name'),
+                                   text_values(students, student_plan, 'last_name'))
+    number = int_values(students, student_plan, 'student_number', 'id')
+    number[~student_keep] = None
+    student_id_col = plan_column(loan_plan, 'student_id')
+    if student_id_col is not None and plan_id_column(student_plan) in students.columns:
+        pos = lookup_positions(normalize_id_keys(loans[student_id_col]),
+                               normalize_id_keys(students[plan_id_column(student_plan)]))
+        borrower = np.where(pos >= 0, student_names[np.maximum(pos, 0)], None)
+    else:
+        full = plan_column(loan_plan, 'full_name')
+        borrower = text_values(loans, loan_plan, 'full_name') if full else borrower_names(
+            text_values(loans, loan_plan, 'first_name'), text_values(loans, loan_plan, 'last_name'))
+        # StudentNumber: first student whose "ad soyad" matches, as DatabaseAdminController does
+        pos = lookup_positions(pd.Series(borrower, dtype=object).str.lower(),
+                               pd.Series(student_names, dtype=object).str.lower())
+    student_number = np.where(pos >= 0, number[np.maximum(pos, 0)], None)
+    normalized = pd.Series(borrower, dtype=object).str.split().str.join(' ').str.lower().to_numpy(dtype=object)
+
+    issue_col, return_col = plan_column(loan_plan, 'issue_date'), plan_column(loan_plan, 'return_date')
+    issue, teslim = column_days(loans, issue_col), column_days(loans, return_col)
+    status_col = plan_column(loan_plan, 'status')
+    status = loans[status_col].astype(object).to_numpy() if status_col else np.full(n, None, dtype=object)
+    returned = np.isin(status, RETURNED_STATUS + LATE_STATUS) & ~np.isnat(teslim) & ~np.isnat(issue)
+    late = np.isin(status, LATE_STATUS) & returned
+
+    # returned rows: TeslimTarihi is the return day and the due day follows the loan period;
+    # open rows: Teslim Tarihi is the due day (the import's reading of the column)
+    period = np.timedelta64(loan_days, 'D')
+    due = np.where(returned | np.isnat(teslim), issue + period, teslim)
+    issue = np.where(np.isnat(issue), due - period, issue)
+    returned_at = np.where(returned, teslim, np.datetime64('NaT'))
+    late_days = np.where(late, np.maximum((returned_at - due).astype('timedelta64[D]').astype(np.int64), 0), 0)
+    duration = np.where(returned, np.maximum((returned_at - issue).astype('timedelta64[D]').astype(np.int64), 1), 0)
+    loan_length = np.maximum((due - issue).astype('timedelta64[D]').astype(np.int64), 1)
+
+    staff = text_values(loans, loan_plan, 'staff')
+    staff[pd.isna(staff)] = DEFAULT_STAFF
+    keep = (book_code >= 0) & pd.notna(borrower) & ~np.isnat(due)
+    return {
+        'book': book_code[keep],
+        'Borrower': borrower[keep],
+        'NormalizedBorrower': normalized[keep],
+        'StudentNumber': student_number[keep],
+        'BorrowedAt': day_text(issue[keep]),
+        'DueDate': day_text(due[keep]),
+        'LoanDays': loan_length[keep],
+        'ReturnedAt': day_text(returned_at[keep]),
+        'Staff': staff[keep],
+        'WasLate': late[keep].astype(np.int64),
+        'LateDays': late_days[keep],
+        'DurationDays': np.where(returned[keep], duration[keep], None),
+        'returned': returned[keep],
+    }, int(n - keep.sum())
+
+
+def column_lists(columns, names):
+    # executemany wants Python rows; numpy scalars are not accepted by sqlite3
+    return [columns[c].tolist() if isinstance(columns[c], np.ndarray) else list(columns[c]) for c in names]
+
+
+def insert_rows(conn, table, columns, names, batch_rows=BATCH_ROWS):
+    """executemany in batches of batch_rows inside one transaction per table."""
+    quoted = ', '.join(f'"{c}"' for c in names)
+    sql = f'INSERT INTO "{table}" ({quoted}) VALUES ({", ".join("?" * len(names))})'
+    total = len(columns[names[0]]) if names else 0
+    conn.execute('BEGIN')
+    for start in range(0, total, batch_rows):
+        part = {c: columns[c][start:start + batch_rows] for c in names}
+        conn.executemany(sql, zip(*column_lists(part, names)))
+    conn.execute('COMMIT')
+    return total
+
+
+def export_sqlite(path, books, students, loans, plans=None, seed=None, loan_days=DEFAULT_LOAN_DAYS,
+                  batch_rows=BATCH_ROWS):
+    """Write books/students/loans into a fresh SQLite file at `path`; returns row counts and timings."""
+    plans = plans or build_plans(books, students, loans)
+    started = time.perf_counter()
+    book_columns, book_codes = book_rows(books, plans['book'], seed)
+    user_columns, student_keep = student_rows(students, plans['student'])
+    loan_columns, skipped = loan_rows(loans, plans, books, book_columns, book_codes, students, student_keep,
+                                      loan_days)
+    guids = book_columns['Id']
+    active = ~loan_columns['returned']
+
+    # each open loan takes one copy, as the import decrements Quantity
+    out = np.bincount(loan_columns['book'][active], minlength=len(guids))
+    total = book_columns['TotalQuantity']
+    book_columns.update({
+        'Quantity': np.maximum(total - out, 0),
+        'HealthyCount': total,
+        'DamagedCount': np.zeros(len(guids), dtype=np.int64),
+        'LostCount': np.zeros(len(guids), dtype=np.int64),
+    })
+    n_students = len(user_columns['Name'])
+    user_columns.update({
+        'Id': np.arange(ADMIN_USER['Id'] + 1, ADMIN_USER['Id'] + 1 + n_students, dtype=np.int64),
+        'Role': np.full(n_students, 'Student', dtype=object),
+        'PenaltyPoints': np.zeros(n_students, dtype=np.int64),
+        'RecoveryCodeUsed': np.zeros(n_students, dtype=np.int64),
+    })
+    titles, authors, categories = book_columns['Title'], book_columns['Author'], book_columns['Category']
+    codes = loan_columns['book']
+    history = {
+        'BookId': guids[codes], 'BookTitle': titles[codes], 'BookAuthor': authors[codes],
+        'BookCategory': categories[codes],
+        'BorrowPersonel': loan_columns['Staff'],
+        'ReturnPersonel': np.where(loan_columns['returned'], loan_columns['Staff'], None),
+        'Status': np.where(loan_columns['returned'], 'RETURNED', 'ACTIVE').astype(object),
+        **{c: loan_columns[c] for c in ('Borrower', 'NormalizedBorrower', 'StudentNumber', 'BorrowedAt', 'DueDate',
+                                        'LoanDays', 'ReturnedAt', 'WasLate', 'LateDays', 'DurationDays')},
+    }
+    open_loans = {
+        'BookId': guids[codes[active]],
+        'Borrower': loan_columns['Borrower'][active],
+        'DueDate': loan_columns['DueDate'][active],
+        'Staff': loan_columns['Staff'][active],
+    }
+    prepared = time.perf_counter()
+
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp, isolation_level=None)
+    try:
+        for pragma in LOAD_PRAGMAS:
+            conn.execute(pragma)
+        for ddl in SCHEMA:
+            conn.execute(ddl)
+        conn.execute('INSERT INTO "Users" ("Id", "Username", "Password", "Role", "Name", "Surname", '
+                     '"PenaltyPoints", "RecoveryCodeUsed") VALUES (?, ?, ?, ?, ?, ?, 0, 0)',
+                     tuple(ADMIN_USER.values()))
+        rows = {
+            'books': insert_rows(conn, 'Books', book_columns, ['Id', 'Title', 'Author', 'Category', 'Quantity',
+                                                               'TotalQuantity', 'HealthyCount', 'DamagedCount',
+                                                               'LostCount', 'Shelf', 'Publisher', 'Summary',
+                                                               'BookNumber', 'Year', 'PageCount'], batch_rows),
+            'students': insert_rows(conn, 'Users', user_columns, ['Id', 'Role', 'Name', 'Surname', 'Class', 'Branch',
+                                                                  'StudentNumber', 'PenaltyPoints',
+                                                                  'RecoveryCodeUsed'], batch_rows),
+            'loans': insert_rows(conn, 'Loans', open_loans, ['BookId', 'Borrower', 'DueDate', 'Staff'], batch_rows),
+            'loan_history': insert_rows(conn, 'LoanHistory', history, list(history), batch_rows),
+        }
+        loaded = time.perf_counter()
+        for ddl in INDEXES:
+            conn.execute(ddl)
+        conn.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    done = time.perf_counter()
+    rows['skipped_loans'] = skipped
+    return {'rows': rows, 'seconds': {'prepare': round(prepared - started, 3), 'insert': round(loaded - prepared, 3),
+                                      'index': round(done - loaded, 3), 'total': round(done - started, 3)}}
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='Çalışma kitaplarını backend SQLite şemasına doğrudan aktar')
+    p.add_argument('--out', required=True, help='Yazılacak SQLite dosyası (varsa üzerine yazılır)')
+    p.add_argument('--books', default=BOOKS_FN, help=f'Kitap çalışma kitabı. Varsayılan: {BOOKS_FN}')
+    p.add_argument('--students', default=STUDENTS_FN, help=f'Öğrenci çalışma kitabı. Varsayılan: {STUDENTS_FN}')
+    p.add_argument('--loans', default=LOANS_FN, help=f'Ödünç çalışma kitabı. Varsayılan: {LOANS_FN}')
+    p.add_argument('--loan-days', type=int, default=DEFAULT_LOAN_DAYS,
+                   help=f'Son teslim günü bilinmeyen ödünçler için süre (gün). Varsayılan: {DEFAULT_LOAN_DAYS}')
+    p.add_argument('--seed', type=int, default=None, help='Kitap GUID\'leri için tohum (tekrarlanabilir dosya)')
+    return p.parse_args(argv)
+
+
+def print_summary(path, result):
+    rows, seconds = result['rows'], result['seconds']
+    print(f"SQLite -> {path}: {rows['books']} kitap, {rows['students']} öğrenci, {rows['loans']} açık ödünç, "
+          f"{rows['loan_history']} geçmiş kaydı ({rows['skipped_loans']} ödünç atlandı) "
+          f"[hazırlık {seconds['prepare']} sn, ekleme {seconds['insert']} sn, indeks {seconds['index']} sn]")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    books, students, loans = load_df(args.books), load_df(args.students), load_df(args.loans)
+    result = export_sqlite(args.out, books, students, loans, seed=args.seed, loan_days=args.loan_days)
+    print_summary(args.out, result)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
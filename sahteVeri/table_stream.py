@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Parça parça tablo yazıcı
+
+DataFrame'i ya da DataFrame parçalarını (chunk) dosya uzantısına göre xlsx,
+CSV ya da Parquet olarak yazar. Parçalar geldikçe yazılır; tablonun tamamı
+hiçbir zaman bellekte tutulmaz. Aynı satırlar tek DataFrame olarak ya da
+parçalar halinde verildiğinde aynı dosya içeriği çıkar:
+- xlsx: `xlsx_stream.write_xlsx` (satır sınırında yeni sayfa),
+- CSV: başlık bir kez, tarihler `YYYY-MM-DD`, UTF-8,
+- Parquet: ilk parçanın şeması, `ROW_GROUP_ROWS` satırlık satır grupları
+  (pyarrow gerekir).
+Dosya önce aynı dizinde geçici bir adla yazılır ve bitince `os.replace` ile
+yerine taşınır; yarıda kalan bir yazım eski dosyayı bozmaz, yarım dosya
+bırakmaz.
+
+Kullanım:
+    from table_stream import write_table
+    write_table('odunc listesi.parquet', generate_data.iter_loans(books, students, n=50_000_000))
+    write_table('odunc listesi.csv', loans_df)
+"""
+import os
+from pathlib import Path
+
+from xlsx_stream import iter_chunks, write_xlsx
+
+FORMATS = {'.xlsx': 'xlsx', '.csv': 'csv', '.parquet': 'parquet'}
+CSV_DATE_FORMAT = '%Y-%m-%d'
+# generate_data.SHARD_SIZE: a streamed chunk is exactly one row group
+ROW_GROUP_ROWS = 50_000
+
+
+def table_format(path):
+    fmt = FORMATS.get(Path(path).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"unsupported table format: {path} (use {', '.join(FORMATS)})")
+    return fmt
+
+
+def write_csv(path, data):
+    n = 0
+    header = True
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for chunk in iter_chunks(data):
+            chunk.to_csv(f, index=False, header=header, date_format=CSV_DATE_FORMAT)
+            header = False
+            n += len(chunk)
+    return n
+
+
+def write_parquet(path, data):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError('Parquet output needs pyarrow (pip install pyarrow)') from None
+    writer = None
+    schema = None
+    n = 0
+    try:
+        for chunk in iter_chunks(data):
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                # a column that is empty in the first chunk is typed null; store it as text
+                schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f
+                                    for f in table.schema], metadata=table.schema.metadata)
+                table = table.cast(schema)
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(table, row_group_size=ROW_GROUP_ROWS)
+            n += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n
+
+
+def write_table(path, data, columns=None):
+    """Write a DataFrame or DataFrame chunks to `path` (.xlsx/.csv/.parquet); returns the row count.
+
+    `columns` (plain row iterables) is only supported for xlsx.
+    """
+    fmt = table_format(path)
+    if columns is not None and fmt != 'xlsx':
+        raise ValueError(f'{fmt} output takes DataFrames, not plain rows')
+    path = Path(path)
+    # written next to the target and renamed over it, so readers never see a half-written file
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    try:
+        if fmt == 'xlsx':
+            n = write_xlsx(tmp, data, columns=columns)
+        else:
+            n = write_csv(tmp, data) if fmt == 'csv' else write_parquet(str(tmp), data)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return n
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Türkçe duyarlı metin karşılaştırma anahtarı
+
+Başlık, yazar, ad-soyad ve durum gibi serbest metinleri karşılaştırmadan
+önce tek bir biçime getirir: baştaki/sondaki boşluklar atılır, içteki
+boşluklar teke indirilir ve Türkçe büyük/küçük harf kuralıyla (İ -> i,
+I -> ı) küçültülür. Böylece "İnce" ile "ince", "ILGAZ" ile "ılgaz" aynı
+anahtarı verir. generate_data, check_integrity, loan_stats, catalog_diff,
+load_replay ve kök dizindeki duplicates.py aynı kuralı buradan kullanır.
+"""
+import numpy as np
+import pandas as pd
+
+# Turkish dotted/dotless capitals, which casefold() alone would map to 'i̇' / 'i'
+TR_CASE = str.maketrans({'İ': 'i', 'I': 'ı'})
+
+
+def fold_text(value):
+    """One value as its comparison text; missing cells become ''."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ''
+    return ' '.join(str(value).split()).translate(TR_CASE).casefold()
+
+
+def text_key(values):
+    """Comparable text: trimmed, inner whitespace collapsed, case-folded; empty cells stay missing.
+
+    Loan sheets repeat the same titles and names many times, so only the
+    distinct values are normalized and the result is spread back by code.
+    """
+    codes, uniques = pd.factorize(pd.Series(values).reset_index(drop=True))
+    text = pd.Series(uniques, dtype=object).astype(str).str.strip().str.replace(r'\s+', ' ', regex=True)
+    keys = text.str.translate(TR_CASE).str.casefold().where(text != '').to_numpy(dtype=object)
+    # factorize marks missing cells with -1, which picks the trailing None
+    return pd.Series(np.append(keys, None)[codes], dtype=object)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Benzersiz ve geçerli anahtar üretimi
+
+ISBN-13, öğrenci numarası ve e-posta gibi anahtarlar rastgele çekilmek yerine
+satırın konumundan (kimlik - 1) türetilir:
+- konum, anahtar uzayı üzerinde sabit bir permütasyondan (Feistel ağı +
+  cycle walking) geçirilir; farklı konumlar her zaman farklı anahtar verir,
+  sonuç rastgele görünür ve bellek gerektirmez,
+- ISBN-13 978/979 önekli 12 haneye doğru kontrol hanesi eklenerek yazılır,
+- e-postalar havuzdaki adresin yerel kısmına `.<konum>` eklenerek tekilleştirilir.
+
+Permütasyon tohumdan bağımsızdır (KEY_SEED): farklı tohumlarla yapılan
+çalıştırmalar ve --incremental eklemeleri, kimlikler çakışmadıkça aynı anahtarı
+iki kez üretmez. Çalışma kitabında dışarıdan gelen değerlerle çakışanlar
+`resolve_collisions` ile uzayın sonundan yeni değerlerle değiştirilir. Uzay
+dolunca KeySpaceExhausted yükseltilir. Permütasyon kriptografik değildir.
+
+Kullanım:
+    import unique_keys
+    isbns = unique_keys.isbn13(np.arange(1_000_000))
+"""
+import numpy as np
+
+KEY_SEED = 20240917
+ISBN_PREFIXES = (978, 979)
+ISBN_BODY_DIGITS = 9                  # registration group + publisher + title after the prefix
+ISBN_SPACE = len(ISBN_PREFIXES) * 10 ** ISBN_BODY_DIGITS
+STUDENT_NUMBER_MIN = 1
+STUDENT_NUMBER_MAX = 9_999_999
+STUDENT_NUMBER_SPACE = STUDENT_NUMBER_MAX - STUDENT_NUMBER_MIN + 1
+FEISTEL_ROUNDS = 4
+
+
+class KeySpaceExhausted(ValueError):
+    """Raised when more keys are requested than the key space holds."""
+
+
+def _round_keys(salt: int):
+    return np.random.default_rng([KEY_SEED, salt]).integers(0, 2 ** 32, size=FEISTEL_ROUNDS, dtype=np.uint64)
+
+
+def _feistel(x, half_bits: int, keys):
+    # balanced Feistel network on 2 * half_bits bits: a bijection for any round function
+    mask = np.uint64((1 << half_bits) - 1)
+    left, right = x >> np.uint64(half_bits), x & mask
+    for key in keys:
+        mixed = (right ^ key) * np.uint64(0x9E3779B97F4A7C15)
+        mixed ^= mixed >> np.uint64(29)
+        left, right = right, left ^ (mixed & mask)
+    return (left << np.uint64(half_bits)) | right
+
+
+def permute(positions, space: int, salt: int, name='key'):
+    """Distinct positions -> distinct values in [0, space).
+
+    A Feistel permutation of the smallest even bit width that holds the
+    space, with cycle walking: values that land outside the space are
+    permuted again until they fall inside, which keeps the map a bijection.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    if len(positions) and (positions.min() < 0 or positions.max() >= space):
+        raise KeySpaceExhausted(f'{name}: position {int(positions.max())} is outside a key space of {space} values')
+    half_bits = max(1, ((space - 1).bit_length() + 1) // 2)
+    keys = _round_keys(salt)
+    values = _feistel(positions.astype(np.uint64), half_bits, keys)
+    outside = values >= space
+    while outside.any():
+        values[outside] = _feistel(values[outside], half_bits, keys)
+        outside = values >= space
+    return values.astype(np.int64)
+
+
+def isbn_check_digits(body):
+    """ISBN-13 check digit of 12-digit integers: weights 1, 3, 1, 3... from the left."""
+    body = np.asarray(body, dtype=np.int64)
+    total = np.zeros(len(body), dtype=np.int64)
+    rest = body.copy()
+    for k in range(12):
+        # k counts from the right: the rightmost digit (12th from the left) has weight 3
+        total += (rest % 10) * (3 if k % 2 == 0 else 1)
+        rest //= 10
+    return (10 - total % 10) % 10
+
+
+def _digits_text(values, width: int):
+    out = np.empty((len(values), width), dtype=np.uint8)
+    rest = np.asarray(values, dtype=np.int64).copy()
+    for k in range(width - 1, -1, -1):
+        out[:, k] = rest % 10 + ord('0')
+        rest //= 10
+    return out.view(f'S{width}').ravel().astype(f'U{width}').astype(object)
+
+
+def isbn13(positions):
+    """Unique ISBN-13 strings with valid check digits, one per position (0 <= position < ISBN_SPACE)."""
+    values = permute(positions, ISBN_SPACE, 1, 'ISBN-13')
+    prefix = np.asarray(ISBN_PREFIXES, dtype=np.int64)[values // 10 ** ISBN_BODY_DIGITS]
+    body = prefix * 10 ** ISBN_BODY_DIGITS + values % 10 ** ISBN_BODY_DIGITS
+    return _digits_text(body * 10 + isbn_check_digits(body), 13)
+
+
+def is_valid_isbn13(values):
+    """Boolean array: 13 digits with a matching check digit."""
+    text = np.asarray(values, dtype=object).astype(str)
+    ok = np.array([len(t) == 13 and t.isdigit() for t in text], dtype=bool)
+    numbers = np.array([int(t) if k else 0 for t, k in zip(text, ok)], dtype=np.int64)
+    return ok & (isbn_check_digits(numbers // 10) == numbers % 10)
+
+
+def student_numbers(positions):
+    """Unique student numbers in [STUDENT_NUMBER_MIN, STUDENT_NUMBER_MAX]."""
+    return permute(positions, STUDENT_NUMBER_SPACE, 2, 'student number') + STUDENT_NUMBER_MIN
+
+
+def emails(positions, pool_values):
+    """Pool addresses made unique by the position: 'ayse.kaya@example.org' -> 'ayse.kaya.42@example.org'.
+
+    The suffix follows the last '.' of the local part and holds no '.', so
+    different positions never give the same address.
+    """
+    out = np.empty(len(pool_values), dtype=object)
+    out[:] = [
+        f"{local}.{k}@{domain or 'example.org'}"
+        for (local, _, domain), k in zip(map(lambda v: str(v).partition('@'), pool_values),
+                                         (np.asarray(positions, dtype=np.int64) + 1).tolist())
+    ]
+    return out
+
+
+def key_text(value):
+    # integral numbers as plain digits, everything else as stripped text
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def resolve_collisions(values, taken, make, space: int, name='key'):
+    """Replace values already in `taken` with make(positions) drawn from the top of the space downwards.
+
+    Used for values in the workbook that were not generated here; generated
+    keys only collide with those. Values are compared as text, so 12345 and
+    12345.0 from Excel meet. `values` is modified in place and returned.
+    """
+    taken = {key_text(v) for v in taken}
+    clash = np.flatnonzero(np.array([key_text(v) in taken for v in values], dtype=bool))
+    if not len(clash):
+        return values
+    taken.update(key_text(v) for v in values)
+    position = space - 1
+    for index in clash:
+        while True:
+            if position < 0:
+                raise KeySpaceExhausted(f'{name}: no free value left in a key space of {space} values')
+            candidate = make(np.array([position]))[0]
+            position -= 1
+            if key_text(candidate) not in taken:
+                break
+        values[index] = candidate
+        taken.add(key_text(candidate))
+    return values
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Önceden örneklenmiş Faker değer havuzları
+
+Ad, soyad, başlık, telefon, e-posta gibi metin sütunları her hücre için
+canlı Faker çağrısı yapmak yerine sınırlı bir havuzdan NumPy indeksleriyle
+seçilir. Havuzlar ilk kullanımda, sabit bir tohumla üretilir; böylece her
+süreç aynı havuzu kurar ve sonuç yalnızca örnekleme tohumuna bağlıdır.
+İstenirse havuzlar diske (JSON) yazılıp sonraki çalıştırmalarda okunur.
+
+Faker nesnesi de yalnızca gerçekten gerektiğinde (havuz kurulurken ya da
+havuz boyutu 0 iken) oluşturulur.
+
+Havuz boyutu benzersizlik ile hız arasındaki dengedir: büyük havuz daha çok
+farklı değer, küçük havuz daha hızlı başlangıç demektir. 0 verilirse her
+değer canlı Faker çağrısıyla üretilir (eski davranış).
+"""
+import json
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+LOCALE = 'tr_TR'
+DEFAULT_POOL_SIZE = 10_000
+POOL_SEED = 20240901
+
+POOL_SIZE = DEFAULT_POOL_SIZE
+CACHE_DIR = None
+
+_fake = None
+_live_seed = None
+_pools = {}
+
+
+def get_fake():
+    global _fake
+    if _fake is None:
+        from faker import Faker
+        _fake = Faker(LOCALE)
+        if _live_seed is not None:
+            _fake.seed_instance(_live_seed)
+    return _fake
+
+
+def configure(pool_size=DEFAULT_POOL_SIZE, cache_dir=None):
+    """Set pool size/cache; also used as the process pool initializer."""
+    global POOL_SIZE, CACHE_DIR
+    if pool_size != POOL_SIZE or cache_dir != CACHE_DIR:
+        _pools.clear()
+    POOL_SIZE = pool_size
+    CACHE_DIR = cache_dir
+
+
+def settings():
+    return (POOL_SIZE, CACHE_DIR)
+
+
+def seed_live(seed: int):
+    # Seeds live Faker calls (pool size 0); pools themselves use POOL_SEED
+    global _live_seed
+    _live_seed = seed
+    if _fake is not None:
+        _fake.seed_instance(seed)
+
+
+def _title(fake):
+    return fake.sentence(nb_words=fake.random_int(2, 6)).rstrip('.')
+
+
+VALUE_FACTORIES = {
+    'title': _title,
+    'name': lambda fake: fake.name(),
+    'first_name': lambda fake: fake.first_name(),
+    'last_name': lambda fake: fake.last_name(),
+    'phone': lambda fake: fake.phone_number(),
+    'email': lambda fake: fake.ascii_email(),
+    'word': lambda fake: fake.word(),
+}
+
+
+def _cache_path(kind):
+    return Path(CACHE_DIR) / f"{LOCALE}-{kind}-{POOL_SIZE}-{POOL_SEED}.json"
+
+
+def build_pool(kind):
+    factory = VALUE_FACTORIES[kind]
+    fake = get_fake()
+    fake.seed_instance(POOL_SEED + zlib.crc32(kind.encode()))
+    values = [factory(fake) for _ in range(POOL_SIZE)]
+    if _live_seed is not None:
+        fake.seed_instance(_live_seed)
+    return values
+
+
+def get_pool(kind):
+    pool = _pools.get(kind)
+    if pool is not None:
+        return pool
+    values = None
+    if CACHE_DIR:
+        path = _cache_path(kind)
+        if path.exists():
+            values = json.loads(path.read_text(encoding='utf-8'))
+    if values is None:
+        values = build_pool(kind)
+        if CACHE_DIR:
+            path = _cache_path(kind)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(values, ensure_ascii=False), encoding='utf-8')
+    pool = np.array(values, dtype=object)
+    _pools[kind] = pool
+    return pool
+
+
+def sample(kind, n: int, rng):
+    """n values of one kind: pool lookups by NumPy index, or live Faker calls when POOL_SIZE is 0."""
+    if POOL_SIZE <= 0:
+        fake = get_fake()
+        if kind == 'word':
+            return np.array(fake.words(nb=n), dtype=object)
+        factory = VALUE_FACTORIES[kind]
+        return np.array([factory(fake) for _ in range(n)], dtype=object)
+    pool = get_pool(kind)
+    return pool[rng.integers(0, len(pool), size=n)]
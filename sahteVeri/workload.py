@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Ödünç iş yükü profilleri
+
+Ödünç üretiminde kitap ve öğrenci seçimi varsayılan olarak düzgündür
+(uniform). Gerçek dolaşımda ise birkaç yüz başlık ve birkaç sınıf ödünçlerin
+çoğunu oluşturur; backend önbellekleri ve panonun sık sorguları ancak bu
+çarpık erişim örüntüsüyle doğru sınanır. Bu modül seçilebilir bileşenler
+sağlar:
+- zipf: kitap popülerliği Zipf / kuvvet yasası (sıra r için 1 / r^s),
+- class: öğrenciler sınıfına göre ağırlıklı (CLASS_WEIGHTS),
+- seasonal: veriliş tarihleri okul takvimine göre ağırlıklı (date_engine 'school'),
+- hotspot: kısa zaman pencerelerinde küçük bir kitap kümesine ani yoğunlaşma.
+
+Ağırlıklar bir kez alias tablosuna (Vose) çevrilir; her ödünç için seçim bir
+tam sayı, bir ondalık ve bir karşılaştırmadır, yani O(1). Tarih ağırlıkları
+kümülatif ağırlık + ikili aramayla (gün sayısı kadar, O(log 366)) seçilir.
+
+Kullanım:
+    import workload
+    spec = workload.parse_spec('zipf,class')
+    sampler = workload.build(spec, n_books, classes, rng, start, end)
+    books = workload.sample_books(sampler, n, rng, days)
+"""
+import numpy as np
+
+import date_engine
+
+COMPONENTS = ('zipf', 'class', 'seasonal', 'hotspot')
+PROFILES = {
+    'uniform': (),
+    'zipf': ('zipf',),
+    'class': ('class',),
+    'seasonal': ('seasonal',),
+    'hotspot': ('hotspot',),
+    'realistic': COMPONENTS,
+}
+
+DEFAULT_ZIPF_EXPONENT = 1.0
+# Relative borrowing rate per class; classes not listed weigh 1
+CLASS_WEIGHTS = {'9': 3.0, '10': 2.0, '11': 1.0, '12': 0.4, 'Hazırlık': 1.5}
+HOTSPOT_COUNT = 12        # bursts per year of history
+HOTSPOT_DAYS = 10         # length of one burst
+HOTSPOT_BOOKS = 25        # hot titles per burst
+HOTSPOT_SHARE = 0.4       # share of a burst day's loans that go to its hot titles
+
+
+def parse_spec(text, zipf_exponent=DEFAULT_ZIPF_EXPONENT):
+    """'realistic' or 'zipf,class,...' -> {'components': [...], 'zipf_exponent': s}; None for uniform."""
+    components = []
+    for name in (part.strip() for part in str(text).split(',')):
+        if not name:
+            continue
+        if name in PROFILES:
+            parts = PROFILES[name]
+        elif name in COMPONENTS:
+            parts = (name,)
+        else:
+            raise ValueError(f"Unknown workload profile: {name} (choose from {', '.join(PROFILES)})")
+        components.extend(p for p in parts if p not in components)
+    if not components:
+        return None
+    if zipf_exponent <= 0:
+        raise ValueError('Zipf exponent must be positive')
+    components = [c for c in COMPONENTS if c in components]
+    return {'components': components, 'zipf_exponent': float(zipf_exponent)}
+
+
+def build_alias(weights):
+    """Vose alias table (prob, alias) for non-negative weights; sampling is O(1) per draw."""
+    weights = np.asarray(weights, dtype=np.float64)
+    n = len(weights)
+    total = weights.sum()
+    if n == 0 or not total > 0:
+        raise ValueError('Alias table needs at least one positive weight')
+    scaled = weights * (n / total)
+    prob = np.ones(n)
+    alias = np.arange(n, dtype=np.int64)
+    small = np.flatnonzero(scaled < 1.0).tolist()
+    large = np.flatnonzero(scaled >= 1.0).tolist()
+    scaled = scaled.tolist()
+    while small and large:
+        s, g = small.pop(), large[-1]
+        prob[s] = scaled[s]
+        alias[s] = g
+        scaled[g] -= 1.0 - scaled[s]
+        if scaled[g] < 1.0:
+            small.append(large.pop())
+    # leftovers are 1 up to rounding
+    return prob, alias
+
+
+def alias_sample(table, n: int, rng):
+    prob, alias = table
+    picks = rng.integers(0, len(prob), size=n)
+    return np.where(rng.random(n) < prob[picks], picks, alias[picks])
+
+
+def zipf_weights(n: int, exponent, rng):
+    # popularity rank is a random permutation of the books, so hot titles are not just the lowest ids
+    ranks = rng.permutation(n) + 1
+    return 1.0 / ranks.astype(np.float64) ** exponent
+
+
+def class_weights(classes):
+    weights = {str(k): v for k, v in CLASS_WEIGHTS.items()}
+    return np.array([weights.get(str(c).strip(), 1.0) for c in classes], dtype=np.float64)
+
+
+def build_hotspots(n_books: int, start, end, rng):
+    """Burst windows over [start, end]: {'start', 'day_burst' (burst index per day, -1 outside), 'books'}."""
+    start, end = date_engine.to_day(start), date_engine.to_day(end)
+    span = int((end - start).astype(np.int64)) + 1
+    count = max(1, int(round(HOTSPOT_COUNT * span / 365)))
+    day_burst = np.full(span, -1, dtype=np.int64)
+    for burst, first in enumerate(np.sort(rng.integers(0, span, size=count))):
+        window = day_burst[first:first + HOTSPOT_DAYS]
+        window[window < 0] = burst
+    books = rng.integers(0, n_books, size=(count, min(HOTSPOT_BOOKS, n_books)))
+    return {'start': start, 'day_burst': day_burst, 'books': books}
+
+
+def build(spec, n_books: int, classes, rng, start, end):
+    """Sampler for one run: alias tables and burst windows built once, passed to every shard."""
+    components = spec['components'] if spec else []
+    sampler = {'n_books': n_books, 'n_students': len(classes), 'books': None, 'students': None,
+               'seasonal': 'seasonal' in components, 'hotspots': None,
+               'start': date_engine.to_day(start), 'end': date_engine.to_day(end)}
+    if 'zipf' in components:
+        sampler['books'] = build_alias(zipf_weights(n_books, spec['zipf_exponent'], rng))
+    if 'class' in components and len(classes):
+        weights = class_weights(classes)
+        if weights.min() != weights.max():
+            sampler['students'] = build_alias(weights)
+    if 'hotspot' in components:
+        sampler['hotspots'] = build_hotspots(n_books, start, end, rng)
+    return sampler
+
+
+def sample_dates(sampler, n: int, rng):
+    profile = 'school' if sampler['seasonal'] else 'uniform'
+    return date_engine.random_dates(sampler['start'], sampler['end'], n, rng, profile=profile)
+
+
+def sample_books(sampler, n: int, rng, days=None):
+    """Book indexes; with hotspots and issue days, burst days redirect HOTSPOT_SHARE of loans to hot titles."""
+    if sampler['books'] is None:
+        picks = rng.integers(0, sampler['n_books'], size=n)
+    else:
+        picks = alias_sample(sampler['books'], n, rng)
+    hotspots = sampler['hotspots']
+    if hotspots is None or days is None:
+        return picks
+    offsets = (np.asarray(days).astype('datetime64[D]') - hotspots['start']).astype(np.int64)
+    inside = (offsets >= 0) & (offsets < len(hotspots['day_burst']))
+    burst = np.full(n, -1, dtype=np.int64)
+    burst[inside] = hotspots['day_burst'][offsets[inside]]
+    hot = (burst >= 0) & (rng.random(n) < HOTSPOT_SHARE)
+    slots = rng.integers(0, hotspots['books'].shape[1], size=int(hot.sum()))
+    picks[hot] = hotspots['books'][burst[hot], slots]
+    return picks
+
+
+def sample_students(sampler, n: int, rng):
+    if sampler['students'] is None:
+        return rng.integers(0, sampler['n_students'], size=n)
+    return alias_sample(sampler['students'], n, rng)
+
+
+def top_share(table, fraction=0.01):
+    """Expected share of draws that land on the most popular `fraction` of items."""
+    prob, alias = table
+    n = len(prob)
+    mass = prob.copy()
+    np.add.at(mass, alias, 1.0 - prob)
+    k = max(1, int(n * fraction))
+    return float(np.sort(mass)[-k:].sum() / n)
+
+
+def describe(sampler):
+    parts = []
+    if sampler['books'] is not None:
+        parts.append(f"top 1% of books ≈ {top_share(sampler['books']):.0%} of draws")
+    if sampler['students'] is not None:
+        parts.append(f"top 10% of students ≈ {top_share(sampler['students'], 0.10):.0%} of draws")
+    if sampler['hotspots'] is not None:
+        hotspots = sampler['hotspots']
+        parts.append(f"{len(hotspots['books'])} hot-spot bursts on {int((hotspots['day_burst'] >= 0).sum())} days")
+    if sampler['seasonal']:
+        parts.append('school-calendar issue dates')
+    return ', '.join(parts) or 'uniform'
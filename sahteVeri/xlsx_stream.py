@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""Sabit bellekli xlsx yazıcı
+
+openpyxl'in write-only modu ile satırlar hücre nesnesi tutulmadan doğrudan
+dosyaya akıtılır. Girdi tek bir DataFrame, DataFrame parçaları (chunk) ya da
+satır üreteçleri olabilir. Excel'in 1.048.576 satır sınırına gelindiğinde
+başlık tekrar yazılarak otomatik olarak yeni sayfaya geçilir.
+
+Backend'in ExcelReaderService'i yalnızca ilk sayfayı okur; taşan satırlar
+"Sheet2", "Sheet3"... sayfalarında aynı başlıkla durur.
+
+Kullanım:
+    from xlsx_stream import write_xlsx
+    write_xlsx('odunc listesi.xlsx', (chunk for chunk in chunks))
+    write_xlsx('tarihler.xlsx', rows_iter, columns=['Tarih'])
+
+pandas yalnızca DataFrame verildiğinde kullanılır; satır yazan araçlar
+(ör. generate_dates.py) pandas yüklemeden çalışır.
+
+`append_xlsx` bu modülle yazılmış bir dosyanın son sayfasına, mevcut
+hücreleri ayrıştırmadan satır ekler: sayfa XML'i zip içinden akış halinde
+kopyalanır ve yeni satırlar `</sheetData>` öncesine yerleştirilir.
+
+`iter_xlsx_sheets` okuma tarafıdır: sayfa XML'ini zip içinden akıtır, satır
+ve hücreleri düzenli ifadelerle ayırır ve satırları değer demetleri olarak
+verir. XML ağacı ya da hücre nesnesi oluşturmadığı için openpyxl read-only
+modundan ≈ 3 kat hızlıdır; tarih biçimli sayılar datetime olarak döner.
+Paylaşılan dizeler (sharedStrings) bellekte tutulur, satırlar tutulmaz.
+"""
+import html
+import os
+import re
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+
+from openpyxl import Workbook
+
+EXCEL_MAX_ROWS = 1_048_576
+# Deflate level for spliced sheets: level 1 is several times faster than the default and ~10% larger
+APPEND_COMPRESSLEVEL = 1
+COPY_CHUNK = 1 << 20
+SHEET_TAIL = 4096
+
+_SHEET_NAME = re.compile(r'^xl/worksheets/sheet(\d+)\.xml$')
+_ROW_REF = re.compile(rb'<row r="(\d+)"')
+_CELL_REF = re.compile(rb'<c r="([A-Z]+)(\d+)"')
+_NS = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+_MAIN = '{%s}' % _NS['x']
+_DOC_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+# reader patterns; attributes are matched by name, so their order in the file does not matter
+_ROW = re.compile(rb'<row\b[^>]*?(?:/>|>(.*?)</row>)', re.S)
+_CELL = re.compile(rb'<c\b([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+_ATTR = re.compile(rb'\b([rst])="([^"]*)"')
+_VALUE = re.compile(rb'<v>(.*?)</v>', re.S)
+_TEXT = re.compile(rb'<t(?:\s[^>]*?)?(?<!/)>(.*?)</t>', re.S)
+_SHARED_STRING = re.compile(rb'<si>(.*?)</si>|<si/>', re.S)
+_PHONETIC = re.compile(rb'<rPh\b.*?</rPh>', re.S)
+
+
+def is_frame(obj):
+    # A DataFrame can only exist if pandas was already imported by the caller
+    pd = sys.modules.get('pandas')
+    return pd is not None and isinstance(obj, pd.DataFrame)
+
+
+def frame_rows(df):
+    """Yield plain Python rows for openpyxl: NaN/NaT -> None, midnight timestamps -> date."""
+    import numpy as np
+    import pandas as pd
+    columns = []
+    for c in df.columns:
+        s = df[c]
+        if s.dtype.kind == 'M':
+            if (s.dropna().dt.normalize() == s.dropna()).all():
+                values = np.array(s.dt.date, dtype=object)
+            else:
+                values = np.array(s.dt.to_pydatetime(), dtype=object)
+            values[s.isna().to_numpy()] = None
+        elif s.dtype.kind in 'iub':
+            values = s.to_numpy().tolist()
+        else:
+            values = s.astype(object).to_numpy()
+            mask = pd.isna(values)
+            if mask.any():
+                values = values.copy()
+                values[mask] = None
+            values = [v.item() if isinstance(v, np.generic) else v for v in values]
+        columns.append(values)
+    return zip(*columns)
+
+
+def iter_chunks(data):
+    if is_frame(data):
+        yield data
+        return
+    yield from data
+
+
+def write_xlsx(path, data, columns=None, sheet_name='Sheet1', max_rows=EXCEL_MAX_ROWS):
+    """Stream a DataFrame, DataFrame chunks or row iterables into an xlsx file.
+
+    Returns the number of data rows written.
+    """
+    wb = Workbook(write_only=True)
+    header = list(columns) if columns is not None else None
+    ws = None
+    sheet_rows = 0
+    total = 0
+    sheets = 0
+
+    def new_sheet():
+        nonlocal ws, sheet_rows, sheets
+        sheets += 1
+        ws = wb.create_sheet(sheet_name if sheets == 1 else f'Sheet{sheets}')
+        ws.append(header)
+        sheet_rows = 1
+
+    for chunk in iter_chunks(data):
+        if is_frame(chunk):
+            if header is None:
+                header = [str(c) for c in chunk.columns]
+            rows = frame_rows(chunk)
+        else:
+            rows = [chunk]
+        if header is None:
+            raise ValueError('columns must be given when writing plain rows')
+        if ws is None:
+            new_sheet()
+        for row in rows:
+            if sheet_rows >= max_rows:
+                new_sheet()
+            ws.append(row)
+            sheet_rows += 1
+            total += 1
+
+    if ws is None:
+        if header is None:
+            header = []
+        new_sheet()
+    wb.save(path)
+    return total
+
+
+def _cell_formats(styles_xml):
+    # cellXfs entries as comparable strings, with custom number formats inlined
+    root = ET.fromstring(styles_xml)
+    formats = {f.get('numFmtId'): f.get('formatCode') for f in root.findall('x:numFmts/x:numFmt', _NS)}
+    xfs = []
+    for xf in root.findall('x:cellXfs/x:xf', _NS):
+        attrs = dict(xf.attrib)
+        attrs['formatCode'] = formats.get(attrs.get('numFmtId'))
+        xfs.append(repr(sorted(attrs.items())))
+    return xfs
+
+
+def _styles_compatible(existing_xml, delta_xml):
+    # every style the delta may reference must mean the same thing in the existing workbook
+    existing, delta = _cell_formats(existing_xml), _cell_formats(delta_xml)
+    return len(delta) <= len(existing) and existing[:len(delta)] == delta
+
+
+def _last_sheet(names):
+    sheets = [(int(m.group(1)), n) for n in names for m in [_SHEET_NAME.match(n)] if m]
+    return max(sheets)[1] if sheets else None
+
+
+def _copy_sheet_head(fin, fout):
+    """Copy a sheet stream except its last SHEET_TAIL bytes; returns (tail, last row number)."""
+    held = b''
+    last_row = None
+    first = True
+    while True:
+        chunk = fin.read(COPY_CHUNK)
+        if not chunk:
+            return held, last_row
+        if first and b'<dimension' in chunk[:SHEET_TAIL]:
+            # write_xlsx never emits <dimension>; a stale one would mislead readers
+            return None, None
+        first = False
+        held += chunk
+        pos = held.rfind(b'<row r="')
+        m = _ROW_REF.match(held, pos) if pos >= 0 else None
+        if m:
+            last_row = int(m.group(1))
+        if len(held) > SHEET_TAIL:
+            fout.write(held[:-SHEET_TAIL])
+            held = held[-SHEET_TAIL:]
+
+
+def _copy_rows_shifted(fin, fout, shift):
+    # stream the delta's data rows (header skipped) with row and cell references moved down by `shift`
+    def renumber(block):
+        block = _ROW_REF.sub(lambda m: b'<row r="%d"' % (int(m.group(1)) + shift), block)
+        return _CELL_REF.sub(lambda m: b'<c r="%s%d"' % (m.group(1), int(m.group(2)) + shift), block)
+
+    buf = b''
+    header_done = False
+    while True:
+        chunk = fin.read(COPY_CHUNK)
+        buf += chunk
+        if not header_done:
+            start = buf.find(b'</row>')
+            if start < 0 and chunk:
+                continue
+            buf = buf[start + len(b'</row>'):]
+            header_done = True
+        if not chunk:
+            end = buf.rfind(b'</sheetData>')
+            fout.write(renumber(buf[:end]))
+            return
+        cut = buf.rfind(b'</row>')
+        if cut >= 0:
+            cut += len(b'</row>')
+            fout.write(renumber(buf[:cut]))
+            buf = buf[cut:]
+
+
+def append_xlsx(path, data, columns=None, max_rows=EXCEL_MAX_ROWS, compresslevel=APPEND_COMPRESSLEVEL):
+    """Append rows to the last sheet of an xlsx written by write_xlsx, without parsing its cells.
+
+    Both the existing sheet and the new rows are streamed, so memory does not
+    grow with either. Returns the number of rows appended, or None when the
+    file cannot be spliced (different writer, incompatible styles, or the
+    sheet would pass `max_rows`); callers then fall back to a full rewrite.
+    """
+    path = Path(path)
+    with tempfile.TemporaryDirectory(dir=path.parent) as tmp:
+        delta_path = Path(tmp) / 'delta.xlsx'
+        n = write_xlsx(delta_path, data, columns=columns, max_rows=max_rows)
+        if n == 0:
+            return 0
+        out_path = Path(tmp) / 'out.xlsx'
+        with zipfile.ZipFile(delta_path) as dz, zipfile.ZipFile(path) as src, \
+                zipfile.ZipFile(out_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as dst:
+            names = src.namelist()
+            sheet = _last_sheet(names)
+            if _last_sheet(dz.namelist()) != 'xl/worksheets/sheet1.xml' or sheet is None or 'xl/styles.xml' not in names:
+                return None
+            if not _styles_compatible(src.read('xl/styles.xml'), dz.read('xl/styles.xml')):
+                return None
+            for info in src.infolist():
+                if info.filename != sheet:
+                    dst.writestr(info, src.read(info.filename))
+                    continue
+                with src.open(info) as fin, dst.open(sheet, 'w', force_zip64=True) as fout:
+                    held, last_row = _copy_sheet_head(fin, fout)
+                    marker = held.rfind(b'</sheetData>') if held is not None else -1
+                    if marker < 0 or last_row is None or last_row + n > max_rows:
+                        return None
+                    fout.write(held[:marker])
+                    with dz.open('xl/worksheets/sheet1.xml') as delta:
+                        # delta data rows start at row 2
+                        _copy_rows_shifted(delta, fout, last_row - 1)
+                    fout.write(held[marker:])
+        os.replace(out_path, path)
+    return n
+
+
+def _xml_text(raw):
+    text = raw.decode('utf-8')
+    return html.unescape(text) if '&' in text else text
+
+
+def _sheet_members(zf):
+    # (sheet name, zip member) in workbook order
+    rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    targets = {r.get('Id'): r.get('Target') for r in rels.iter(f'{_PKG_REL}Relationship')}
+    sheets = []
+    for sheet in ET.fromstring(zf.read('xl/workbook.xml')).iter(f'{_MAIN}sheet'):
+        target = targets.get(sheet.get(f'{_DOC_REL}id'), '')
+        sheets.append((sheet.get('name'), target.lstrip('/') if target.startswith('/') else f'xl/{target}'))
+    return sheets
+
+
+def _iter_blocks(f, pattern, end_tag):
+    # regex matches over a zip member stream, cut after the last complete `end_tag`
+    buf = b''
+    while True:
+        chunk = f.read(COPY_CHUNK)
+        buf += chunk
+        cut = buf.rfind(end_tag) + len(end_tag) if chunk else len(buf)
+        if cut >= len(end_tag) or not chunk:
+            yield from pattern.finditer(buf, 0, cut)
+            buf = buf[cut:]
+        if not chunk:
+            return
+
+
+def _shared_strings(zf):
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return []
+    with zf.open('xl/sharedStrings.xml') as f:
+        # plain <t> or rich-text runs; phonetic hints (<rPh>) are not part of the value
+        return [''.join(map(_xml_text, _TEXT.findall(_PHONETIC.sub(b'', m.group(1) or b''))))
+                for m in _iter_blocks(f, _SHARED_STRING, b'</si>')]
+
+
+def _date_styles(zf):
+    # indexes of cellXfs whose number format is a date
+    from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+    if 'xl/styles.xml' not in zf.namelist():
+        return set()
+    root = ET.fromstring(zf.read('xl/styles.xml'))
+    formats = {int(f.get('numFmtId')): f.get('formatCode') for f in root.findall('x:numFmts/x:numFmt', _NS)}
+    dates = set()
+    for i, xf in enumerate(root.findall('x:cellXfs/x:xf', _NS)):
+        fmt_id = int(xf.get('numFmtId', 0))
+        code = formats.get(fmt_id, BUILTIN_FORMATS.get(fmt_id))
+        if code and is_date_format(code):
+            dates.add(i)
+    return dates
+
+
+@lru_cache(maxsize=None)
+def _column_index(letters):
+    # b'AB' -> 27; a sheet has at most 16384 distinct column letters
+    index = 0
+    for ch in letters:
+        index = index * 26 + ch - 64
+    return index - 1
+
+
+def _sheet_rows(f, strings, dates):
+    from openpyxl.utils.datetime import from_excel
+    for row in _iter_blocks(f, _ROW, b'</row>'):
+        values = []
+        for attr_text, inner in _CELL.findall(row.group(1) or b''):
+            attrs = dict(_ATTR.findall(attr_text))
+            ref = attrs.get(b'r')
+            if ref is not None:
+                column = _column_index(ref.rstrip(b'0123456789'))
+                if column > len(values):
+                    values.extend([None] * (column - len(values)))
+            kind = attrs.get(b't')
+            if kind == b'inlineStr':
+                parts = _TEXT.findall(inner)
+                # an inline string cell with no <is> body is blank, as openpyxl reads it
+                values.append(_xml_text(parts[0]) if len(parts) == 1 else ''.join(map(_xml_text, parts)) or None)
+                continue
+            v = _VALUE.search(inner) if inner else None
+            if v is None:
+                value = None
+            elif kind == b's':
+                value = strings[int(v.group(1))]
+            elif kind in (b'str', b'e'):
+                value = _xml_text(v.group(1))
+            elif kind == b'b':
+                value = v.group(1) == b'1'
+            else:
+                text = v.group(1)
+                style = attrs.get(b's')
+                if style is not None and int(style) in dates:
+                    value = from_excel(float(text))
+                elif b'.' in text or b'E' in text or b'e' in text:
+                    value = float(text)
+                else:
+                    value = int(text)
+            values.append(value)
+        yield tuple(values)
+
+
+def iter_xlsx_sheets(path):
+    """(sheet name, row iterator) per sheet in workbook order; consume each iterator before the next.
+
+    Rows are tuples of str/int/float/bool/datetime/None up to the last
+    non-empty cell; empty rows the file does not store are not yielded.
+    """
+    with zipfile.ZipFile(path) as zf:
+        strings = _shared_strings(zf)
+        dates = _date_styles(zf)
+        for name, member in _sheet_members(zf):
+            with zf.open(member) as f:
+                yield name, _sheet_rows(f, strings, dates)
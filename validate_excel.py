@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Excel doğrulama aracı
+
+Kitap, öğrenci ve ödünç çalışma kitaplarını içe aktarma öncesinde kontrol eder.
+Her dosya/sayfa ayrı bir süreçte (process pool) excel_scan ile tek geçişte
+taranır; sonuç dosya başına satır/sütun sayısı, boş satırlar, tekrar eden
+kayıtlar ve süre bilgisiyle JSON rapor olarak yazılır.
+
+Sütunlar backend'deki ExcelReaderService.FindColumnIndex ile aynı anahtar
+kelimelerle bulunur. Zorunlu sütunu olmayan, okunamayan ya da verilen
+eşikleri aşan dosya varsa çıkış kodu 1'dir.
+
+Kullanım:
+python3 validate_excel.py "kitap listesi.xlsx" ogrenci_listesi.xlsx --report rapor.json
+python3 validate_excel.py subeler/*.xlsx --jobs 8 --max-empty-rows 0 --max-duplicates 0
+python3 validate_excel.py yukleme.xlsx --kind books --all-sheets
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import openpyxl
+
+from excel_scan import scan_workbook
+
+# Header keywords per kind, same matching rule as ExcelReaderService.FindColumnIndex
+# (first header that contains any keyword, case-insensitive).
+KIND_COLUMNS = {
+    'books': {
+        'required': [('title', ('title', 'baslik', 'başlık')), ('author', ('author', 'yazar'))],
+        'keys': ['title', 'author'],
+    },
+    'students': {
+        'required': [('name', ('name', 'ad'))],
+        'optional': [('surname', ('surname', 'soyad')), ('numara', ('numara', 'studentnumber'))],
+        'keys': ['numara'],
+        'fallback_keys': ['name', 'surname'],
+    },
+    'loans': {
+        'required': [('book', ('kitap', 'book', 'başlık', 'baslik', 'title')),
+                     ('student', ('ogrenci', 'öğrenci', 'student', 'ad'))],
+        'keys': None,  # whole row
+    },
+}
+
+KIND_FILENAME_HINTS = [
+    ('loans', ('odunc', 'ödünç', 'loan')),
+    ('students', ('ogrenci', 'öğrenci', 'student')),
+    ('books', ('kitap', 'book')),
+]
+
+MAX_LISTED_ROWS = 100
+MAX_LISTED_DUPLICATES = 10
+
+
+def find_column(header, keywords):
+    for i, value in enumerate(header):
+        text = str(value).strip().lower() if value is not None else ""
+        if any(k in text for k in keywords):
+            return i
+    return -1
+
+
+def guess_kind(path, header):
+    name = Path(path).name.lower()
+    for kind, hints in KIND_FILENAME_HINTS:
+        if any(h in name for h in hints):
+            return kind
+    text = " ".join(str(h).lower() for h in header if h is not None)
+    if any(k in text for k in ('teslim', 'odunc', 'ödünç', 'verilis')):
+        return 'loans'
+    if find_column(header, ('title', 'baslik', 'başlık')) >= 0:
+        return 'books'
+    return 'students'
+
+
+def read_header(path, sheet):
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        return list(next(ws.iter_rows(max_row=1, values_only=True), ()))
+    finally:
+        wb.close()
+
+
+def resolve_columns(kind, header):
+    spec = KIND_COLUMNS[kind]
+    found = {name: find_column(header, keywords) for name, keywords in spec['required'] + spec.get('optional', [])}
+    missing = [name for name, _ in spec['required'] if found[name] < 0]
+    required = [found[name] for name, _ in spec['required'] if found[name] >= 0]
+    if spec['keys'] is None:
+        keys = list(range(len(header)))
+    elif all(found[k] >= 0 for k in spec['keys']):
+        keys = [found[k] for k in spec['keys']]
+    else:
+        keys = [found[k] for k in spec.get('fallback_keys', []) if found[k] >= 0] or required
+    return missing, required, keys
+
+
+def validate_one(job):
+    path, sheet, kind, limits = job
+    started = time.perf_counter()
+    report = {'path': str(path), 'sheet': sheet, 'kind': kind, 'status': 'ok', 'errors': []}
+    try:
+        header = read_header(path, sheet)
+        if kind == 'auto':
+            kind = guess_kind(path, header)
+        report['kind'] = kind
+        missing, required, keys = resolve_columns(kind, header)
+        if missing:
+            report['errors'].append(f"eksik zorunlu sütun: {', '.join(missing)}")
+        scan = scan_workbook(path, sheet=sheet, required_cols=required, key_cols=keys, preview_rows=0)
+    except Exception as ex:
+        report['status'] = 'fail'
+        report['errors'].append(f"okunamadı: {ex}")
+        report['seconds'] = round(time.perf_counter() - started, 3)
+        return report
+
+    duplicates = scan['duplicates']
+    duplicate_rows = sum(v - 1 for v in duplicates.values())
+    report.update({
+        'sheet': scan['sheet'],
+        'header': [str(h) if h is not None else None for h in scan['header']],
+        'rows': scan['row_count'],
+        'columns': scan['max_column'],
+        'valid_rows': scan['valid_rows'],
+        'empty_rows': len(scan['empty_rows']),
+        'empty_row_numbers': scan['empty_rows'][:MAX_LISTED_ROWS],
+        'duplicate_keys': len(duplicates),
+        'duplicate_rows': duplicate_rows,
+        'duplicate_examples': [
+            {'key': k, 'count': v}
+            for k, v in sorted(duplicates.items(), key=lambda kv: -kv[1])[:MAX_LISTED_DUPLICATES]
+        ],
+    })
+    max_empty, max_duplicates = limits
+    if max_empty is not None and report['empty_rows'] > max_empty:
+        report['errors'].append(f"boş satır sayısı {report['empty_rows']} > {max_empty}")
+    if max_duplicates is not None and duplicate_rows > max_duplicates:
+        report['errors'].append(f"tekrar eden satır sayısı {duplicate_rows} > {max_duplicates}")
+    if report['errors']:
+        report['status'] = 'fail'
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def build_jobs(args):
+    jobs = []
+    limits = (args.max_empty_rows, args.max_duplicates)
+    for path in args.paths:
+        if args.all_sheets:
+            try:
+                wb = openpyxl.load_workbook(path, read_only=True)
+                sheets = list(wb.sheetnames)
+                wb.close()
+            except Exception:
+                sheets = [None]  # validate_one reports the read error
+        else:
+            sheets = [args.sheet]
+        for sheet in sheets:
+            jobs.append((path, sheet, args.kind, limits))
+    return jobs
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description='Excel doğrulama aracı')
+    p.add_argument('paths', nargs='+', help='Doğrulanacak .xlsx dosyaları')
+    p.add_argument('--kind', '-k', choices=['auto', 'books', 'students', 'loans'], default='auto',
+                   help='Dosya türü. Varsayılan: dosya adı ve başlıklardan tahmin (auto)')
+    p.add_argument('--sheet', '-s', default=None, help='Okunacak sayfa adı. Varsayılan: etkin sayfa')
+    p.add_argument('--all-sheets', action='store_true', help='Her dosyadaki tüm sayfaları doğrula')
+    p.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, help='Paralel süreç sayısı. Varsayılan: CPU sayısı')
+    p.add_argument('--report', '-o', default='-', help='JSON rapor dosyası (- = stdout). Varsayılan: -')
+    p.add_argument('--max-empty-rows', type=int, default=None, help='İzin verilen en fazla boş satır (verilmezse kontrol edilmez)')
+    p.add_argument('--max-duplicates', type=int, default=None, help='İzin verilen en fazla tekrar eden satır (verilmezse kontrol edilmez)')
+    args = p.parse_args(argv)
+
+    started = time.perf_counter()
+    jobs = build_jobs(args)
+    if args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(jobs))) as pool:
+            files = list(pool.map(validate_one, jobs))
+    else:
+        files = [validate_one(job) for job in jobs]
+
+    ok = all(f['status'] == 'ok' for f in files)
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'ok': ok,
+        'seconds': round(time.perf_counter() - started, 3),
+        'files': files,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2, default=str)
+    if args.report == '-':
+        print(text)
+    else:
+        Path(args.report).write_text(text, encoding='utf-8')
+
+    for f in files:
+        sheet = f" [{f['sheet']}]" if f.get('sheet') else ""
+        detail = "; ".join(f['errors']) if f['errors'] else f"{f.get('rows', 0)} satır"
+        print(f"{f['status'].upper():4} {f['path']}{sheet} ({f['kind']}): {detail}", file=sys.stderr)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())